@@ -1,94 +1,227 @@
-from fastapi import APIRouter
-from typing import Dict, Any
-from core.analysis_service import (
-    get_salary_analysis, get_city_analysis, 
-    get_experience_analysis, get_industry_analysis
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from typing import Dict, List, Any, Awaitable, Callable, Optional
+from core.analysis_cache import analysis_cache
+from core.analytics_snapshot import read_analysis, snapshot_headers
+from core.analytics_stream import dashboard_events
+from core.analysis_service import get_salary_histogram
+from core.approx_analysis import get_approx_analysis
+from core.dashboard_service import (
+    DASHBOARD_PANELS, get_dashboard, salary_distribution_chart, city_salary_ranking_chart,
+    experience_distribution_chart, industry_salary_ranking_chart
 )
-from core.real_time_analysis import get_real_time_analysis
+from core.payload_cache import payload_cache, serialize_payload, etag_matches
+from core.job_query_cache import job_query_cache
+from core.salary_sketch import get_salary_percentiles
+from core.distinct_sketch import get_distinct_counts
+from core.salary_model import get_skill_premiums
+from core.olap_cube import CUBE_DIMENSIONS, job_cube
 
 router = APIRouter(prefix="/analysis", tags=["analysis"])
 
+# 近似分析的抽样方式：uniform 等概率抽样，stratified 按城市分层抽样
+SAMPLING_PATTERN = "^(uniform|stratified)$"
+
+def _split_values(value: Optional[str]) -> Optional[List[str]]:
+    """逗号分隔的查询参数转换为列表"""
+    if value is None:
+        return None
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+async def _cached_json(request: Request, build: Callable[[], Awaitable[Any]]) -> Response:
+    """
+    返回缓存的序列化结果并附带ETag，If-None-Match 与ETag一致时返回304；
+    ETag只由分析数据决定，快照代数和生成时间通过响应头返回
+    """
+    key = f"{request.url.path}?{request.url.query}"
+    version = payload_cache.version
+    hit, payload = payload_cache.get(key, version)
+    if not hit:
+        payload = serialize_payload(jsonable_encoder(await build()))
+        payload_cache.set(key, version, payload)
+    
+    headers = {**payload.headers, **snapshot_headers()}
+    if etag_matches(request.headers.get("if-none-match"), payload.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=payload.body, media_type="application/json", headers=headers)
+
+async def _analysis_payload(name: str, transform: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """读取分析结果，按需转换为图表格式"""
+    data, _ = await read_analysis(name)
+    return transform(data) if transform else data
+
 @router.get("/salary")
-async def salary_analysis():
-    """薪资分析"""
-    return await get_salary_analysis()
+async def salary_analysis(request: Request, approx: bool = False, sampling: str = Query("uniform", pattern=SAMPLING_PATTERN)):
+    """薪资分析，approx=true 时基于样本近似计算并返回置信区间"""
+    if approx:
+        return get_approx_analysis("salary", sampling)
+    return await _cached_json(request, lambda: _analysis_payload("salary"))
 
 @router.get("/city")
-async def city_analysis():
-    """城市分析"""
-    return await get_city_analysis()
+async def city_analysis(request: Request, approx: bool = False, sampling: str = Query("uniform", pattern=SAMPLING_PATTERN)):
+    """城市分析，approx=true 时基于样本近似计算并返回置信区间"""
+    if approx:
+        return get_approx_analysis("city", sampling)
+    return await _cached_json(request, lambda: _analysis_payload("city"))
 
 @router.get("/experience")
-async def experience_analysis():
-    """经验要求分析"""
-    return await get_experience_analysis()
+async def experience_analysis(request: Request, approx: bool = False, sampling: str = Query("uniform", pattern=SAMPLING_PATTERN)):
+    """经验要求分析，approx=true 时基于样本近似计算并返回置信区间"""
+    if approx:
+        return get_approx_analysis("experience", sampling)
+    return await _cached_json(request, lambda: _analysis_payload("experience"))
 
 @router.get("/industry")
-async def industry_analysis():
-    """行业分析"""
-    return await get_industry_analysis()
+async def industry_analysis(request: Request, approx: bool = False, sampling: str = Query("uniform", pattern=SAMPLING_PATTERN)):
+    """行业分析，approx=true 时基于样本近似计算并返回置信区间"""
+    if approx:
+        return get_approx_analysis("industry", sampling)
+    return await _cached_json(request, lambda: _analysis_payload("industry"))
 
 # 为了支持图表数据，我们也可以提供特定格式的数据端点
 @router.get("/salary-distribution")
-async def salary_distribution():
+async def salary_distribution(request: Request):
     """薪资分布数据，专为图表使用"""
-    data = await get_salary_analysis()
-    distribution = data.get("salary_distribution", {})
-    
-    # 转换为图表友好的格式
-    chart_data = [{"name": k, "value": v} for k, v in distribution.items()]
-    
-    return {
-        "title": "薪资分布",
-        "data": chart_data
-    }
+    return await _cached_json(request, lambda: _analysis_payload("salary", salary_distribution_chart))
 
 @router.get("/city-salary-ranking")
-async def city_salary_ranking():
+async def city_salary_ranking(request: Request):
     """城市薪资排名，专为图表使用"""
-    data = await get_city_analysis()
-    avg_salaries = data.get("city_average_salary", {})
-    
-    # 转换为前端期望的格式
-    cities = list(avg_salaries.keys())
-    salaries = list(avg_salaries.values())
-    
-    return {
-        "cities": cities,
-        "salaries": salaries
-    }
+    return await _cached_json(request, lambda: _analysis_payload("city", city_salary_ranking_chart))
 
 @router.get("/experience-distribution")
-async def experience_distribution():
+async def experience_distribution(request: Request):
     """经验分布数据，专为图表使用"""
-    data = await get_experience_analysis()
-    distribution = data.get("experience_distribution", {})
-    
-    # 转换为前端期望的格式
-    experiences = list(distribution.keys())
-    counts = list(distribution.values())
-    
-    return {
-        "experiences": experiences,
-        "counts": counts
-    }
+    return await _cached_json(request, lambda: _analysis_payload("experience", experience_distribution_chart))
 
 @router.get("/industry-salary-ranking")
-async def industry_salary_ranking():
+async def industry_salary_ranking(request: Request):
     """行业薪资排名，专为图表使用"""
-    data = await get_industry_analysis()
-    avg_salaries = data.get("average_salary_by_category", {})
+    return await _cached_json(request, lambda: _analysis_payload("industry", industry_salary_ranking_chart))
+
+# 直方图最多的区间数
+MAX_HISTOGRAM_BINS = 200
+
+@router.get("/salary-histogram")
+async def salary_histogram(
+    edges: Optional[str] = Query(None, description="区间内部边界，逗号分隔且递增，如 5000,10000,20000"),
+    bins: Optional[int] = Query(None, ge=1, le=MAX_HISTOGRAM_BINS, description="在薪资范围内等宽划分的区间数"),
+    city: Optional[str] = Query(None, description="城市，多个用逗号分隔"),
+    category: Optional[str] = Query(None, description="职位类别，多个用逗号分隔"),
+    mode: str = Query("midpoint", pattern="^(midpoint|overlap)$")
+):
+    """薪资直方图：按薪资中位值计数，或（overlap）统计薪资范围与各区间有交集的职位数"""
+    if edges is not None and bins is not None:
+        raise HTTPException(status_code=400, detail="edges 和 bins 只能指定一个")
     
-    # 转换为前端期望的格式
-    industries = list(avg_salaries.keys())
-    salaries = list(avg_salaries.values())
+    edge_values = []
+    if edges is not None:
+        try:
+            edge_values = [int(value) for value in _split_values(edges)]
+        except ValueError:
+            raise HTTPException(status_code=400, detail="edges 必须是整数")
+        if not edge_values or len(edge_values) >= MAX_HISTOGRAM_BINS:
+            raise HTTPException(status_code=400, detail=f"edges 数量应在 1 到 {MAX_HISTOGRAM_BINS - 1} 之间")
+        if any(low >= high for low, high in zip(edge_values, edge_values[1:])):
+            raise HTTPException(status_code=400, detail="edges 必须严格递增")
     
-    return {
-        "industries": industries,
-        "salaries": salaries
-    }
+    return await get_salary_histogram(
+        edges=tuple(edge_values),
+        bins=bins or 0,
+        cities=tuple(_split_values(city) or ()),
+        categories=tuple(_split_values(category) or ()),
+        mode=mode
+    )
 
 @router.get("/real-time")
-async def real_time_analysis():
+async def real_time_analysis(request: Request):
     """实时数据分析"""
-    return await get_real_time_analysis()
\ No newline at end of file
+    return await _cached_json(request, lambda: _analysis_payload("real_time"))
+
+@router.get("/dashboard")
+async def dashboard(
+    request: Request,
+    panels: Optional[str] = Query(None, description="面板名称，多个用逗号分隔，默认返回全部面板")
+):
+    """一次返回多个图表面板的数据，各面板的数据格式与对应的单独接口一致"""
+    requested = list(dict.fromkeys(_split_values(panels) or DASHBOARD_PANELS.keys()))
+    unknown = [panel for panel in requested if panel not in DASHBOARD_PANELS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"不支持的面板: {', '.join(unknown)}")
+    
+    async def build() -> Dict[str, Any]:
+        data, _ = await get_dashboard(requested)
+        return {"panels": data}
+    
+    return await _cached_json(request, build)
+
+@router.get("/stream")
+async def analysis_stream(request: Request):
+    """实时分析推送（Server-Sent Events）：先推送完整快照，之后只推送变化的部分"""
+    return StreamingResponse(
+        dashboard_events(request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/salary-percentiles")
+async def salary_percentiles(dimension: str = Query("city", pattern="^(city|category|experience)$")):
+    """按城市、类别或经验要求统计薪资中位数及 p25/p75/p90"""
+    return get_salary_percentiles(dimension)
+
+@router.get("/distinct-counts")
+async def distinct_counts(
+    dimension: str = Query("city", pattern="^(city|category)$"),
+    value: Optional[str] = Query(None, description="只返回指定城市或类别")
+):
+    """按城市或类别估计招聘公司数、职位名称数和技能数（HyperLogLog 去重计数）"""
+    return get_distinct_counts(dimension, value)
+
+@router.get("/skill-premiums")
+async def skill_premiums(
+    skill: Optional[str] = Query(None, description="只返回指定技能"),
+    limit: int = Query(20, ge=1, le=200)
+):
+    """技能薪资溢价：同城市、同经验要求下要求该技能的职位薪资高出的比例（按溢价降序）"""
+    result = get_skill_premiums(skill, limit)
+    if result is None:
+        raise HTTPException(status_code=503, detail="薪资模型尚未拟合，请稍后再试")
+    if skill is not None and result["skill"] is None:
+        raise HTTPException(status_code=404, detail=f"技能 {skill} 出现次数过少，未纳入薪资模型")
+    return result
+
+@router.get("/cube")
+async def cube_analysis(
+    city: Optional[str] = Query(None, description="城市，多个用逗号分隔"),
+    category: Optional[str] = Query(None, description="职位类别，多个用逗号分隔"),
+    experience: Optional[str] = Query(None, description="经验要求，多个用逗号分隔"),
+    education: Optional[str] = Query(None, description="学历要求，多个用逗号分隔"),
+    group_by: Optional[str] = Query(None, description="分组维度，如 city,experience")
+):
+    """多维切片分析：按任意维度组合筛选并分组统计职位数和平均薪资"""
+    dimensions = _split_values(group_by) or []
+    unknown = [dimension for dimension in dimensions if dimension not in CUBE_DIMENSIONS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"不支持的分组维度: {', '.join(unknown)}")
+    
+    filters = {
+        dimension: values
+        for dimension, values in {
+            "city": _split_values(city),
+            "category": _split_values(category),
+            "experience": _split_values(experience),
+            "education": _split_values(education)
+        }.items()
+        if values is not None
+    }
+    return job_cube.query(filters, list(dict.fromkeys(dimensions)))
+
+@router.get("/cache-stats")
+async def cache_stats():
+    """分析结果缓存的命中统计，payload_cache 为图表响应缓存、job_query_cache 为职位查询结果缓存的统计"""
+    return {
+        **analysis_cache.stats(),
+        "payload_cache": payload_cache.stats(),
+        "job_query_cache": job_query_cache.stats()
+    }
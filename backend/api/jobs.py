@@ -1,13 +1,20 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from typing import List, Optional
-from schemas.job import JobCreate, JobResponse
+from typing import List, Optional, Union
+from schemas.job import JobCreate, JobResponse, JobSearchResult, JobPage, JobSearchPage
 from core.job_service import (
-    create_job, get_jobs, get_job_by_id, 
-    search_jobs, delete_job, update_job
+    create_job, get_jobs, get_job_page, get_job_by_id, 
+    search_jobs, search_job_page, delete_job, update_job
 )
+from core.job_pagination import RELEVANCE, SORT_PATTERN
+from core.job_filter_index import FACET_PATTERN
 
 router = APIRouter(prefix="/jobs", tags=["jobs"])
 
+FACETS_DESCRIPTION = "逗号分隔的分面统计维度：city、category、experience、education、salary；指定时返回 {items, facets, ...}"
+
+def _facet_list(facets: Optional[str]) -> List[str]:
+    return facets.split(",") if facets else []
+
 @router.post("/", response_model=JobResponse)
 async def create_job_endpoint(job: JobCreate):
     """创建职位信息"""
@@ -21,7 +28,7 @@ async def get_job_endpoint(job_id: int):
         raise HTTPException(status_code=404, detail="Job not found")
     return job
 
-@router.get("/", response_model=List[JobResponse])
+@router.get("/", response_model=Union[List[JobResponse], JobPage])
 async def get_jobs_endpoint(
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
@@ -31,9 +38,31 @@ async def get_jobs_endpoint(
     salary_max: Optional[int] = Query(None, ge=0),
     experience: Optional[str] = Query(None),
     education: Optional[str] = Query(None),
-    category: Optional[str] = Query(None)
+    category: Optional[str] = Query(None),
+    pagination: str = Query("offset", pattern="^(offset|cursor)$", description="cursor 时按游标分页并返回 {items, next_cursor, prev_cursor}"),
+    sort: str = Query("id", pattern="^-?(id|salary_max|created_at)$", description="游标分页的排序方式，- 开头为降序"),
+    cursor: Optional[str] = Query(None, description="上一次响应中的 next_cursor 或 prev_cursor"),
+    facets: Optional[str] = Query(None, pattern=FACET_PATTERN, description=FACETS_DESCRIPTION)
 ):
     """获取职位列表"""
+    if pagination == "cursor" or cursor:
+        try:
+            return await get_job_page(
+                limit=limit,
+                keyword=keyword,
+                city=city,
+                salary_min=salary_min,
+                salary_max=salary_max,
+                experience=experience,
+                education=education,
+                category=category,
+                sort=sort,
+                cursor=cursor,
+                facets=_facet_list(facets)
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
     return await get_jobs(
         skip=skip, 
         limit=limit, 
@@ -43,7 +72,8 @@ async def get_jobs_endpoint(
         salary_max=salary_max,
         experience=experience,
         education=education,
-        category=category
+        category=category,
+        facets=_facet_list(facets)
     )
 
 @router.put("/{job_id}", response_model=JobResponse)
@@ -62,14 +92,24 @@ async def delete_job_endpoint(job_id: int):
         raise HTTPException(status_code=404, detail="Job not found")
     return {"message": "Job deleted successfully"}
 
-@router.get("/search/", response_model=List[JobResponse])
+@router.get("/search/", response_model=Union[List[JobSearchResult], JobSearchPage])
 async def search_jobs_endpoint(
     q: str = Query(..., min_length=1),
     city: Optional[str] = Query(None),
     salary_min: Optional[int] = Query(None),
     salary_max: Optional[int] = Query(None),
     skip: int = Query(0, ge=0),
-    limit: int = Query(10, ge=1, le=100)
+    limit: int = Query(10, ge=1, le=100),
+    pagination: str = Query("offset", pattern="^(offset|cursor)$", description="cursor 时按游标分页并返回 {items, next_cursor, prev_cursor}"),
+    sort: str = Query(RELEVANCE, pattern=SORT_PATTERN, description="游标分页的排序方式：relevance 或 id/salary_max/created_at，- 开头为降序"),
+    cursor: Optional[str] = Query(None, description="上一次响应中的 next_cursor 或 prev_cursor"),
+    facets: Optional[str] = Query(None, pattern=FACET_PATTERN, description=FACETS_DESCRIPTION)
 ):
-    """搜索职位"""
-    return await search_jobs(q, city, salary_min, salary_max, skip, limit)
\ No newline at end of file
+    """搜索职位：按相关度排序，附带相关度得分和高亮片段"""
+    if pagination == "cursor" or cursor:
+        try:
+            return await search_job_page(q, city, salary_min, salary_max, limit, sort, cursor, _facet_list(facets))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    return await search_jobs(q, city, salary_min, salary_max, skip, limit, _facet_list(facets))
\ No newline at end of file
@@ -6,6 +6,9 @@ from models import Job
 from sqlalchemy import func
 from datetime import datetime
 from utils.data_fetcher import fetch_job_data
+from utils.data_utils import job_record
+from core.rollup_service import add_jobs_to_rollups, clear_rollups
+from core.job_events import publish_job_change
 
 class ScrapingRequest(BaseModel):
     source: str
@@ -43,7 +46,7 @@ async def scrape_data_task(source: str):
             existing_count = db.query(func.count(Job.id)).scalar()
             
             # 批量插入新数据，智能去重
-            new_jobs_count = 0
+            new_jobs = []
             for job_data in jobs:
                 # 对于模拟数据，使用更宽松的重复检查
                 if source == "mock":
@@ -65,9 +68,14 @@ async def scrape_data_task(source: str):
                 if not existing_job:
                     job = Job(**job_data)
                     db.add(job)
-                    new_jobs_count += 1
+                    new_jobs.append(job)
             
+            db.flush()
+            new_records = [job_record(job) for job in new_jobs]
+            add_jobs_to_rollups(db, new_records)
             db.commit()
+            publish_job_change(added=new_records)
+            new_jobs_count = len(new_jobs)
             
             # 更新爬取状态
             scraping_status["job_count"] = new_jobs_count
@@ -171,7 +179,9 @@ async def clear_all_jobs():
     try:
         # 删除所有数据
         deleted_count = db.query(Job).delete()
+        clear_rollups(db)
         db.commit()
+        publish_job_change(reset=True)
         
         # 重置统计
         scraping_status["total_jobs"] = 0
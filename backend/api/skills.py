@@ -1,7 +1,9 @@
-from fastapi import APIRouter, HTTPException
-from typing import List
+from fastapi import APIRouter, HTTPException, Query
+from typing import List, Optional
 from schemas.skill import SkillAnalysisRequest, SkillAnalysisResponse
 from core.skill_analyzer import analyze_skills, get_skill_trends, extract_skills_from_text, get_skill_recommendations
+from core.skill_cooccurrence import TOP_K, get_related_skills
+from core.skill_heavy_hitters import get_popular_skills
 
 router = APIRouter(prefix="/skills", tags=["skills"])
 
@@ -11,9 +13,13 @@ async def analyze_skills_endpoint(request: SkillAnalysisRequest):
     return await analyze_skills(request)
 
 @router.get("/trends", response_model=dict)
-async def get_skill_trends_endpoint():
-    """获取技能趋势"""
-    return await get_skill_trends()
+async def get_skill_trends_endpoint(
+    window_days: int = Query(30, ge=1, le=365),
+    period: str = Query("day", pattern="^(day|week)$"),
+    limit: int = Query(5, ge=1, le=50)
+):
+    """获取技能趋势：对比最近 window_days 天与之前同样长度窗口的技能需求"""
+    return await get_skill_trends(window_days=window_days, period=period, limit=limit)
 
 @router.post("/extract", response_model=dict)
 async def extract_skills_endpoint(text: dict):
@@ -23,12 +29,37 @@ async def extract_skills_endpoint(text: dict):
     extracted_skills = await extract_skills_from_text(text["text"])
     return {"skills": extracted_skills}
 
+@router.get("/related", response_model=dict)
+async def get_related_skills_endpoint(skill: str, limit: int = Query(TOP_K, ge=1, le=TOP_K)):
+    """基于职位标签共现统计的相关技能（按 lift 排序，附带共现次数、PMI 和置信度）"""
+    return get_related_skills(skill, limit)
+
+@router.get("/popular", response_model=dict)
+async def get_popular_skills_endpoint(
+    city: Optional[str] = Query(None, description="只统计指定城市"),
+    category: Optional[str] = Query(None, description="只统计指定职位类别"),
+    limit: int = Query(10, ge=1, le=100)
+):
+    """当前职位中出现最多的技能（Space-Saving 计数，附带误差上界）"""
+    if city is not None and category is not None:
+        raise HTTPException(status_code=400, detail="city 和 category 只能指定一个")
+    if city is not None:
+        return get_popular_skills(limit, "city", city)
+    if category is not None:
+        return get_popular_skills(limit, "category", category)
+    return get_popular_skills(limit)
+
 @router.get("/top-skills", response_model=dict)
-async def get_top_skills_endpoint(limit: int = 10):
+async def get_top_skills_endpoint(
+    limit: int = 10,
+    window_days: int = Query(30, ge=1, le=365),
+    period: str = Query("day", pattern="^(day|week)$")
+):
     """获取热门技能列表"""
-    trends_data = await get_skill_trends()
+    trends_data = await get_skill_trends(window_days=window_days, period=period, limit=limit)
     return {
         "rising_skills": trends_data.get("rising_skills", [])[:limit],
+        "top_skills": trends_data.get("top_skills", [])[:limit],
         "total_skills_analyzed": trends_data.get("total_skills_analyzed", 0),
         "unique_skills": trends_data.get("unique_skills", 0)
     }
@@ -0,0 +1,170 @@
+"""
+列式聚合引擎
+只加载分析所需的列，一次性转换为NumPy数组（薪资中位值 + 字典编码的城市/类别/经验），
+再通过向量化分组（bincount）计算计数、均值和薪资分桶，避免逐行遍历ORM对象
+"""
+from typing import Dict, List, Any, Sequence, Tuple
+import numpy as np
+from sqlalchemy.orm import Session
+from models import Job
+
+# 薪资分布区间：按薪资中位值左闭右开划分
+SALARY_BUCKET_EDGES = [5000, 10000, 15000, 20000, 30000]
+SALARY_BUCKET_LABELS = ["0-5K", "5K-10K", "10K-15K", "15K-20K", "20K-30K", "30K+"]
+
+
+class EncodedColumn:
+    """字典编码的字符串列，codes[i] 是第 i 条职位的取值在 values 中的下标"""
+
+    def __init__(self, values: List[Any], codes: np.ndarray):
+        self.values = values
+        self.codes = codes
+
+    @classmethod
+    def encode(cls, raw: Sequence[Any]) -> "EncodedColumn":
+        """按首次出现顺序编码，保证分组结果的顺序与逐行遍历时一致"""
+        index: Dict[Any, int] = {}
+        codes = np.fromiter(
+            (index.setdefault(value, len(index)) for value in raw),
+            dtype=np.int32,
+            count=len(raw)
+        )
+        return cls(list(index.keys()), codes)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def counts(self) -> np.ndarray:
+        """每个取值的职位数量"""
+        return np.bincount(self.codes, minlength=len(self.values))
+
+    def sums(self, weights: np.ndarray) -> np.ndarray:
+        """每个取值的加权和（整数结果）"""
+        totals = np.bincount(self.codes, weights=weights, minlength=len(self.values))
+        return np.rint(totals).astype(np.int64)
+
+
+class JobColumns:
+    """职位分析所需的列式数据"""
+
+    def __init__(
+        self,
+        ids: np.ndarray,
+        salary_min: np.ndarray,
+        salary_max: np.ndarray,
+        city: EncodedColumn,
+        category: EncodedColumn,
+        experience: EncodedColumn,
+        education: EncodedColumn
+    ):
+        self.ids = ids
+        self.salary_min = salary_min
+        self.salary_max = salary_max
+        # 与原有逻辑一致：单个职位的薪资取 (最低 + 最高) // 2
+        self.salary_mid = (salary_min + salary_max) // 2
+        self.city = city
+        self.category = category
+        self.experience = experience
+        self.education = education
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Tuple]) -> "JobColumns":
+        """由 (id, salary_min, salary_max, city, category, experience, education) 行构建"""
+        if rows:
+            ids, salary_min, salary_max, city, category, experience, education = zip(*rows)
+        else:
+            ids = salary_min = salary_max = city = category = experience = education = ()
+
+        return cls(
+            ids=np.array(ids, dtype=np.int64),
+            salary_min=np.array([v or 0 for v in salary_min], dtype=np.int64),
+            salary_max=np.array([v or 0 for v in salary_max], dtype=np.int64),
+            city=EncodedColumn.encode(city),
+            category=EncodedColumn.encode(category),
+            experience=EncodedColumn.encode(experience),
+            education=EncodedColumn.encode(education)
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+def load_job_columns(db: Session) -> JobColumns:
+    """只查询分析需要的列，不加载描述、要求等大文本字段"""
+    rows = db.query(
+        Job.id,
+        Job.salary_min,
+        Job.salary_max,
+        Job.city,
+        Job.category,
+        Job.experience_required,
+        Job.education_required
+    ).all()
+    return JobColumns.from_rows(rows)
+
+
+def group_counts(column: EncodedColumn) -> Dict[Any, int]:
+    """各分组的职位数量，按分组首次出现顺序返回"""
+    return dict(zip(column.values, column.counts().tolist()))
+
+
+def group_average_salary(column: EncodedColumn, salary_mid: np.ndarray) -> Dict[Any, int]:
+    """各分组的平均薪资（整数），按分组首次出现顺序返回"""
+    counts = column.counts()
+    averages = column.sums(salary_mid) // np.maximum(counts, 1)
+    return dict(zip(column.values, averages.tolist()))
+
+
+def top_groups(scores: Dict[Any, int], limit: int) -> List[Tuple[Any, int]]:
+    """按分数降序取前 limit 个分组，分数相同时保持首次出现顺序"""
+    keys = list(scores.keys())
+    values = np.fromiter(scores.values(), dtype=np.int64, count=len(keys))
+    order = np.argsort(-values, kind="stable")[:limit]
+    return [(keys[i], int(values[i])) for i in order]
+
+
+def format_salary(value: int) -> str:
+    """薪资区间边界的显示形式，整千元显示为 K"""
+    return f"{value // 1000}K" if value % 1000 == 0 else str(value)
+
+
+def histogram_labels(edges: Sequence[int]) -> List[str]:
+    """以 edges 为内部边界的区间名称，与 SALARY_BUCKET_LABELS 的格式一致"""
+    labels = [f"0-{format_salary(edges[0])}"]
+    labels.extend(f"{format_salary(low)}-{format_salary(high)}" for low, high in zip(edges, edges[1:]))
+    labels.append(f"{format_salary(edges[-1])}+")
+    return labels
+
+
+def equal_width_edges(sorted_values: np.ndarray, bins: int) -> List[int]:
+    """在最小值和最大值之间等宽划分 bins 个区间，返回内部边界（取整后去重）"""
+    if not len(sorted_values) or bins < 2:
+        return []
+    edges = np.linspace(sorted_values[0], sorted_values[-1], bins + 1)[1:-1]
+    return sorted(set(np.rint(edges).astype(np.int64).tolist()))
+
+
+def histogram_counts(sorted_values: np.ndarray, edges: Sequence[int]) -> np.ndarray:
+    """
+    在已排序的数组上二分查找统计各区间的数量：
+    区间为 (-inf, e0), [e0, e1), ..., [ek, +inf)，共 len(edges) + 1 个
+    """
+    positions = np.searchsorted(sorted_values, edges, side="left")
+    return np.diff(np.concatenate(([0], positions, [len(sorted_values)])))
+
+
+def overlap_histogram_counts(sorted_min: np.ndarray, sorted_max: np.ndarray, edges: Sequence[int]) -> np.ndarray:
+    """
+    统计薪资范围 [最低, 最高] 与各区间有交集的职位数（一个职位可计入多个区间）：
+    与 [low, high) 相交的职位数 = #(最低薪资 < high) - #(最高薪资 < low)
+    """
+    below_high = np.append(np.searchsorted(sorted_min, edges, side="left"), len(sorted_min))
+    below_low = np.insert(np.searchsorted(sorted_max, edges, side="left"), 0, 0)
+    return below_high - below_low
+
+
+def salary_bucket_counts(salary_mid: np.ndarray) -> Dict[str, int]:
+    """按薪资中位值统计薪资分布"""
+    buckets = np.searchsorted(SALARY_BUCKET_EDGES, salary_mid, side="right")
+    counts = np.bincount(buckets, minlength=len(SALARY_BUCKET_LABELS))
+    return dict(zip(SALARY_BUCKET_LABELS, counts.tolist()))
@@ -0,0 +1,109 @@
+"""
+分析结果缓存
+缓存键包含单调递增的"职位数据版本"，职位写入、爬取入库和清空数据都会使版本递增，
+旧版本的结果随之失效；条目同时受TTL和LRU容量限制
+"""
+import functools
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Callable, Hashable, Tuple
+from core.job_events import JobChangeEvent, register_job_listener
+
+
+class VersionedResultCache:
+    """按数据版本失效的进程内LRU缓存"""
+
+    def __init__(self, max_entries: int = 128, ttl_seconds: float = 300):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, Tuple[int, float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def version(self) -> int:
+        """当前职位数据版本"""
+        return self._version
+
+    def bump_version(self) -> int:
+        """职位数据发生变化：版本递增，丢弃旧版本的全部条目"""
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+            return self._version
+
+    def get(self, key: Hashable, version: int) -> Tuple[bool, Any]:
+        """查找指定版本下的缓存结果，返回 (是否命中, 结果)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry_version, stored_at, value = entry
+                if entry_version == version and time.monotonic() - stored_at < self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def set(self, key: Hashable, version: int, value: Any) -> None:
+        """写入缓存；计算期间数据版本已变化时丢弃结果"""
+        with self._lock:
+            if version != self._version:
+                return
+            self._entries[key] = (version, time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存命中统计"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "version": self._version,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+analysis_cache = VersionedResultCache(
+    max_entries=int(os.getenv("ANALYSIS_CACHE_SIZE", "128")),
+    ttl_seconds=float(os.getenv("ANALYSIS_CACHE_TTL", "300"))
+)
+
+
+@register_job_listener
+def _invalidate_on_job_change(event: JobChangeEvent) -> None:
+    analysis_cache.bump_version()
+
+
+def cached_analysis(name: str) -> Callable:
+    """
+    缓存异步分析函数的结果
+    结果在多个请求间共享，调用方不应修改返回的对象
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            key = (name, args, tuple(sorted(kwargs.items())))
+            version = analysis_cache.version
+            hit, value = analysis_cache.get(key, version)
+            if hit:
+                return value
+            value = await func(*args, **kwargs)
+            analysis_cache.set(key, version, value)
+            return value
+        return wrapper
+    return decorator
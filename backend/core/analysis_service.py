@@ -1,191 +1,248 @@
 import asyncio
-from typing import Dict, List, Any
-from collections import Counter
+import os
+from typing import Dict, List, Any, Callable, Sequence, Tuple
+import numpy as np
+from sqlalchemy.orm import Session
 from database.database import SessionLocal
 from models import Job
+from core.aggregation_engine import (
+    JobColumns, load_job_columns, group_counts,
+    group_average_salary, top_groups, salary_bucket_counts,
+    SALARY_BUCKET_EDGES, histogram_labels, equal_width_edges,
+    histogram_counts, overlap_histogram_counts
+)
+from core.sql_aggregation import (
+    sql_salary_analysis, sql_city_analysis,
+    sql_experience_analysis, sql_industry_analysis
+)
+from core.analysis_cache import cached_analysis
+from core.salary_index import salary_index
+from core.rollup_service import (
+    rollup_salary_analysis, rollup_city_analysis,
+    rollup_experience_analysis, rollup_industry_analysis
+)
 
-async def get_salary_analysis() -> Dict[str, Any]:
-    """薪资分析"""
+# 分析计算引擎：columnar 按列加载后在进程内向量化计算，sql 将分组聚合下推到数据库，
+# rollup 直接读取随职位写入增量维护的聚合表
+ANALYSIS_ENGINE = os.getenv("ANALYSIS_ENGINE", "columnar")
+
+def _load_columns() -> JobColumns:
+    """按列加载分析所需的职位数据"""
     db = SessionLocal()
     try:
-        # 查询所有职位
-        jobs = db.query(Job).all()
-        
-        if not jobs:
-            return {
-                "average_salary": 0,
-                "salary_distribution": {},
-                "top_paying_cities": [],
-                "salary_by_experience": {},
-                "total_positions": 0
-            }
-        
-        # 计算平均薪资
-        total_salary = sum((job.salary_min + job.salary_max) // 2 for job in jobs)
-        average_salary = total_salary // len(jobs) if jobs else 0
-        
-        # 薪资分布
-        salary_ranges = {
-            "0-5K": 0,
-            "5K-10K": 0,
-            "10K-15K": 0,
-            "15K-20K": 0,
-            "20K-30K": 0,
-            "30K+": 0
-        }
-        
-        for job in jobs:
-            avg_sal = (job.salary_min + job.salary_max) // 2
-            if avg_sal < 5000:
-                salary_ranges["0-5K"] += 1
-            elif avg_sal < 10000:
-                salary_ranges["5K-10K"] += 1
-            elif avg_sal < 15000:
-                salary_ranges["10K-15K"] += 1
-            elif avg_sal < 20000:
-                salary_ranges["15K-20K"] += 1
-            elif avg_sal < 30000:
-                salary_ranges["20K-30K"] += 1
-            else:
-                salary_ranges["30K+"] += 1
-        
-        # 高薪城市
-        city_salaries = {}
-        for job in jobs:
-            if job.city not in city_salaries:
-                city_salaries[job.city] = []
-            city_salaries[job.city].append((job.salary_min + job.salary_max) // 2)
-        
-        avg_city_salaries = {
-            city: sum(sals) // len(sals) for city, sals in city_salaries.items()
-        }
-        
-        top_paying_cities = sorted(
-            avg_city_salaries.items(), 
-            key=lambda x: x[1], 
-            reverse=True
-        )[:5]
-        
-        # 按经验要求的平均薪资
-        exp_salaries = {}
-        for job in jobs:
-            exp = job.experience_required
-            if exp not in exp_salaries:
-                exp_salaries[exp] = []
-            exp_salaries[exp].append((job.salary_min + job.salary_max) // 2)
-        
-        avg_exp_salaries = {
-            exp: sum(sals) // len(sals) for exp, sals in exp_salaries.items()
-        }
-        
-        return {
-            "average_salary": average_salary,
-            "salary_distribution": salary_ranges,
-            "top_paying_cities": [{"city": city, "avg_salary": salary} for city, salary in top_paying_cities],
-            "salary_by_experience": avg_exp_salaries,
-            "total_positions": len(jobs)
-        }
+        return load_job_columns(db)
     finally:
         db.close()
 
-async def get_city_analysis() -> Dict[str, Any]:
-    """城市分析"""
+def _run_query(aggregate: Callable[[Session], Dict[str, Any]]) -> Dict[str, Any]:
+    """在数据库会话中执行SQL聚合或读取聚合表"""
     db = SessionLocal()
     try:
-        jobs = db.query(Job).all()
-        
-        if not jobs:
-            return {
-                "city_job_distribution": {},
-                "city_average_salary": {},
-                "top_job_cities": {}
-            }
-        
-        city_counts = Counter(job.city for job in jobs)
-        
-        # 计算各城市的平均薪资
-        city_salaries = {}
-        
-        for job in jobs:
-            city = job.city
-            if city not in city_salaries:
-                city_salaries[city] = []
-            city_salaries[city].append((job.salary_min + job.salary_max) // 2)
-        
-        avg_city_salaries = {
-            city: sum(sals) // len(sals) for city, sals in city_salaries.items()
+        return aggregate(db)
+    finally:
+        db.close()
+
+@cached_analysis("salary")
+async def get_salary_analysis() -> Dict[str, Any]:
+    """薪资分析"""
+    if ANALYSIS_ENGINE == "sql":
+        return _run_query(sql_salary_analysis)
+    if ANALYSIS_ENGINE == "rollup":
+        return _run_query(rollup_salary_analysis)
+    return compute_salary_analysis(_load_columns())
+
+def compute_salary_analysis(columns: JobColumns) -> Dict[str, Any]:
+    """基于列式数据计算薪资分析"""
+    if not len(columns):
+        return {
+            "average_salary": 0,
+            "salary_distribution": {},
+            "top_paying_cities": [],
+            "salary_by_experience": {},
+            "total_positions": 0
         }
-        
+    
+    # 计算平均薪资
+    average_salary = int(columns.salary_mid.sum()) // len(columns)
+    
+    # 薪资分布
+    salary_ranges = salary_bucket_counts(columns.salary_mid)
+    
+    # 高薪城市
+    avg_city_salaries = group_average_salary(columns.city, columns.salary_mid)
+    top_paying_cities = top_groups(avg_city_salaries, 5)
+    
+    # 按经验要求的平均薪资
+    avg_exp_salaries = group_average_salary(columns.experience, columns.salary_mid)
+    
+    return {
+        "average_salary": average_salary,
+        "salary_distribution": salary_ranges,
+        "top_paying_cities": [{"city": city, "avg_salary": salary} for city, salary in top_paying_cities],
+        "salary_by_experience": avg_exp_salaries,
+        "total_positions": len(columns)
+    }
+
+@cached_analysis("city")
+async def get_city_analysis() -> Dict[str, Any]:
+    """城市分析"""
+    if ANALYSIS_ENGINE == "sql":
+        return _run_query(sql_city_analysis)
+    if ANALYSIS_ENGINE == "rollup":
+        return _run_query(rollup_city_analysis)
+    return compute_city_analysis(_load_columns())
+
+def compute_city_analysis(columns: JobColumns) -> Dict[str, Any]:
+    """基于列式数据计算城市分析"""
+    if not len(columns):
         return {
-            "city_job_distribution": dict(city_counts.most_common(20)),  # 增加到20个城市
-            "city_average_salary": avg_city_salaries,
-            "top_job_cities": dict(city_counts.most_common(10))  # 仅返回职位数量最多的10个城市
+            "city_job_distribution": {},
+            "city_average_salary": {},
+            "top_job_cities": {}
         }
-    finally:
-        db.close()
+    
+    city_counts = group_counts(columns.city)
+    
+    # 计算各城市的平均薪资
+    avg_city_salaries = group_average_salary(columns.city, columns.salary_mid)
+    
+    return {
+        "city_job_distribution": dict(top_groups(city_counts, 20)),  # 增加到20个城市
+        "city_average_salary": avg_city_salaries,
+        "top_job_cities": dict(top_groups(city_counts, 10))  # 仅返回职位数量最多的10个城市
+    }
 
+@cached_analysis("experience")
 async def get_experience_analysis() -> Dict[str, Any]:
     """经验要求分析"""
-    db = SessionLocal()
-    try:
-        jobs = db.query(Job).all()
-        
-        if not jobs:
-            return {
-                "experience_distribution": {},
-                "average_salary_by_experience": {}
-            }
-        
-        exp_counts = Counter(job.experience_required for job in jobs)
-        
-        # 按经验要求分组统计薪资
-        exp_salary = {}
-        for job in jobs:
-            exp_req = job.experience_required
-            if exp_req not in exp_salary:
-                exp_salary[exp_req] = []
-            exp_salary[exp_req].append((job.salary_min + job.salary_max) // 2)
-        
-        avg_exp_salary = {
-            exp: sum(sals) // len(sals) for exp, sals in exp_salary.items()
-        }
-        
+    if ANALYSIS_ENGINE == "sql":
+        return _run_query(sql_experience_analysis)
+    if ANALYSIS_ENGINE == "rollup":
+        return _run_query(rollup_experience_analysis)
+    return compute_experience_analysis(_load_columns())
+
+def compute_experience_analysis(columns: JobColumns) -> Dict[str, Any]:
+    """基于列式数据计算经验要求分析"""
+    if not len(columns):
         return {
-            "experience_distribution": dict(exp_counts),
-            "average_salary_by_experience": avg_exp_salary
+            "experience_distribution": {},
+            "average_salary_by_experience": {}
         }
-    finally:
-        db.close()
+    
+    exp_counts = group_counts(columns.experience)
+    
+    # 按经验要求分组统计薪资
+    avg_exp_salary = group_average_salary(columns.experience, columns.salary_mid)
+    
+    return {
+        "experience_distribution": exp_counts,
+        "average_salary_by_experience": avg_exp_salary
+    }
 
+@cached_analysis("industry")
 async def get_industry_analysis() -> Dict[str, Any]:
     """行业分析"""
-    db = SessionLocal()
-    try:
-        jobs = db.query(Job).all()
-        
-        if not jobs:
-            return {
-                "category_distribution": {},
-                "average_salary_by_category": {}
-            }
-        
-        category_counts = Counter(job.category for job in jobs)
-        
-        # 按行业统计薪资
-        category_salaries = {}
-        for job in jobs:
-            category = job.category
-            if category not in category_salaries:
-                category_salaries[category] = []
-            category_salaries[category].append((job.salary_min + job.salary_max) // 2)
-        
-        avg_category_salary = {
-            cat: sum(sals) // len(sals) for cat, sals in category_salaries.items()
-        }
-        
+    if ANALYSIS_ENGINE == "sql":
+        return _run_query(sql_industry_analysis)
+    if ANALYSIS_ENGINE == "rollup":
+        return _run_query(rollup_industry_analysis)
+    return compute_industry_analysis(_load_columns())
+
+def compute_industry_analysis(columns: JobColumns) -> Dict[str, Any]:
+    """基于列式数据计算行业分析"""
+    if not len(columns):
         return {
-            "category_distribution": dict(category_counts.most_common(20)),  # 增加到20个类别
-            "average_salary_by_category": avg_category_salary
+            "category_distribution": {},
+            "average_salary_by_category": {}
         }
-    finally:
-        db.close()
\ No newline at end of file
+    
+    category_counts = group_counts(columns.category)
+    
+    # 按行业统计薪资
+    avg_category_salary = group_average_salary(columns.category, columns.salary_mid)
+    
+    return {
+        "category_distribution": dict(top_groups(category_counts, 20)),  # 增加到20个类别
+        "average_salary_by_category": avg_category_salary
+    }
+
+@cached_analysis("salary_histogram")
+async def get_salary_histogram(
+    edges: Tuple[int, ...] = (),
+    bins: int = 0,
+    cities: Tuple[str, ...] = (),
+    categories: Tuple[str, ...] = (),
+    mode: str = "midpoint"
+) -> Dict[str, Any]:
+    """
+    薪资直方图：edges 为区间内部边界，bins 为在薪资范围内等宽划分的区间数，两者都未指定时使用默认薪资区间；
+    可按城市、类别筛选
+    """
+    if not cities and not categories:
+        # 不筛选时直接使用薪资区间索引中已排序的数组
+        result = sorted_salary_histogram(*salary_index.sorted_bounds(), edges, bins, mode)
+    else:
+        db = SessionLocal()
+        try:
+            query = db.query(Job.salary_min, Job.salary_max)
+            if cities:
+                query = query.filter(Job.city.in_(cities))
+            if categories:
+                query = query.filter(Job.category.in_(categories))
+            rows = query.all()
+        finally:
+            db.close()
+        
+        salary_min = np.array([row[0] or 0 for row in rows], dtype=np.int64)
+        salary_max = np.array([row[1] or 0 for row in rows], dtype=np.int64)
+        result = compute_salary_histogram(salary_min, salary_max, edges, bins, mode)
+    result["filters"] = {"city": list(cities), "category": list(categories)}
+    return result
+
+def compute_salary_histogram(
+    salary_min: np.ndarray,
+    salary_max: np.ndarray,
+    edges: Sequence[int] = (),
+    bins: int = 0,
+    mode: str = "midpoint"
+) -> Dict[str, Any]:
+    """薪资直方图，先对薪资数组排序"""
+    return sorted_salary_histogram(
+        np.sort(salary_min), np.sort(salary_max), np.sort((salary_min + salary_max) // 2), edges, bins, mode
+    )
+
+def sorted_salary_histogram(
+    sorted_min: np.ndarray,
+    sorted_max: np.ndarray,
+    sorted_mid: np.ndarray,
+    edges: Sequence[int] = (),
+    bins: int = 0,
+    mode: str = "midpoint"
+) -> Dict[str, Any]:
+    """
+    基于排序后的薪资数组二分查找计算直方图。
+    midpoint 模式按薪资中位值计数；overlap 模式统计薪资范围与区间有交集的职位数
+    """
+    if not edges:
+        edges = equal_width_edges(sorted_mid, bins) if bins else SALARY_BUCKET_EDGES
+    edges = list(edges)
+    
+    if not edges:
+        histogram = [{"label": "全部", "min": None, "max": None, "count": len(sorted_mid)}]
+    else:
+        if mode == "overlap":
+            counts = overlap_histogram_counts(sorted_min, sorted_max, edges)
+        else:
+            counts = histogram_counts(sorted_mid, edges)
+        bounds = [None] + edges + [None]
+        histogram = [
+            {"label": label, "min": bounds[i], "max": bounds[i + 1], "count": int(count)}
+            for i, (label, count) in enumerate(zip(histogram_labels(edges), counts))
+        ]
+    
+    return {
+        "mode": mode,
+        "edges": edges,
+        "total_positions": len(sorted_mid),
+        "histogram": histogram
+    }
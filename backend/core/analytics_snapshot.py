@@ -0,0 +1,141 @@
+"""
+分析快照服务
+后台任务定时（以及职位数据变化后）重新计算全部分析结果，生成只读快照并整体替换引用；
+请求直接读取最新快照，不加锁、不在请求路径上扫描职位表。
+快照带有代数和生成时间，接口通过响应头返回，便于客户端判断数据新鲜度；
+响应体只包含分析数据，数据未变化的刷新不会改变响应体及其ETag
+"""
+import asyncio
+import os
+from datetime import datetime
+from types import MappingProxyType
+from typing import Dict, List, Any, Callable, Optional, Tuple
+from core.analysis_service import (
+    get_salary_analysis, get_city_analysis,
+    get_experience_analysis, get_industry_analysis
+)
+from core.real_time_analysis import get_real_time_analysis
+from core.job_events import JobChangeEvent, register_job_listener
+
+# 快照包含的分析结果及其计算函数
+SNAPSHOT_SOURCES = {
+    "salary": get_salary_analysis,
+    "city": get_city_analysis,
+    "experience": get_experience_analysis,
+    "industry": get_industry_analysis,
+    "real_time": get_real_time_analysis,
+}
+
+# 定时刷新间隔（秒），为0时不启动后台刷新，分析接口在请求时计算
+SNAPSHOT_INTERVAL = float(os.getenv("ANALYTICS_SNAPSHOT_INTERVAL", "60"))
+
+# 收到刷新请求后稍作等待，合并短时间内的多次写入
+REFRESH_COALESCE_SECONDS = 0.5
+
+
+class AnalyticsSnapshot:
+    """只读分析快照，生成后不再修改"""
+
+    __slots__ = ("generation", "generated_at", "results", "changed")
+
+    def __init__(self, generation: int, generated_at: datetime, results: Dict[str, Dict[str, Any]], changed: bool = True):
+        self.generation = generation
+        self.generated_at = generated_at
+        self.results = MappingProxyType(results)
+        # 分析结果是否与上一代快照不同
+        self.changed = changed
+
+    def headers(self) -> Dict[str, str]:
+        """快照的新鲜度信息，作为响应头返回"""
+        return {
+            "X-Snapshot-Generation": str(self.generation),
+            "X-Snapshot-Generated-At": self.generated_at.isoformat()
+        }
+
+
+SnapshotListener = Callable[[AnalyticsSnapshot], None]
+
+_current: Optional[AnalyticsSnapshot] = None
+_refresh_event: Optional[asyncio.Event] = None
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_snapshot_listeners: List[SnapshotListener] = []
+
+
+def register_snapshot_listener(listener: SnapshotListener) -> SnapshotListener:
+    """注册快照监听器，每次生成新快照后在事件循环中调用，可作为装饰器使用"""
+    _snapshot_listeners.append(listener)
+    return listener
+
+
+def _notify_snapshot_listeners(snapshot: AnalyticsSnapshot) -> None:
+    for listener in list(_snapshot_listeners):
+        try:
+            listener(snapshot)
+        except Exception as e:
+            print(f"快照监听器 {getattr(listener, '__name__', listener)} 执行失败: {e}")
+
+
+def get_snapshot() -> Optional[AnalyticsSnapshot]:
+    """当前快照，尚未生成时返回 None"""
+    return _current
+
+
+async def _compute_results() -> Dict[str, Dict[str, Any]]:
+    return {name: await source() for name, source in SNAPSHOT_SOURCES.items()}
+
+
+async def refresh_snapshot() -> AnalyticsSnapshot:
+    """在工作线程中重新计算全部分析结果，然后原子替换当前快照"""
+    global _current
+    results = await asyncio.to_thread(asyncio.run, _compute_results())
+    generation = _current.generation + 1 if _current else 1
+    changed = _current is None or dict(_current.results) != results
+    _current = AnalyticsSnapshot(generation, datetime.now(), results, changed)
+    _notify_snapshot_listeners(_current)
+    return _current
+
+
+def request_snapshot_refresh() -> None:
+    """请求后台任务尽快刷新快照（可在任意线程调用）"""
+    if _loop is not None and _refresh_event is not None:
+        _loop.call_soon_threadsafe(_refresh_event.set)
+
+
+@register_job_listener
+def _refresh_on_job_change(event: JobChangeEvent) -> None:
+    request_snapshot_refresh()
+
+
+async def run_snapshot_refresher(interval: float = SNAPSHOT_INTERVAL) -> None:
+    """后台刷新循环：启动时立即生成快照，之后按间隔或在数据变化后刷新"""
+    global _refresh_event, _loop
+    _loop = asyncio.get_running_loop()
+    _refresh_event = asyncio.Event()
+
+    while True:
+        try:
+            snapshot = await refresh_snapshot()
+            print(f"分析快照已刷新，第 {snapshot.generation} 代")
+        except Exception as e:
+            print(f"分析快照刷新失败: {e}")
+
+        try:
+            await asyncio.wait_for(_refresh_event.wait(), timeout=interval)
+            await asyncio.sleep(REFRESH_COALESCE_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        _refresh_event.clear()
+
+
+async def read_analysis(name: str) -> Tuple[Dict[str, Any], Optional[AnalyticsSnapshot]]:
+    """读取分析结果：优先使用快照，快照尚未生成时在请求路径上计算"""
+    snapshot = _current
+    if snapshot is not None:
+        return snapshot.results[name], snapshot
+    return await SNAPSHOT_SOURCES[name](), None
+
+
+def snapshot_headers() -> Dict[str, str]:
+    """当前快照的代数和生成时间响应头，快照尚未生成时为空"""
+    snapshot = _current
+    return snapshot.headers() if snapshot is not None else {}
@@ -0,0 +1,210 @@
+"""
+实时分析推送服务
+仪表盘通过 Server-Sent Events 订阅实时分析：连接时先收到完整的 snapshot 事件，
+之后职位数据变化时（短暂等待合并多次写入后重新计算，与分析快照的刷新间隔无关）以及生成新的分析快照时，
+只推送发生变化的部分（delta 事件）。
+差异计算并编码一次，再分发给所有订阅者的队列，订阅者数量不影响计算量
+"""
+import asyncio
+import json
+import os
+import threading
+from typing import Dict, Any, AsyncIterator, Awaitable, Callable, Optional, Set, Tuple
+from core.analytics_snapshot import AnalyticsSnapshot, read_analysis, register_snapshot_listener
+from core.job_events import JobChangeEvent, register_job_listener
+from core.real_time_analysis import get_real_time_analysis
+
+# 每个订阅者最多积压的事件数，超出时丢弃积压事件并改为推送完整快照
+STREAM_QUEUE_SIZE = int(os.getenv("ANALYTICS_STREAM_QUEUE_SIZE", "32"))
+
+# 无数据变化时发送保活注释的间隔（秒），避免代理断开空闲连接
+KEEPALIVE_SECONDS = 15.0
+
+# 职位变更后等待的时间（秒），合并短时间内的多次写入后再计算差异
+STREAM_DEBOUNCE_SECONDS = float(os.getenv("ANALYTICS_STREAM_DEBOUNCE", "0.5"))
+
+# 仪表盘分组数据：分组名 -> (实时分析中的名称列表字段, 数值列表字段)
+DASHBOARD_SECTIONS = {
+    "city_salaries": ("cities", "salaries"),
+    "experience_counts": ("experiences", "counts"),
+    "industry_salaries": ("industries", "industry_salaries"),
+    "top_skills": ("skills", "skill_counts"),
+}
+
+
+def dashboard_view(real_time: Dict[str, Any]) -> Dict[str, Any]:
+    """把实时分析结果中的平行列表转换为 名称 -> 数值 的有序映射"""
+    view = {"total_jobs": real_time.get("total_jobs", 0)}
+    for section, (names_field, values_field) in DASHBOARD_SECTIONS.items():
+        view[section] = dict(zip(real_time.get(names_field, []), real_time.get(values_field, [])))
+    return view
+
+
+def diff_views(previous: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    计算两个仪表盘视图的差异：标量字段直接给出新值；
+    分组字段给出 changed（新增或数值变化的项）、removed（消失的项），顺序变化时附带完整的 order
+    """
+    delta = {}
+    for key, value in current.items():
+        old = previous.get(key)
+        if not isinstance(value, dict):
+            if value != old:
+                delta[key] = value
+            continue
+
+        old = old or {}
+        section = {}
+        changed = {name: number for name, number in value.items() if old.get(name) != number}
+        removed = [name for name in old if name not in value]
+        if changed:
+            section["changed"] = changed
+        if removed:
+            section["removed"] = removed
+        if list(value) != [name for name in old if name in value] + [name for name in value if name not in old]:
+            section["order"] = list(value)
+        if section:
+            delta[key] = section
+    return delta
+
+
+def format_event(event: str, payload: Dict[str, Any]) -> str:
+    """编码为一条 SSE 消息"""
+    return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+
+async def _compute_view() -> Dict[str, Any]:
+    """在工作线程中重新计算实时分析，转换为仪表盘视图"""
+    return dashboard_view(await asyncio.to_thread(asyncio.run, get_real_time_analysis()))
+
+
+class AnalyticsBroadcaster:
+    """保存最新的仪表盘视图，并把每次变化的差异分发给全部订阅者"""
+
+    def __init__(self, queue_size: int = STREAM_QUEUE_SIZE, debounce_seconds: float = STREAM_DEBOUNCE_SECONDS):
+        self.queue_size = queue_size
+        self.debounce_seconds = debounce_seconds
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._view: Optional[Dict[str, Any]] = None
+        # 视图的代数，每推送一次变化加一
+        self._generation = 0
+        # 注册订阅者与分发消息互斥，新订阅者的完整快照与之后的差异之间不会重复或遗漏
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._update_task: Optional[asyncio.Task] = None
+        self._update_requested = False
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def snapshot_message(self) -> str:
+        return format_event("snapshot", {"generation": self._generation, **self._view})
+
+    def subscribe(self, view: Dict[str, Any]) -> Tuple[asyncio.Queue, str]:
+        """
+        新增订阅者，返回 (事件队列, 初始的完整快照消息)；还没有视图时以 view 作为初始视图。
+        快照消息与注册在同一锁内生成，之后的差异只会进入队列
+        """
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        with self._lock:
+            if self._view is None:
+                self._view = view
+                self._generation += 1
+            message = self.snapshot_message()
+            self._subscribers.add(queue)
+        return queue, message
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        with self._lock:
+            self._subscribers.discard(queue)
+
+    def _offer(self, queue: asyncio.Queue, message: str) -> None:
+        """放入事件；订阅者消费过慢导致队列已满时，清空积压并改为完整快照"""
+        try:
+            queue.put_nowait(message)
+        except asyncio.QueueFull:
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(self.snapshot_message())
+
+    def publish(self, view: Dict[str, Any]) -> None:
+        """与当前视图比较计算一次差异并分发，数据无变化时不推送"""
+        with self._lock:
+            previous = self._view
+            if previous is None:
+                self._view = view
+                self._generation += 1
+                message = self.snapshot_message()
+            else:
+                delta = diff_views(previous, view)
+                if not delta:
+                    return
+                self._view = view
+                self._generation += 1
+                message = format_event("delta", {"generation": self._generation, **delta})
+
+            for queue in list(self._subscribers):
+                self._offer(queue, message)
+
+    def bind(self, loop: asyncio.AbstractEventLoop) -> None:
+        """记录订阅者所在的事件循环，职位变更后在其中计算差异"""
+        self._loop = loop
+
+    def request_update(self) -> None:
+        """职位数据变化后请求重新计算视图（可在任意线程调用）"""
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._schedule_update)
+
+    def _schedule_update(self) -> None:
+        self._update_requested = True
+        if self._update_task is None or self._update_task.done():
+            self._update_task = asyncio.ensure_future(self._run_updates())
+
+    async def _run_updates(self) -> None:
+        """等待一小段时间合并多次写入后重新计算并推送，计算期间又有写入时再算一次"""
+        while self._update_requested:
+            await asyncio.sleep(self.debounce_seconds)
+            self._update_requested = False
+            if not self._subscribers:
+                # 没有订阅者时不计算，丢弃过期的视图，下一个订阅者重新取得
+                with self._lock:
+                    if not self._subscribers:
+                        self._view = None
+                continue
+            try:
+                view = await _compute_view()
+            except Exception as e:
+                print(f"实时分析推送计算失败: {e}")
+                continue
+            self.publish(view)
+
+
+analytics_broadcaster = AnalyticsBroadcaster()
+
+
+@register_snapshot_listener
+def _broadcast_snapshot(snapshot: AnalyticsSnapshot) -> None:
+    analytics_broadcaster.publish(dashboard_view(snapshot.results["real_time"]))
+
+
+@register_job_listener
+def _update_on_job_change(event: JobChangeEvent) -> None:
+    analytics_broadcaster.request_update()
+
+
+async def dashboard_events(is_disconnected: Callable[[], Awaitable[bool]]) -> AsyncIterator[str]:
+    """单个订阅者的 SSE 消息流，客户端断开后退订"""
+    analytics_broadcaster.bind(asyncio.get_running_loop())
+    data, _ = await read_analysis("real_time")
+    queue, message = analytics_broadcaster.subscribe(dashboard_view(data))
+    try:
+        yield message
+        while not await is_disconnected():
+            try:
+                yield await asyncio.wait_for(queue.get(), timeout=KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+    finally:
+        analytics_broadcaster.unsubscribe(queue)
@@ -0,0 +1,234 @@
+"""
+近似分析
+基于 job_sample 维护的样本估计各分析接口的结果，并给出每个计数和均值的置信区间。
+分层抽样按分层估计量合并各层（层权重为层内职位数 / 层内样本数），
+均值采用比估计并用线性化方法估计方差，两者都带有有限总体校正；等概率抽样视为只有一层。
+只有一个样本（且未覆盖全层）的层无法估计层内方差，这些层的点估计仍按各自的权重计算，
+方差改用它们合并后的样本方差（合并后不足2个样本时用全部样本），跨层合并的方差包含层间差异，偏保守；
+均值的方差在这些层中至少取合并样本的薪资方差，避免只由一个样本决定的分组均值得到宽度为0的区间；
+借用方差的层数在响应的 pooled_variance_strata 中返回
+"""
+from typing import Dict, List, Any, Tuple
+import numpy as np
+from core.aggregation_engine import (
+    EncodedColumn, JobColumns, SALARY_BUCKET_EDGES, SALARY_BUCKET_LABELS, top_groups
+)
+from core.job_sample import SampleRow, job_sampler
+
+# 置信水平及对应的正态分位数
+CONFIDENCE_LEVEL = 0.95
+Z_SCORE = 1.96
+
+
+class SampleFrame:
+    """合并各层样本后的列式数据，以及每行所属的层和各层的职位总数"""
+
+    def __init__(self, strata: List[Tuple[int, List[SampleRow]]]):
+        rows = [row for _, stratum_rows in strata for row in stratum_rows]
+        self.columns = JobColumns.from_rows(rows)
+        self.population = np.array([population for population, _ in strata], dtype=np.float64)
+        self.sizes = np.array([len(stratum_rows) for _, stratum_rows in strata], dtype=np.float64)
+        self.stratum_codes = np.repeat(np.arange(len(strata)), self.sizes.astype(np.int64))
+        # 借用合并方差的层，以及计算合并方差所用的层
+        self.borrowed = (self.sizes == 1) & (self.population > 1)
+        self.pool = self.borrowed if self.sizes[self.borrowed].sum() >= 2 else self.sizes > 0
+
+    @property
+    def sample_size(self) -> int:
+        return len(self.columns)
+
+    @property
+    def population_size(self) -> int:
+        return int(self.population.sum())
+
+    @property
+    def pooled_variance_strata(self) -> int:
+        return int(self.borrowed.sum())
+
+    def _variance(self, sums: np.ndarray, squares: np.ndarray) -> np.ndarray:
+        """各层各分组的样本方差（由和与平方和计算），借用合并方差的层取合并样本的方差"""
+        sizes = self.sizes[:, None]
+        variance = np.maximum(squares - sums ** 2 / np.maximum(sizes, 1), 0) / np.maximum(sizes - 1, 1)
+        if self.borrowed.any():
+            pooled_size = self.sizes[self.pool].sum()
+            pooled_sums, pooled_squares = sums[self.pool].sum(axis=0), squares[self.pool].sum(axis=0)
+            variance[self.borrowed] = np.maximum(pooled_squares - pooled_sums ** 2 / pooled_size, 0) / max(pooled_size - 1, 1)
+        return variance
+
+    def estimate(self, column: EncodedColumn) -> Dict[Any, Dict[str, Any]]:
+        """
+        估计各分组的职位数和平均薪资，返回 分组 -> {count, count_ci, avg_salary, avg_salary_ci}，
+        按分组首次出现顺序排列
+        """
+        strata, groups = len(self.population), len(column)
+        if not self.sample_size or not groups:
+            return {}
+
+        index = self.stratum_codes * groups + column.codes
+        salary = self.columns.salary_mid.astype(np.float64)
+        shape = (strata, groups)
+        counts = np.bincount(index, minlength=strata * groups).reshape(shape).astype(np.float64)
+        sums = np.bincount(index, weights=salary, minlength=strata * groups).reshape(shape)
+        squares = np.bincount(index, weights=salary * salary, minlength=strata * groups).reshape(shape)
+
+        sizes = self.sizes[:, None]
+        population = self.population[:, None]
+        safe_sizes = np.maximum(sizes, 1)
+        weights = np.where(sizes > 0, population / safe_sizes, 0.0)
+        # 各层对方差的贡献系数 N_h^2 (1 - n_h/N_h) / n_h
+        variance_factor = np.where(
+            sizes > 0,
+            population ** 2 * (1 - sizes / np.maximum(population, 1)) / safe_sizes,
+            0.0
+        )
+
+        estimated_counts = (weights * counts).sum(axis=0)
+        # 是否属于该分组的 0/1 变量，其平方和等于和
+        count_variance = (variance_factor * self._variance(counts, counts)).sum(axis=0)
+
+        estimated_sums = (weights * sums).sum(axis=0)
+        means = estimated_sums / np.maximum(estimated_counts, 1e-12)
+        # 比估计的线性化变量 z = I_g * (y - 均值)，逐层计算其样本方差
+        z_sums = sums - means * counts
+        z_squares = squares - 2 * means * sums + means ** 2 * counts
+        z_variance = self._variance(z_sums, z_squares)
+        if self.borrowed.any():
+            # 分组只由一个样本决定均值时 z 恒为0，合并的 z 方差会低估；
+            # 借用方差的层至少取合并样本的薪资方差，按该层样本中属于该分组的比例折算
+            salary_variance = self._variance(sums.sum(axis=1)[:, None], squares.sum(axis=1)[:, None])
+            z_variance[self.borrowed] = np.maximum(
+                z_variance[self.borrowed], (counts / safe_sizes * salary_variance)[self.borrowed]
+            )
+        mean_variance = (variance_factor * z_variance).sum(axis=0) / np.maximum(estimated_counts, 1e-12) ** 2
+
+        count_margin = Z_SCORE * np.sqrt(np.maximum(count_variance, 0))
+        mean_margin = Z_SCORE * np.sqrt(np.maximum(mean_variance, 0))
+
+        estimates = {}
+        for code, value in enumerate(column.values):
+            if estimated_counts[code] <= 0:
+                continue
+            count, mean = estimated_counts[code], means[code]
+            estimates[value] = {
+                "count": int(round(count)),
+                "count_ci": [max(int(round(count - count_margin[code])), 0), int(round(count + count_margin[code]))],
+                "avg_salary": int(mean),
+                "avg_salary_ci": [int(mean - mean_margin[code]), int(mean + mean_margin[code])]
+            }
+        return estimates
+
+    def overall(self) -> Dict[str, Any]:
+        """全体职位的平均薪资估计"""
+        everything = EncodedColumn(["all"], np.zeros(self.sample_size, dtype=np.int32))
+        return self.estimate(everything).get("all", {"count": 0, "count_ci": [0, 0], "avg_salary": 0, "avg_salary_ci": [0, 0]})
+
+    def salary_buckets(self) -> Dict[str, Dict[str, Any]]:
+        """薪资分布各区间的职位数估计，区间顺序固定"""
+        codes = np.searchsorted(SALARY_BUCKET_EDGES, self.columns.salary_mid, side="right").astype(np.int32)
+        estimates = self.estimate(EncodedColumn(SALARY_BUCKET_LABELS, codes))
+        empty = {"count": 0, "count_ci": [0, 0]}
+        return {label: estimates.get(label, empty) for label in SALARY_BUCKET_LABELS}
+
+
+def _counts(estimates: Dict[Any, Dict[str, Any]]) -> Dict[Any, int]:
+    return {value: item["count"] for value, item in estimates.items()}
+
+
+def _averages(estimates: Dict[Any, Dict[str, Any]]) -> Dict[Any, int]:
+    return {value: item["avg_salary"] for value, item in estimates.items()}
+
+
+def _intervals(estimates: Dict[Any, Dict[str, Any]], field: str, keys=None) -> Dict[Any, List[int]]:
+    keys = estimates.keys() if keys is None else keys
+    return {value: estimates[value][field] for value in keys}
+
+
+def _sample_info(frame: SampleFrame, sampling: str) -> Dict[str, Any]:
+    return {
+        "approximate": True,
+        "sampling": sampling,
+        "sample_size": frame.sample_size,
+        "population_size": frame.population_size,
+        "pooled_variance_strata": frame.pooled_variance_strata,
+        "confidence_level": CONFIDENCE_LEVEL
+    }
+
+
+def approx_salary_analysis(frame: SampleFrame, sampling: str) -> Dict[str, Any]:
+    overall = frame.overall()
+    buckets = frame.salary_buckets()
+    by_city = frame.estimate(frame.columns.city)
+    by_experience = frame.estimate(frame.columns.experience)
+    top_paying_cities = top_groups(_averages(by_city), 5)
+    return {
+        "average_salary": overall["avg_salary"],
+        "salary_distribution": {label: item["count"] for label, item in buckets.items()},
+        "top_paying_cities": [{"city": city, "avg_salary": salary} for city, salary in top_paying_cities],
+        "salary_by_experience": _averages(by_experience),
+        "total_positions": frame.population_size,
+        "confidence_intervals": {
+            "average_salary": overall["avg_salary_ci"],
+            "salary_distribution": {label: item["count_ci"] for label, item in buckets.items()},
+            "top_paying_cities": _intervals(by_city, "avg_salary_ci", [city for city, _ in top_paying_cities]),
+            "salary_by_experience": _intervals(by_experience, "avg_salary_ci")
+        },
+        **_sample_info(frame, sampling)
+    }
+
+
+def approx_city_analysis(frame: SampleFrame, sampling: str) -> Dict[str, Any]:
+    by_city = frame.estimate(frame.columns.city)
+    city_counts = _counts(by_city)
+    distribution = [city for city, _ in top_groups(city_counts, 20)]
+    return {
+        "city_job_distribution": {city: city_counts[city] for city in distribution},
+        "city_average_salary": _averages(by_city),
+        "top_job_cities": {city: city_counts[city] for city in distribution[:10]},
+        "confidence_intervals": {
+            "city_job_distribution": _intervals(by_city, "count_ci", distribution),
+            "city_average_salary": _intervals(by_city, "avg_salary_ci")
+        },
+        **_sample_info(frame, sampling)
+    }
+
+
+def approx_experience_analysis(frame: SampleFrame, sampling: str) -> Dict[str, Any]:
+    by_experience = frame.estimate(frame.columns.experience)
+    return {
+        "experience_distribution": _counts(by_experience),
+        "average_salary_by_experience": _averages(by_experience),
+        "confidence_intervals": {
+            "experience_distribution": _intervals(by_experience, "count_ci"),
+            "average_salary_by_experience": _intervals(by_experience, "avg_salary_ci")
+        },
+        **_sample_info(frame, sampling)
+    }
+
+
+def approx_industry_analysis(frame: SampleFrame, sampling: str) -> Dict[str, Any]:
+    by_category = frame.estimate(frame.columns.category)
+    category_counts = _counts(by_category)
+    distribution = [category for category, _ in top_groups(category_counts, 20)]
+    return {
+        "category_distribution": {category: category_counts[category] for category in distribution},
+        "average_salary_by_category": _averages(by_category),
+        "confidence_intervals": {
+            "category_distribution": _intervals(by_category, "count_ci", distribution),
+            "average_salary_by_category": _intervals(by_category, "avg_salary_ci")
+        },
+        **_sample_info(frame, sampling)
+    }
+
+
+APPROX_ANALYSES = {
+    "salary": approx_salary_analysis,
+    "city": approx_city_analysis,
+    "experience": approx_experience_analysis,
+    "industry": approx_industry_analysis,
+}
+
+
+def get_approx_analysis(name: str, sampling: str = "uniform") -> Dict[str, Any]:
+    """基于当前样本估计分析结果，sampling 为 uniform（等概率）或 stratified（按城市分层）"""
+    frame = SampleFrame(job_sampler.strata(sampling))
+    return APPROX_ANALYSES[name](frame, sampling)
@@ -0,0 +1,121 @@
+"""
+仪表盘批量数据服务
+一次请求返回多个图表面板的数据：优先直接取自分析快照；没有快照时只查询一次职位数据投影，
+在同一份列式数据上计算所需的全部分析结果，再转换为各面板的数据格式。
+面板数据格式与对应的单独接口保持一致
+"""
+from typing import Dict, List, Any, Callable, Iterable, Optional, Tuple
+from database.database import SessionLocal
+from models import Job
+from core.aggregation_engine import JobColumns
+from core.analysis_service import (
+    ANALYSIS_ENGINE, compute_salary_analysis, compute_city_analysis,
+    compute_experience_analysis, compute_industry_analysis
+)
+from core.real_time_analysis import accumulate_real_time, finalize_real_time
+from core.analytics_snapshot import SNAPSHOT_SOURCES, AnalyticsSnapshot, get_snapshot
+
+
+def salary_distribution_chart(data: Dict[str, Any]) -> Dict[str, Any]:
+    """薪资分布数据，专为图表使用"""
+    distribution = data.get("salary_distribution", {})
+    return {
+        "title": "薪资分布",
+        "data": [{"name": k, "value": v} for k, v in distribution.items()]
+    }
+
+
+def city_salary_ranking_chart(data: Dict[str, Any]) -> Dict[str, Any]:
+    """城市薪资排名，专为图表使用"""
+    avg_salaries = data.get("city_average_salary", {})
+    return {
+        "cities": list(avg_salaries.keys()),
+        "salaries": list(avg_salaries.values())
+    }
+
+
+def experience_distribution_chart(data: Dict[str, Any]) -> Dict[str, Any]:
+    """经验分布数据，专为图表使用"""
+    distribution = data.get("experience_distribution", {})
+    return {
+        "experiences": list(distribution.keys()),
+        "counts": list(distribution.values())
+    }
+
+
+def industry_salary_ranking_chart(data: Dict[str, Any]) -> Dict[str, Any]:
+    """行业薪资排名，专为图表使用"""
+    avg_salaries = data.get("average_salary_by_category", {})
+    return {
+        "industries": list(avg_salaries.keys()),
+        "salaries": list(avg_salaries.values())
+    }
+
+
+def _unchanged(data: Dict[str, Any]) -> Dict[str, Any]:
+    return data
+
+
+# 面板名称（与单独接口的路径一致） -> (所需的分析结果, 转换为面板数据的函数)
+DASHBOARD_PANELS: Dict[str, Tuple[str, Callable[[Dict[str, Any]], Dict[str, Any]]]] = {
+    "salary": ("salary", _unchanged),
+    "city": ("city", _unchanged),
+    "experience": ("experience", _unchanged),
+    "industry": ("industry", _unchanged),
+    "salary-distribution": ("salary", salary_distribution_chart),
+    "city-salary-ranking": ("city", city_salary_ranking_chart),
+    "experience-distribution": ("experience", experience_distribution_chart),
+    "industry-salary-ranking": ("industry", industry_salary_ranking_chart),
+    "real-time": ("real_time", _unchanged),
+}
+
+# 基于列式数据计算的分析结果
+COLUMNAR_ANALYSES = {
+    "salary": compute_salary_analysis,
+    "city": compute_city_analysis,
+    "experience": compute_experience_analysis,
+    "industry": compute_industry_analysis,
+}
+
+
+def compute_from_projection(sources: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """只查询一次职位数据投影，在同一份数据上计算所需的全部分析结果"""
+    sources = set(sources)
+    db = SessionLocal()
+    try:
+        rows = db.query(
+            Job.id, Job.salary_min, Job.salary_max, Job.city,
+            Job.category, Job.experience_required, Job.education_required
+        ).order_by(Job.id).all()
+    finally:
+        db.close()
+
+    results = {}
+    if sources & COLUMNAR_ANALYSES.keys():
+        job_columns = JobColumns.from_rows(rows)
+        for name in sources & COLUMNAR_ANALYSES.keys():
+            results[name] = COLUMNAR_ANALYSES[name](job_columns)
+    if "real_time" in sources:
+        results["real_time"] = finalize_real_time(accumulate_real_time(
+            (row.city, row.category, row.experience_required, row.salary_min, row.salary_max)
+            for row in rows
+        ))
+    return results
+
+
+async def get_dashboard(panels: List[str]) -> Tuple[Dict[str, Dict[str, Any]], Optional[AnalyticsSnapshot]]:
+    """计算指定面板的数据，返回 (面板 -> 数据, 所用的快照)"""
+    sources = {DASHBOARD_PANELS[panel][0] for panel in panels}
+    snapshot = get_snapshot()
+    if snapshot is not None:
+        results = snapshot.results
+    elif ANALYSIS_ENGINE == "columnar":
+        results = compute_from_projection(sources)
+    else:
+        # sql / rollup 引擎本身只读取聚合结果，逐个计算即可
+        results = {name: await SNAPSHOT_SOURCES[name]() for name in sources}
+
+    return {
+        panel: DASHBOARD_PANELS[panel][1](results[DASHBOARD_PANELS[panel][0]])
+        for panel in panels
+    }, snapshot
@@ -0,0 +1,177 @@
+"""
+去重计数草图
+按城市、类别维护公司、职位名称和技能的 HyperLogLog 草图，估计去重数量
+（如"深圳有多少家公司在招聘"、"每个类别涉及多少种技能"）。
+每个草图占用固定的 2^PRECISION 字节，标准误差约 1.04/sqrt(2^PRECISION)（PRECISION=13 时约1.1%）。
+草图只能加入不能删除：删除或修改职位时把旧取值所在的 (维度, 取值) 标记为待重建，
+下次读取时从职位表重新构建这些草图；同时按事件维护每个 (维度, 取值) 的职位数，降为0的取值直接移除
+"""
+import hashlib
+import math
+from typing import Dict, List, Any, Iterable, Optional, Set, Tuple
+import numpy as np
+from database.database import SessionLocal
+from models import Job
+from utils.data_utils import parse_job_tags
+from core.job_events import JobChangeEvent, register_job_listener
+
+PRECISION = 13
+NUM_REGISTERS = 1 << PRECISION
+_RANK_BITS = 64 - PRECISION
+_ALPHA = 0.7213 / (1 + 1.079 / NUM_REGISTERS)
+
+# 维护草图的维度及对应的职位字段
+DISTINCT_DIMENSIONS = {
+    "city": "city",
+    "category": "category",
+}
+
+# 去重统计的对象：名称 -> 从职位中取值的函数
+DISTINCT_TARGETS = {
+    "companies": lambda record: [record["company"]] if record["company"] else [],
+    "titles": lambda record: [record["title"]] if record["title"] else [],
+    "skills": lambda record: record["tags"],
+}
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HyperLogLog:
+    """可合并的 HyperLogLog 去重计数草图"""
+
+    def __init__(self, registers: Optional[np.ndarray] = None):
+        self.registers = registers if registers is not None else np.zeros(NUM_REGISTERS, dtype=np.uint8)
+
+    def add(self, value: str) -> None:
+        hashed = _hash(value)
+        index = hashed >> _RANK_BITS
+        remainder = hashed & ((1 << _RANK_BITS) - 1)
+        # 剩余位中第一个1出现的位置（从1开始计）
+        rank = _RANK_BITS - remainder.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        """合并另一个草图，就地取各寄存器的最大值"""
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self) -> int:
+        """估计去重数量，基数较小时使用线性计数修正"""
+        estimate = _ALPHA * NUM_REGISTERS ** 2 / np.ldexp(1.0, -self.registers.astype(np.int32)).sum()
+        if estimate <= 2.5 * NUM_REGISTERS:
+            empty = int(np.count_nonzero(self.registers == 0))
+            if empty:
+                estimate = NUM_REGISTERS * math.log(NUM_REGISTERS / empty)
+        return int(round(estimate))
+
+
+class DistinctSketchRegistry:
+    """按 (维度, 取值) 维护的各去重对象草图，随职位变更增量更新"""
+
+    def __init__(self):
+        self._sketches: Dict[Tuple[str, Any], Dict[str, HyperLogLog]] = {}
+        # (维度, 取值) -> 职位数，降为0时移除对应草图
+        self._job_counts: Dict[Tuple[str, Any], int] = {}
+        # 有职位被删除或修改、草图中可能含有旧取值的 (维度, 取值)
+        self._dirty: Set[Tuple[str, Any]] = set()
+
+    def _keys(self, record: Dict[str, Any]) -> List[Tuple[str, Any]]:
+        keys = [("total", "")]
+        keys.extend((dimension, record[field]) for dimension, field in DISTINCT_DIMENSIONS.items())
+        return keys
+
+    def add(self, records: Iterable[Dict[str, Any]]) -> None:
+        for record in records:
+            values = {target: extract(record) for target, extract in DISTINCT_TARGETS.items()}
+            for key in self._keys(record):
+                self._job_counts[key] = self._job_counts.get(key, 0) + 1
+                sketches = self._sketches.get(key)
+                if sketches is None:
+                    sketches = self._sketches[key] = {target: HyperLogLog() for target in DISTINCT_TARGETS}
+                for target, target_values in values.items():
+                    for value in target_values:
+                        sketches[target].add(value)
+
+    def remove(self, records: Iterable[Dict[str, Any]]) -> None:
+        """草图无法删除取值：职位数降为0的 (维度, 取值) 直接移除，其余的标记为待重建"""
+        for record in records:
+            for key in self._keys(record):
+                remaining = self._job_counts.get(key, 0) - 1
+                if remaining > 0:
+                    self._job_counts[key] = remaining
+                    self._dirty.add(key)
+                else:
+                    self._job_counts.pop(key, None)
+                    self._sketches.pop(key, None)
+                    self._dirty.discard(key)
+
+    def refresh(self) -> None:
+        """从职位表重新构建待重建的草图"""
+        if not self._dirty:
+            return
+        dirty = list(self._dirty)
+        # 先移出待重建集合：重建期间再有删除时会重新标记
+        self._dirty.difference_update(dirty)
+        db = SessionLocal()
+        try:
+            for dimension, value in dirty:
+                query = db.query(Job.company, Job.title, Job.tags)
+                if dimension != "total":
+                    query = query.filter(getattr(Job, DISTINCT_DIMENSIONS[dimension]) == value)
+                sketches = {target: HyperLogLog() for target in DISTINCT_TARGETS}
+                for company, title, tags in query.yield_per(10000):
+                    record = {"company": company, "title": title, "tags": parse_job_tags(tags)}
+                    for target, extract in DISTINCT_TARGETS.items():
+                        for item in extract(record):
+                            sketches[target].add(item)
+                # 重建期间已移除的取值不再加回
+                if (dimension, value) in self._job_counts:
+                    self._sketches[(dimension, value)] = sketches
+        finally:
+            db.close()
+
+    def clear(self) -> None:
+        self._sketches.clear()
+        self._job_counts.clear()
+        self._dirty.clear()
+
+    def counts(self, dimension: str, value: Any = "") -> Optional[Dict[str, int]]:
+        sketches = self._sketches.get((dimension, value))
+        if sketches is None:
+            return None
+        return {target: sketch.count() for target, sketch in sketches.items()}
+
+    def values(self, dimension: str) -> List[Any]:
+        return [value for key_dimension, value in list(self._sketches) if key_dimension == dimension]
+
+
+distinct_sketches = DistinctSketchRegistry()
+
+
+@register_job_listener
+def _update_distinct_sketches(event: JobChangeEvent) -> None:
+    if event.reset:
+        distinct_sketches.clear()
+    distinct_sketches.remove(event.removed)
+    distinct_sketches.add(event.added)
+
+
+def get_distinct_counts(dimension: str, value: Optional[str] = None) -> Dict[str, Any]:
+    """按维度返回各取值的公司数、职位名称数和技能数估计，value 指定时只返回该取值"""
+    distinct_sketches.refresh()
+    values = [value] if value is not None else distinct_sketches.values(dimension)
+    distinct_counts = {}
+    for item in values:
+        counts = distinct_sketches.counts(dimension, item)
+        if counts is not None:
+            distinct_counts[item] = counts
+    
+    return {
+        "dimension": dimension,
+        "overall": distinct_sketches.counts("total") or {target: 0 for target in DISTINCT_TARGETS},
+        "distinct_counts": distinct_counts,
+        "relative_error": round(1.04 / math.sqrt(NUM_REGISTERS), 4)
+    }
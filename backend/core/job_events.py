@@ -0,0 +1,73 @@
+"""
+职位数据变更事件
+职位的增删改、爬取入库和清空在事务提交后发布变更事件，
+分析缓存等派生数据通过注册监听器与职位表保持同步
+"""
+from typing import Dict, List, Any, Callable, Iterable
+from database.database import SessionLocal
+from models import Job
+from utils.data_utils import job_record
+
+
+class JobChangeEvent:
+    """一次职位数据变更：added 为新增/修改后的职位，removed 为删除/修改前的职位"""
+
+    def __init__(
+        self,
+        added: Iterable[Dict[str, Any]] = (),
+        removed: Iterable[Dict[str, Any]] = (),
+        reset: bool = False
+    ):
+        self.added = list(added)
+        self.removed = list(removed)
+        # reset 表示此前的职位数据全部失效（如清空数据），added 为此后的全部职位
+        self.reset = reset
+
+
+JobListener = Callable[[JobChangeEvent], None]
+
+_listeners: List[JobListener] = []
+
+
+def register_job_listener(listener: JobListener) -> JobListener:
+    """注册职位变更监听器，可作为装饰器使用"""
+    _listeners.append(listener)
+    return listener
+
+
+def publish_job_change(
+    added: Iterable[Dict[str, Any]] = (),
+    removed: Iterable[Dict[str, Any]] = (),
+    reset: bool = False
+) -> None:
+    """发布职位变更事件，单个监听器失败不影响其他监听器和写入本身"""
+    event = JobChangeEvent(added=added, removed=removed, reset=reset)
+    for listener in list(_listeners):
+        try:
+            listener(event)
+        except Exception as e:
+            print(f"职位变更监听器 {getattr(listener, '__name__', listener)} 执行失败: {e}")
+
+
+def replay_job_events(batch_size: int = 5000) -> int:
+    """
+    启动时把职位表的全部数据重放给监听器：先发布 reset，再分批发布新增事件，
+    使各个内存结构从当前职位数据构建，返回职位总数
+    """
+    publish_job_change(reset=True)
+    db = SessionLocal()
+    try:
+        total = 0
+        batch = []
+        for job in db.query(Job).yield_per(batch_size):
+            batch.append(job_record(job))
+            if len(batch) >= batch_size:
+                publish_job_change(added=batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            publish_job_change(added=batch)
+            total += len(batch)
+        return total
+    finally:
+        db.close()
@@ -0,0 +1,279 @@
+"""
+职位筛选位图索引
+为城市、类别、经验要求、学历要求的每个取值维护一个压缩位图（简化的 Roaring Bitmap），记录具有该取值的职位ID，
+随职位变更增量更新。职位列表的多条件筛选变为位图运算：同一字段的多个取值取并集，不同字段之间取交集，
+得到的职位ID按升序排列，只需按主键读取当前页的职位，不再对职位表逐行比较各个筛选字段。
+同样的位图也用于分面统计：匹配集合与某维度每个取值的位图求交集，交集大小即该取值的职位数。
+位图按职位ID的高16位分块，每块根据元素数选择存储方式：
+- 不超过 ARRAY_CONTAINER_MAX 个元素时为升序的 uint16 数组（每个元素2字节）
+- 超过时为 65536 位的位集（固定 8KB），块内的交集、并集都是逐字节运算
+"""
+from typing import Dict, List, Any, Iterable, Optional, Union
+import numpy as np
+from core.aggregation_engine import SALARY_BUCKET_LABELS
+from core.job_events import JobChangeEvent, register_job_listener
+from core.rollup_service import salary_bucket_label
+
+# 筛选维度及对应的职位字段
+FILTER_DIMENSIONS = {
+    "city": "city",
+    "category": "category",
+    "experience": "experience_required",
+    "education": "education_required",
+}
+
+# 薪资区间维度：按薪资中位值所在的区间划分，区间与薪资分布统计一致，只用于分面统计
+SALARY_DIMENSION = "salary"
+
+# 可返回分面统计的维度
+FACET_DIMENSIONS = tuple(FILTER_DIMENSIONS) + (SALARY_DIMENSION,)
+
+FACET_PATTERN = "^({0})(,({0}))*$".format("|".join(FACET_DIMENSIONS))
+
+# 数组块的元素上限，超过后转为位集（两种存储方式在 4096 个元素时大小相同）
+ARRAY_CONTAINER_MAX = 4096
+
+
+def _to_bitset(values: np.ndarray) -> np.ndarray:
+    bits = np.zeros(65536, dtype=np.bool_)
+    bits[values] = True
+    return np.packbits(bits, bitorder="little")
+
+
+def _bitset_values(bitset: np.ndarray) -> np.ndarray:
+    return np.flatnonzero(np.unpackbits(bitset, bitorder="little")).astype(np.uint16)
+
+
+def _bitset_contains(bitset: np.ndarray, values: np.ndarray) -> np.ndarray:
+    return ((bitset[values >> 3] >> (values & 7).astype(np.uint8)) & 1).astype(np.bool_)
+
+
+def _is_bitset(container: np.ndarray) -> bool:
+    return container.dtype == np.uint8
+
+
+def _cardinality(container: np.ndarray) -> int:
+    if _is_bitset(container):
+        return int(np.unpackbits(container).sum())
+    return len(container)
+
+
+def _optimize(container: np.ndarray) -> Optional[np.ndarray]:
+    """按元素数选择块的存储方式，空块返回 None"""
+    if _is_bitset(container):
+        if _cardinality(container) > ARRAY_CONTAINER_MAX:
+            return container
+        container = _bitset_values(container)
+    if not len(container):
+        return None
+    if len(container) > ARRAY_CONTAINER_MAX:
+        return _to_bitset(container)
+    return container
+
+
+def _and(left: np.ndarray, right: np.ndarray) -> Optional[np.ndarray]:
+    if _is_bitset(left) and _is_bitset(right):
+        return _optimize(left & right)
+    if _is_bitset(left):
+        left, right = right, left
+    if _is_bitset(right):
+        return _optimize(left[_bitset_contains(right, left)])
+    return _optimize(np.intersect1d(left, right, assume_unique=True))
+
+
+def _or(left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    if not _is_bitset(left) and not _is_bitset(right):
+        return _optimize(np.union1d(left, right))
+    if not _is_bitset(left):
+        left = _to_bitset(left)
+    if not _is_bitset(right):
+        right = _to_bitset(right)
+    return left | right
+
+
+class Bitmap:
+    """职位ID集合的压缩位图：高16位 -> 块（uint16 升序数组或 uint8 位集）"""
+
+    def __init__(self, containers: Optional[Dict[int, np.ndarray]] = None):
+        self._containers: Dict[int, np.ndarray] = containers or {}
+
+    @classmethod
+    def from_ids(cls, ids: Union[np.ndarray, Iterable[int]]) -> "Bitmap":
+        """由职位ID构建位图"""
+        ids = np.unique(np.asarray(ids if isinstance(ids, np.ndarray) else list(ids), dtype=np.int64))
+        highs = ids >> 16
+        keys, starts = np.unique(highs, return_index=True)
+        ends = list(starts[1:]) + [len(ids)]
+        return cls({
+            int(key): _optimize((ids[start:end] & 0xFFFF).astype(np.uint16))
+            for key, start, end in zip(keys, starts, ends)
+        })
+
+    def add(self, job_id: int) -> None:
+        high, low = job_id >> 16, job_id & 0xFFFF
+        container = self._containers.get(high)
+        if container is None:
+            self._containers[high] = np.array([low], dtype=np.uint16)
+        elif _is_bitset(container):
+            container[low >> 3] |= 1 << (low & 7)
+        else:
+            position = np.searchsorted(container, low)
+            if position == len(container) or container[position] != low:
+                self._containers[high] = _optimize(np.insert(container, position, low))
+
+    def discard(self, job_id: int) -> None:
+        high, low = job_id >> 16, job_id & 0xFFFF
+        container = self._containers.get(high)
+        if container is None:
+            return
+        if _is_bitset(container):
+            container[low >> 3] &= ~np.uint8(1 << (low & 7))
+        else:
+            container = container[container != low]
+        container = _optimize(container)
+        if container is None:
+            del self._containers[high]
+        else:
+            self._containers[high] = container
+
+    def __and__(self, other: "Bitmap") -> "Bitmap":
+        containers = {}
+        for high in self._containers.keys() & other._containers.keys():
+            container = _and(self._containers[high], other._containers[high])
+            if container is not None:
+                containers[high] = container
+        return Bitmap(containers)
+
+    def __or__(self, other: "Bitmap") -> "Bitmap":
+        containers = dict(self._containers)
+        for high, container in other._containers.items():
+            containers[high] = _or(containers[high], container) if high in containers else container
+        return Bitmap(containers)
+
+    def __bool__(self) -> bool:
+        return bool(self._containers)
+
+    def __len__(self) -> int:
+        return sum(_cardinality(container) for container in self._containers.values())
+
+    def __contains__(self, job_id: int) -> bool:
+        container = self._containers.get(job_id >> 16)
+        if container is None:
+            return False
+        low = np.array([job_id & 0xFFFF], dtype=np.uint16)
+        if _is_bitset(container):
+            return bool(_bitset_contains(container, low)[0])
+        position = np.searchsorted(container, low[0])
+        return position < len(container) and container[position] == low[0]
+
+    def to_array(self) -> np.ndarray:
+        """按升序排列的职位ID"""
+        parts = [
+            (high << 16) | (_bitset_values(container) if _is_bitset(container) else container).astype(np.int64)
+            for high, container in sorted(self._containers.items())
+        ]
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64)
+
+
+def _dimension_value(record: Dict[str, Any], dimension: str) -> Any:
+    if dimension == SALARY_DIMENSION:
+        return salary_bucket_label((record["salary_min"] + record["salary_max"]) // 2)
+    return record[FILTER_DIMENSIONS[dimension]]
+
+
+class JobFilterIndex:
+    """各维度的 取值 -> 职位位图"""
+
+    def __init__(self, dimensions: Iterable[str] = FACET_DIMENSIONS):
+        self.dimensions = tuple(dimensions)
+        self.clear()
+
+    def clear(self) -> None:
+        self.bitmaps: Dict[str, Dict[Any, Bitmap]] = {dimension: {} for dimension in self.dimensions}
+
+    def add(self, records: Iterable[Dict[str, Any]]) -> None:
+        for record in records:
+            for dimension in self.dimensions:
+                value = _dimension_value(record, dimension)
+                bitmaps = self.bitmaps[dimension]
+                bitmap = bitmaps.get(value)
+                if bitmap is None:
+                    bitmap = bitmaps[value] = Bitmap()
+                bitmap.add(record["id"])
+
+    def remove(self, records: Iterable[Dict[str, Any]]) -> None:
+        for record in records:
+            for dimension in self.dimensions:
+                value = _dimension_value(record, dimension)
+                bitmaps = self.bitmaps[dimension]
+                bitmap = bitmaps.get(value)
+                if bitmap is None:
+                    continue
+                bitmap.discard(record["id"])
+                if not bitmap:
+                    del bitmaps[value]
+
+    def values(self, dimension: str) -> List[Any]:
+        return list(self.bitmaps[dimension])
+
+    def bitmap(self, dimension: str, values: Iterable[Any]) -> Bitmap:
+        """该维度取值为 values 中任意一个的职位（并集）"""
+        result = Bitmap()
+        for value in values:
+            bitmap = self.bitmaps[dimension].get(value)
+            if bitmap is not None:
+                result = result | bitmap
+        return result
+
+    def select(self, conditions: Dict[str, Iterable[Any]]) -> Optional[Bitmap]:
+        """
+        满足全部筛选条件的职位：conditions 为 维度 -> 可选取值，同一维度内取并集、不同维度之间取交集；
+        没有任何条件时返回 None，表示不限
+        """
+        bitmaps = [self.bitmap(dimension, values) for dimension, values in conditions.items()]
+        if not bitmaps:
+            return None
+        # 先从最小的位图开始求交集
+        bitmaps.sort(key=len)
+        result = bitmaps[0]
+        for bitmap in bitmaps[1:]:
+            if not result:
+                break
+            result = result & bitmap
+        return result
+
+    def facet_counts(self, dimension: str, matched: Optional[Bitmap] = None) -> List[Dict[str, Any]]:
+        """
+        匹配集合中该维度各取值的职位数（matched 为 None 表示全部职位），取值为空的职位不计入；
+        薪资区间按区间顺序返回全部区间，其余维度只返回职位数大于0的取值并按职位数降序排列
+        """
+        counts = {}
+        for value, bitmap in self.bitmaps[dimension].items():
+            if value is None:
+                continue
+            count = len(bitmap & matched) if matched is not None else len(bitmap)
+            if count:
+                counts[value] = count
+        if dimension == SALARY_DIMENSION:
+            return [{"value": label, "count": counts.get(label, 0)} for label in SALARY_BUCKET_LABELS]
+        return [
+            {"value": value, "count": count}
+            for value, count in sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+        ]
+
+
+job_filter_index = JobFilterIndex()
+
+
+@register_job_listener
+def _update_job_filter_index(event: JobChangeEvent) -> None:
+    if event.reset:
+        job_filter_index.clear()
+    job_filter_index.remove(event.removed)
+    job_filter_index.add(event.added)
+
+
+def get_facets(facets: Iterable[str], matched_ids: Optional[Union[np.ndarray, List[int]]] = None) -> Dict[str, List[Dict[str, Any]]]:
+    """匹配职位在各维度上的分面统计；matched_ids 为 None 表示全部职位"""
+    matched = Bitmap.from_ids(matched_ids) if matched_ids is not None else None
+    return {facet: job_filter_index.facet_counts(facet, matched) for facet in dict.fromkeys(facets)}
@@ -0,0 +1,190 @@
+"""
+职位列表的游标分页（keyset pagination）
+按 (排序键, 职位ID) 定位：下一页从上一页最后一条之后开始，用 WHERE 条件跳过已返回的数据，
+而不是 OFFSET 扫描后丢弃，翻到第几页的开销都相同。
+游标是 base64 编码的 JSON：{"s": 排序方式, "k": 排序键, "i": 职位ID, "b": 是否向前翻页}，对客户端不透明。
+排序键为空（NULL）的职位按 MySQL 的规则视为最小值：升序时排在最前，降序时排在最后
+"""
+import base64
+import bisect
+import heapq
+import json
+from datetime import datetime
+from typing import Dict, List, Any, Callable, Optional, Tuple
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Query
+from models import Job
+
+# 支持的排序字段；排序方式以 "-" 开头表示降序，如 "-salary_max"
+SORT_COLUMNS = {
+    "id": Job.id,
+    "salary_max": Job.salary_max,
+    "created_at": Job.created_at,
+}
+
+# 搜索接口额外支持按相关度排序（得分降序，相同时ID升序）
+RELEVANCE = "relevance"
+
+SORT_PATTERN = "^(relevance|-?(id|salary_max|created_at))$"
+
+
+class Cursor:
+    """解码后的游标：排序键、职位ID和翻页方向"""
+
+    def __init__(self, sort: str, key: Any, job_id: int, backward: bool):
+        self.sort = sort
+        self.key = key
+        self.job_id = job_id
+        self.backward = backward
+
+    def encode(self) -> str:
+        key = self.key.isoformat() if isinstance(self.key, datetime) else self.key
+        payload = json.dumps({"s": self.sort, "k": key, "i": self.job_id, "b": self.backward}, separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def parse_sort(sort: str) -> Tuple[str, bool]:
+    """排序方式 -> (排序字段, 是否降序)"""
+    if sort == RELEVANCE:
+        return RELEVANCE, True
+    return sort.lstrip("-"), sort.startswith("-")
+
+
+def decode_cursor(token: str, sort: str) -> Cursor:
+    """解码游标，格式错误或与当前排序方式不一致时抛出 ValueError"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        cursor = Cursor(payload["s"], payload["k"], int(payload["i"]), bool(payload["b"]))
+    except (ValueError, TypeError, KeyError) as e:
+        raise ValueError("无效的分页游标") from e
+    if cursor.sort != sort:
+        raise ValueError("分页游标与当前排序方式不一致")
+    if parse_sort(sort)[0] == "created_at" and cursor.key is not None:
+        cursor.key = datetime.fromisoformat(cursor.key)
+    return cursor
+
+
+def _after(column, descending: bool, key: Any, job_id: int):
+    """按 (column, id) 排序时位于 (key, job_id) 之后的职位，NULL 视为最小值"""
+    if descending:
+        if key is None:
+            return and_(column.is_(None), Job.id < job_id)
+        return or_(column < key, and_(column == key, Job.id < job_id), column.is_(None))
+    if key is None:
+        return or_(and_(column.is_(None), Job.id > job_id), column.isnot(None))
+    return or_(column > key, and_(column == key, Job.id > job_id))
+
+
+def _page_cursors(sort: str, rows: List[Tuple[Any, int]], cursor: Optional[Cursor], has_more: bool) -> Tuple[Optional[str], Optional[str]]:
+    """由当前页的首尾两条生成 (下一页游标, 上一页游标)"""
+    if not rows:
+        return None, None
+    backward = cursor is not None and cursor.backward
+    # 向后翻页时多取到的一条说明还有下一页；向前翻页时则说明还有上一页
+    has_next = has_more if not backward else True
+    has_prev = (cursor is not None) if not backward else has_more
+    first_key, first_id = rows[0]
+    last_key, last_id = rows[-1]
+    next_cursor = Cursor(sort, last_key, last_id, False).encode() if has_next else None
+    prev_cursor = Cursor(sort, first_key, first_id, True).encode() if has_prev else None
+    return next_cursor, prev_cursor
+
+
+def _scan(query: Query, sort: str, cursor: Optional[Cursor], limit: int) -> Query:
+    """按扫描方向排序、跳过游标之前的数据并只取 limit+1 条的查询"""
+    field, descending = parse_sort(sort)
+    column = SORT_COLUMNS[field]
+    # 向前翻页时反转排序方向取数，再把结果倒回来
+    scan_descending = descending != (cursor is not None and cursor.backward)
+    if cursor is not None:
+        query = query.filter(_after(column, scan_descending, cursor.key, cursor.job_id))
+    if scan_descending:
+        query = query.order_by(column.desc(), Job.id.desc())
+    else:
+        query = query.order_by(column.asc(), Job.id.asc())
+    return query.limit(limit + 1)
+
+
+def keyset_page(query: Query, sort: str, cursor: Optional[Cursor], limit: int) -> Tuple[List[Job], Optional[str], Optional[str]]:
+    """
+    在数据库中按 (排序字段, 职位ID) 取一页职位，返回 (职位, 下一页游标, 上一页游标)。
+    查询只读取 limit+1 条，多出的一条用于判断是否还有更多数据
+    """
+    field, _ = parse_sort(sort)
+    backward = cursor is not None and cursor.backward
+    jobs = _scan(query, sort, cursor, limit).all()
+    has_more = len(jobs) > limit
+    jobs = jobs[:limit]
+    if backward:
+        jobs.reverse()
+    next_cursor, prev_cursor = _page_cursors(
+        sort, [(getattr(job, field), job.id) for job in jobs], cursor, has_more
+    )
+    return jobs, next_cursor, prev_cursor
+
+
+def keyset_keys(query: Query, sort: str, cursor: Optional[Cursor], limit: int) -> Dict[int, Any]:
+    """
+    在数据库中按游标条件取排序最靠前的 limit+1 个职位的 职位ID -> 排序键，
+    用于把分批查询的结果交给 keyset_page_in_memory 合并出当前页
+    """
+    field, _ = parse_sort(sort)
+    return dict(_scan(query.with_entities(Job.id, SORT_COLUMNS[field]), sort, cursor, limit).all())
+
+
+def keyset_page_in_ids(
+    job_ids: List[int], sort: str, cursor: Optional[Cursor], limit: int
+) -> Tuple[List[int], Optional[str], Optional[str]]:
+    """按职位ID排序时，在升序的职位ID列表上二分查找游标位置，直接切出当前页，返回值同 keyset_page_in_memory"""
+    _, descending = parse_sort(sort)
+    backward = cursor is not None and cursor.backward
+    if descending != backward:
+        end = len(job_ids) if cursor is None else bisect.bisect_left(job_ids, cursor.job_id)
+        page = job_ids[max(end - limit - 1, 0):end][::-1]
+    else:
+        start = 0 if cursor is None else bisect.bisect_right(job_ids, cursor.job_id)
+        page = job_ids[start:start + limit + 1]
+
+    has_more = len(page) > limit
+    page = page[:limit]
+    if backward:
+        page.reverse()
+    next_cursor, prev_cursor = _page_cursors(sort, [(job_id, job_id) for job_id in page], cursor, has_more)
+    return page, next_cursor, prev_cursor
+
+
+def _order_key(field: str) -> Callable[[int, Any], Tuple]:
+    """内存中排序用的比较键，与数据库中的排序规则一致"""
+    if field == RELEVANCE:
+        return lambda job_id, key: (key, -job_id)
+    return lambda job_id, key: (key is not None, key if key is not None else 0, job_id)
+
+
+def keyset_page_in_memory(
+    keys: Dict[int, Any], sort: str, cursor: Optional[Cursor], limit: int
+) -> Tuple[List[int], Optional[str], Optional[str]]:
+    """
+    对已在内存中的 职位ID -> 排序键（如搜索的匹配集合和相关度得分）取一页，
+    返回 (职位ID, 下一页游标, 上一页游标)；用堆只选出当前页，不对全部结果排序
+    """
+    field, descending = parse_sort(sort)
+    order_key = _order_key(field)
+    backward = cursor is not None and cursor.backward
+    scan_descending = descending != backward
+
+    entries = keys.items()
+    if cursor is not None:
+        bound = order_key(cursor.job_id, cursor.key)
+        if scan_descending:
+            entries = [(job_id, key) for job_id, key in entries if order_key(job_id, key) < bound]
+        else:
+            entries = [(job_id, key) for job_id, key in entries if order_key(job_id, key) > bound]
+    select = heapq.nlargest if scan_descending else heapq.nsmallest
+    page = select(limit + 1, entries, key=lambda entry: order_key(*entry))
+
+    has_more = len(page) > limit
+    page = page[:limit]
+    if backward:
+        page.reverse()
+    next_cursor, prev_cursor = _page_cursors(sort, [(key, job_id) for job_id, key in page], cursor, has_more)
+    return [job_id for job_id, _ in page], next_cursor, prev_cursor
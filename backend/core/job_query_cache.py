@@ -0,0 +1,177 @@
+"""
+职位查询结果缓存
+职位列表和搜索的结果按规范化后的筛选条件和页码缓存，条目只保存当前页的职位ID（以及相关度得分、分面统计），
+职位内容另存于按职位ID缓存的行缓存，返回时由行缓存组装，两者都受LRU容量限制。
+失效是精确的：每个条目附带判断职位是否匹配其筛选条件的函数，职位新增、修改、删除或入库时，
+只丢弃变更前后的职位数据匹配其条件的条目，并从行缓存中移除这些职位；其余条目不受影响。
+一次变更的职位数超过 QUERY_CACHE_BULK_LIMIT 时整体清空，不再逐条判断。
+搜索结果的相关度还依赖全部职位的统计量（职位数、文档频率、字段平均长度），这类条目标记为依赖全文统计：
+只要有职位新增、删除，或修改了建立全文索引的字段，就全部丢弃
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Any, Callable, Hashable, Iterable, Tuple
+from core.job_events import JobChangeEvent, register_job_listener
+from core.job_search_index import SEARCH_FIELDS, field_text
+
+# 查询结果缓存的最大条目数与过期时间（秒）
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "512"))
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", "300"))
+
+# 行缓存最多保存的职位数
+ROW_CACHE_SIZE = int(os.getenv("ROW_CACHE_SIZE", "5000"))
+
+# 一次变更的职位数超过该值时整体清空查询结果缓存
+QUERY_CACHE_BULK_LIMIT = int(os.getenv("QUERY_CACHE_BULK_LIMIT", "200"))
+
+Predicate = Callable[[Dict[str, Any]], bool]
+
+
+class JobQueryCache:
+    """查询结果缓存（键 -> 结果及其匹配条件）与行缓存（职位ID -> 职位），共用一个失效版本号"""
+
+    def __init__(self, max_entries: int = QUERY_CACHE_SIZE, ttl_seconds: float = QUERY_CACHE_TTL,
+                 max_rows: int = ROW_CACHE_SIZE, bulk_limit: int = QUERY_CACHE_BULK_LIMIT):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_rows = max_rows
+        self.bulk_limit = bulk_limit
+        # 键 -> (写入时间, 匹配条件, 是否依赖全文统计, 结果)
+        self._entries: "OrderedDict[Hashable, Tuple[float, Predicate, bool, Any]]" = OrderedDict()
+        self._rows: "OrderedDict[int, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        # 每次失效都递增；查询开始时记下版本号，写入时版本已变化说明期间有职位变更，结果可能过期，不再写入
+        self._version = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """查找缓存结果，返回 (是否命中, 结果)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, _, _, value = entry
+                if time.monotonic() - stored_at < self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def set(self, key: Hashable, version: int, value: Any, predicate: Predicate, scored: bool = False) -> None:
+        """
+        写入查询结果，predicate 判断一条职位数据是否匹配该查询的筛选条件；
+        scored 表示结果含相关度得分，依赖全文统计
+        """
+        with self._lock:
+            if version != self._version:
+                return
+            self._entries[key] = (time.monotonic(), predicate, scored, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_rows(self, job_ids: Iterable[int]) -> Dict[int, Any]:
+        """行缓存中已有的职位"""
+        with self._lock:
+            rows = {}
+            for job_id in job_ids:
+                row = self._rows.get(job_id)
+                if row is not None:
+                    self._rows.move_to_end(job_id)
+                    rows[job_id] = row
+            return rows
+
+    def set_rows(self, rows: Dict[int, Any], version: int) -> None:
+        with self._lock:
+            if version != self._version:
+                return
+            self._rows.update(rows)
+            for job_id in rows:
+                self._rows.move_to_end(job_id)
+            while len(self._rows) > self.max_rows:
+                self._rows.popitem(last=False)
+
+    def invalidate(self, records: List[Dict[str, Any]], corpus_changed: bool = False) -> None:
+        """
+        丢弃匹配任一变更前后职位数据的查询结果，并从行缓存中移除这些职位；
+        corpus_changed 表示全文统计发生变化，同时丢弃全部依赖全文统计的条目
+        """
+        with self._lock:
+            self._version += 1
+            for record in records:
+                self._rows.pop(record["id"], None)
+            if len(records) > self.bulk_limit:
+                self.invalidations += len(self._entries)
+                self._entries.clear()
+                return
+            stale = [
+                key for key, (_, predicate, scored, _) in self._entries.items()
+                if (scored and corpus_changed) or any(predicate(record) for record in records)
+            ]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._version += 1
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+            self._rows.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存命中统计"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "rows": len(self._rows),
+                "max_rows": self.max_rows,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+job_query_cache = JobQueryCache()
+
+
+@register_job_listener
+def _invalidate_job_queries(event: JobChangeEvent) -> None:
+    if event.reset:
+        job_query_cache.clear()
+    changed = list(event.removed) + list(event.added)
+    if changed:
+        job_query_cache.invalidate(changed, corpus_changed(event))
+
+
+def corpus_changed(event: JobChangeEvent) -> bool:
+    """变更是否影响全文统计：有职位新增或删除，或修改了建立全文索引的字段"""
+    previous = {record["id"]: record for record in event.removed}
+    if previous.keys() != {record["id"] for record in event.added}:
+        return True
+    return any(
+        field_text(record, field) != field_text(previous[record["id"]], field)
+        for record in event.added for field in SEARCH_FIELDS
+    )
+
+
+def contains_keyword(record: Dict[str, Any], keyword: str, fields: Iterable[str]) -> bool:
+    """任一字段包含关键词（不区分大小写，与数据库 LIKE 的匹配范围一致或更宽）"""
+    keyword = keyword.lower()
+    return any(keyword in (record.get(field) or "").lower() for field in fields)
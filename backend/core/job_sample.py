@@ -0,0 +1,137 @@
+"""
+职位抽样服务
+随职位变更增量维护两种样本，供近似分析使用：
+- 全体职位的等概率蓄水池样本
+- 按城市分层、每个城市独立维护的蓄水池样本
+删除职位时使用随机配对（Random Pairing）算法补偿，删除后的样本仍是剩余职位的等概率样本
+"""
+import os
+import random
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+from core.job_events import JobChangeEvent, register_job_listener
+
+# 等概率样本的容量
+APPROX_SAMPLE_SIZE = int(os.getenv("APPROX_SAMPLE_SIZE", "10000"))
+
+# 分层样本中每个城市的容量
+APPROX_STRATUM_SIZE = int(os.getenv("APPROX_STRATUM_SIZE", "1000"))
+
+# 样本行与 JobColumns.from_rows 的行格式一致：
+# (id, salary_min, salary_max, city, category, experience_required, education_required)
+SampleRow = Tuple[int, int, int, Any, Any, Any, Any]
+
+
+def sample_row(record: Dict[str, Any]) -> SampleRow:
+    return (
+        record["id"],
+        record["salary_min"],
+        record["salary_max"],
+        record["city"],
+        record["category"],
+        record["experience_required"],
+        record["education_required"]
+    )
+
+
+class ReservoirSample:
+    """支持插入和删除的固定容量蓄水池样本"""
+
+    def __init__(self, capacity: int, rng: Optional[random.Random] = None):
+        self.capacity = capacity
+        self.population = 0
+        self._rows: List[SampleRow] = []
+        self._positions: Dict[int, int] = {}
+        # 尚未补偿的删除数：被删职位在样本中 / 不在样本中
+        self._deleted_in_sample = 0
+        self._deleted_outside = 0
+        self._random = rng or random.Random()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def rows(self) -> List[SampleRow]:
+        return list(self._rows)
+
+    def _append(self, row: SampleRow) -> None:
+        self._positions[row[0]] = len(self._rows)
+        self._rows.append(row)
+
+    def _discard(self, job_id: int) -> None:
+        position = self._positions.pop(job_id)
+        last = self._rows.pop()
+        if position < len(self._rows):
+            self._rows[position] = last
+            self._positions[last[0]] = position
+
+    def add(self, row: SampleRow) -> None:
+        self.population += 1
+        pending = self._deleted_in_sample + self._deleted_outside
+        if pending == 0:
+            if len(self._rows) < self.capacity:
+                self._append(row)
+                return
+            slot = self._random.randrange(self.population)
+            if slot < self.capacity:
+                self._positions.pop(self._rows[slot][0])
+                self._rows[slot] = row
+                self._positions[row[0]] = slot
+        elif self._random.random() * pending < self._deleted_in_sample:
+            self._append(row)
+            self._deleted_in_sample -= 1
+        else:
+            self._deleted_outside -= 1
+
+    def remove(self, job_id: int) -> None:
+        self.population -= 1
+        if job_id in self._positions:
+            self._discard(job_id)
+            self._deleted_in_sample += 1
+        else:
+            self._deleted_outside += 1
+
+
+class JobSampler:
+    """全体等概率样本与按城市分层样本"""
+
+    def __init__(self, sample_size: int = APPROX_SAMPLE_SIZE, stratum_size: int = APPROX_STRATUM_SIZE):
+        self.sample_size = sample_size
+        self.stratum_size = stratum_size
+        self.clear()
+
+    def clear(self) -> None:
+        self.uniform = ReservoirSample(self.sample_size)
+        self.by_city: Dict[Any, ReservoirSample] = {}
+
+    def apply(self, records: Iterable[Dict[str, Any]], weight: int) -> None:
+        """加入（weight=1）或移除（weight=-1）一批职位"""
+        for record in records:
+            stratum = self.by_city.get(record["city"])
+            if weight > 0:
+                if stratum is None:
+                    stratum = self.by_city[record["city"]] = ReservoirSample(self.stratum_size)
+                row = sample_row(record)
+                self.uniform.add(row)
+                stratum.add(row)
+            else:
+                self.uniform.remove(record["id"])
+                if stratum is not None:
+                    stratum.remove(record["id"])
+                    if stratum.population <= 0:
+                        del self.by_city[record["city"]]
+
+    def strata(self, sampling: str) -> List[Tuple[int, List[SampleRow]]]:
+        """返回 [(层的职位总数, 层内样本行)]，等概率抽样视为只有一层"""
+        if sampling == "stratified":
+            return [(sample.population, sample.rows()) for sample in list(self.by_city.values())]
+        return [(self.uniform.population, self.uniform.rows())]
+
+
+job_sampler = JobSampler()
+
+
+@register_job_listener
+def _update_job_sampler(event: JobChangeEvent) -> None:
+    if event.reset:
+        job_sampler.clear()
+    job_sampler.apply(event.removed, -1)
+    job_sampler.apply(event.added, 1)
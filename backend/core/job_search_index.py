@@ -0,0 +1,372 @@
+"""
+职位全文倒排索引
+对职位名称、公司、技能标签、描述和任职要求分词建立倒排索引，随职位变更增量更新，
+关键词搜索先由索引得到候选职位ID，不再对全表执行 LIKE '%关键词%'。
+分词规则（统一转为小写）：
+- 连续的中文字符同时产生单字和相邻二字词（"数据分析" -> 数、据、分、析、数据、据分、分析）
+- 连续的字母数字（可带 + # 后缀，如 c++、c#）作为一个英文词
+查询时中文按二字词（单个汉字时按单字）求交集；英文词在英文词表中做子串匹配（"sql" 可匹配 mysql）：
+英文词表按不超过三个字符的子串建立 子串 -> 英文词 的映射，查询词不超过三个字符时直接查表，
+更长时取各三字子串对应英文词集合中最小的一个再校验，扩展结果在词表变化前缓存。
+词表大小只随不同英文词的数量增长，与职位数无关。索引结果总是子串匹配结果的超集，
+需要时再只对候选职位校验原文。倒排表为按职位ID升序的 array('I')，每个职位ID只占4字节，
+词频另存于 array('H')，与各字段长度一起用于 BM25F 相关度排序
+"""
+import heapq
+import html
+import math
+import re
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, List, Any, Iterable, Optional, Set, Tuple
+from core.job_events import JobChangeEvent, register_job_listener
+
+# 建立索引的职位字段
+SEARCH_FIELDS = ("title", "company", "tags", "description", "requirements")
+
+# BM25F 各字段权重：职位名称 > 技能标签 > 任职要求 > 描述
+FIELD_WEIGHTS = {
+    "title": 3.0,
+    "tags": 2.0,
+    "requirements": 1.5,
+    "description": 1.0,
+    "company": 1.0,
+}
+
+# BM25 参数：k1 控制词频饱和速度，b 控制按字段长度归一化的程度
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# 英文词表建立映射的子串最大长度
+GRAM_LENGTH = 3
+
+# 英文索引词扩展结果的缓存条目上限，超过时清空
+EXPANSION_CACHE_SIZE = 4096
+
+# 高亮片段的长度（字符数）
+SNIPPET_LENGTH = 80
+
+# 返回高亮片段的字段
+HIGHLIGHT_FIELDS = ("title", "requirements", "description")
+
+_TOKEN_PATTERN = re.compile(r"[㐀-鿿]+|[a-z0-9][a-z0-9+#]*")
+
+
+def _is_cjk(run: str) -> bool:
+    return run[0] >= "㐀"
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """把文本切分为索引词：中文单字和二字词、英文词"""
+    tokens = []
+    if not text:
+        return tokens
+    for run in _TOKEN_PATTERN.findall(text.lower()):
+        if _is_cjk(run):
+            tokens.extend(run)
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run)
+    return tokens
+
+
+def _grams(word: str) -> Set[str]:
+    """英文词中长度不超过 GRAM_LENGTH 的全部子串"""
+    return {
+        word[i:i + n] for n in range(1, min(GRAM_LENGTH, len(word)) + 1) for i in range(len(word) - n + 1)
+    }
+
+
+def field_text(record: Dict[str, Any], field: str) -> Optional[str]:
+    """职位字段的文本，技能标签以空格连接"""
+    value = record.get(field)
+    if isinstance(value, list):
+        return " ".join(value)
+    return value
+
+
+def query_terms(text: str) -> Tuple[List[Tuple[str, bool]], bool]:
+    """
+    把查询切分为 [(索引词, 是否为英文词)]，并判断索引结果是否已与子串匹配完全一致：
+    查询只是一个英文词或不超过两个汉字（前后不带空格等其他字符）时，命中索引即包含该子串，无需再校验原文
+    """
+    runs = _TOKEN_PATTERN.findall(text.lower())
+    terms = []
+    for run in runs:
+        if not _is_cjk(run):
+            terms.append((run, True))
+        elif len(run) == 1:
+            terms.append((run, False))
+        else:
+            terms.extend((run[i:i + 2], False) for i in range(len(run) - 1))
+    exact = len(runs) == 1 and runs[0] == text.lower() and (not _is_cjk(runs[0]) or len(runs[0]) <= 2)
+    return list(dict.fromkeys(terms)), exact
+
+
+class PostingList:
+    """按职位ID升序存放的倒排表及对应的词频"""
+
+    __slots__ = ("ids", "frequencies")
+
+    def __init__(self):
+        self.ids = array("I")
+        self.frequencies = array("H")
+
+    def add(self, job_id: int, frequency: int) -> None:
+        ids = self.ids
+        frequency = min(frequency, 0xFFFF)
+        if not ids or ids[-1] < job_id:
+            ids.append(job_id)
+            self.frequencies.append(frequency)
+            return
+        position = bisect_left(ids, job_id)
+        if position == len(ids) or ids[position] != job_id:
+            ids.insert(position, job_id)
+            self.frequencies.insert(position, frequency)
+
+    def remove(self, job_id: int) -> None:
+        position = bisect_left(self.ids, job_id)
+        if position < len(self.ids) and self.ids[position] == job_id:
+            del self.ids[position]
+            del self.frequencies[position]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+class JobSearchIndex:
+    """各字段的 索引词 -> 倒排表、职位的字段长度，以及用于英文子串匹配的英文词表"""
+
+    def __init__(self, fields: Iterable[str] = SEARCH_FIELDS):
+        self.fields = tuple(fields)
+        self.clear()
+
+    def clear(self) -> None:
+        self.postings: Dict[str, Dict[str, PostingList]] = {field: {} for field in self.fields}
+        # 各字段英文词表的 子串 -> 包含该子串的英文词
+        self._latin_grams: Dict[str, Dict[str, Set[str]]] = {field: {} for field in self.fields}
+        # (字段, 英文查询词) -> 包含它的英文词，英文词表变化时清空
+        self._expansions: Dict[Tuple[str, str], List[str]] = {}
+        # (索引词, 是否为英文词) -> 任一字段包含该词的职位数，职位变更时清空
+        self._document_frequencies: Dict[Tuple[str, bool], int] = {}
+        # 职位ID -> 字段的索引词数，以及各字段的索引词总数（用于计算平均长度）
+        self.lengths: Dict[str, Dict[int, int]] = {field: {} for field in self.fields}
+        self.total_lengths: Dict[str, int] = {field: 0 for field in self.fields}
+        self.document_count = 0
+
+    def add(self, records: Iterable[Dict[str, Any]]) -> None:
+        self._document_frequencies.clear()
+        for record in records:
+            self.document_count += 1
+            for field in self.fields:
+                postings = self.postings[field]
+                tokens = tokenize(field_text(record, field))
+                self.lengths[field][record["id"]] = len(tokens)
+                self.total_lengths[field] += len(tokens)
+                for token, frequency in Counter(tokens).items():
+                    posting = postings.get(token)
+                    if posting is None:
+                        posting = postings[token] = PostingList()
+                        if not _is_cjk(token):
+                            self._add_latin(field, token)
+                    posting.add(record["id"], frequency)
+
+    def remove(self, records: Iterable[Dict[str, Any]]) -> None:
+        self._document_frequencies.clear()
+        for record in records:
+            self.document_count -= 1
+            for field in self.fields:
+                postings = self.postings[field]
+                self.total_lengths[field] -= self.lengths[field].pop(record["id"], 0)
+                for token in set(tokenize(field_text(record, field))):
+                    posting = postings.get(token)
+                    if posting is None:
+                        continue
+                    posting.remove(record["id"])
+                    if not posting:
+                        del postings[token]
+                        if not _is_cjk(token):
+                            self._remove_latin(field, token)
+
+    def _add_latin(self, field: str, word: str) -> None:
+        grams = self._latin_grams[field]
+        for gram in _grams(word):
+            grams.setdefault(gram, set()).add(word)
+        self._expansions.clear()
+
+    def _remove_latin(self, field: str, word: str) -> None:
+        grams = self._latin_grams[field]
+        for gram in _grams(word):
+            words = grams.get(gram)
+            if words is not None:
+                words.discard(word)
+                if not words:
+                    del grams[gram]
+        self._expansions.clear()
+
+    def _latin_words(self, field: str, term: str) -> List[str]:
+        """字段英文词表中包含 term 的英文词"""
+        key = (field, term)
+        words = self._expansions.get(key)
+        if words is not None:
+            return words
+        grams = self._latin_grams[field]
+        if len(term) <= GRAM_LENGTH:
+            words = sorted(grams.get(term, ()))
+        else:
+            # 包含 term 的词一定包含它的每个三字子串，在最小的集合上校验
+            smallest = min(
+                (grams.get(term[i:i + GRAM_LENGTH], set()) for i in range(len(term) - GRAM_LENGTH + 1)), key=len
+            )
+            words = sorted(word for word in smallest if term in word)
+        if len(self._expansions) >= EXPANSION_CACHE_SIZE:
+            self._expansions.clear()
+        self._expansions[key] = words
+        return words
+
+    def _expand(self, field: str, term: str, latin: bool) -> List[PostingList]:
+        """索引词对应的倒排表；英文词返回所有包含 term 的英文词的倒排表"""
+        postings = self.postings[field]
+        if not latin:
+            posting = postings.get(term)
+            return [posting] if posting is not None else []
+        return [postings[word] for word in self._latin_words(field, term)]
+
+    def term_ids(self, term: str, latin: bool, fields: Iterable[str]) -> Set[int]:
+        """任一指定字段包含该索引词的职位ID"""
+        ids: Set[int] = set()
+        for field in fields:
+            for posting in self._expand(field, term, latin):
+                ids.update(posting.ids)
+        return ids
+
+    def document_frequency(self, term: str, latin: bool) -> int:
+        """任一参与打分的字段包含该索引词的职位数，在下次职位变更前缓存"""
+        key = (term, latin)
+        frequency = self._document_frequencies.get(key)
+        if frequency is None:
+            frequency = len(self.term_ids(term, latin, FIELD_WEIGHTS))
+            if len(self._document_frequencies) >= EXPANSION_CACHE_SIZE:
+                self._document_frequencies.clear()
+            self._document_frequencies[key] = frequency
+        return frequency
+
+    def candidates(self, text: str, fields: Optional[Iterable[str]] = None) -> Optional[Tuple[List[int], bool]]:
+        """
+        返回 (按ID升序的候选职位ID, 是否无需校验原文)。
+        多个索引词按 AND 合并，各词可以出现在不同字段，因此不精确时候选集是子串匹配结果的超集；
+        查询中没有可索引的字符时返回 None，由调用方退回原来的 LIKE 查询
+        """
+        terms, exact = query_terms(text)
+        if not terms:
+            return None
+        fields = tuple(fields) if fields is not None else self.fields
+        # 先算出现次数最少的词，交集尽早变小
+        term_sets = sorted((self.term_ids(term, latin, fields) for term, latin in terms), key=len)
+        ids = term_sets[0]
+        for term_set in term_sets[1:]:
+            if not ids:
+                break
+            ids &= term_set
+        return sorted(ids), exact
+
+    def scores(self, text: str, ids: Set[int]) -> Dict[int, float]:
+        """
+        用 BM25F 计算指定职位与查询的相关度：各字段词频按字段长度归一化、乘以字段权重后相加，
+        再做一次词频饱和，idf 按任一字段包含该词的职位数计算。
+        待打分的职位远少于倒排表时逐个在倒排表中二分查找，否则顺序扫描倒排表
+        """
+        terms, _ = query_terms(text)
+        scores = dict.fromkeys(ids, 0.0)
+        if not ids or not self.document_count:
+            return scores
+        ordered = sorted(scores)
+        for term, latin in terms:
+            weighted: Dict[int, float] = {}
+            for field, weight in FIELD_WEIGHTS.items():
+                lengths = self.lengths[field]
+                average_length = self.total_lengths[field] / self.document_count or 1.0
+                for posting in self._expand(field, term, latin):
+                    for job_id, frequency in _posting_matches(posting, ordered, scores):
+                        normalized = frequency / (1 - BM25_B + BM25_B * lengths[job_id] / average_length)
+                        weighted[job_id] = weighted.get(job_id, 0.0) + weight * normalized
+            if not weighted:
+                continue
+            document_frequency = self.document_frequency(term, latin)
+            idf = math.log(1 + (self.document_count - document_frequency + 0.5) / (document_frequency + 0.5))
+            for job_id, value in weighted.items():
+                scores[job_id] += idf * value / (BM25_K1 + value)
+        return scores
+
+    def top(self, text: str, ids: Set[int], limit: int) -> List[Tuple[int, float]]:
+        """相关度最高的 limit 个职位 [(职位ID, 得分)]，得分相同时ID小的在前"""
+        scores = self.scores(text, ids)
+        ranked = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+        return [(job_id, round(score, 4)) for job_id, score in ranked]
+
+
+def _posting_matches(posting: PostingList, ordered: List[int], ids: Dict[int, Any]) -> List[Tuple[int, int]]:
+    """倒排表中属于 ids 的 (职位ID, 词频)，ordered 为升序排列的 ids"""
+    posting_ids, frequencies = posting.ids, posting.frequencies
+    if len(ordered) * len(posting_ids).bit_length() < len(posting_ids):
+        # 职位ID都升序，每次从上一个位置继续二分查找
+        matches = []
+        position = 0
+        for job_id in ordered:
+            position = bisect_left(posting_ids, job_id, position)
+            if position == len(posting_ids):
+                break
+            if posting_ids[position] == job_id:
+                matches.append((job_id, frequencies[position]))
+        return matches
+    return [(job_id, frequency) for job_id, frequency in zip(posting_ids, frequencies) if job_id in ids]
+
+
+def highlight(text: Optional[str], query: str, length: int = SNIPPET_LENGTH) -> Optional[str]:
+    """
+    截取文本中第一个命中查询词附近的片段，命中部分用 <em></em> 标记，其余内容做HTML转义；
+    文本中没有命中时返回 None
+    """
+    if not text:
+        return None
+    runs = sorted(set(_TOKEN_PATTERN.findall(query.lower())), key=len, reverse=True)
+    if not runs:
+        return None
+    pattern = re.compile("|".join(re.escape(run) for run in runs), re.IGNORECASE)
+    first = pattern.search(text)
+    if first is None:
+        return None
+
+    start = max(0, min(first.start() - length // 4, len(text) - length))
+    end = min(len(text), start + length)
+    pieces = ["…" if start > 0 else ""]
+    position = start
+    for match in pattern.finditer(text, start, end):
+        pieces.append(html.escape(text[position:match.start()]))
+        pieces.append(f"<em>{html.escape(match.group())}</em>")
+        position = match.end()
+    pieces.append(html.escape(text[position:end]))
+    pieces.append("…" if end < len(text) else "")
+    return "".join(pieces)
+
+
+def highlights(record: Dict[str, Any], query: str) -> Dict[str, str]:
+    """各字段的高亮片段，只包含有命中的字段"""
+    snippets = {}
+    for field in HIGHLIGHT_FIELDS:
+        snippet = highlight(field_text(record, field), query)
+        if snippet is not None:
+            snippets[field] = snippet
+    return snippets
+
+
+job_search_index = JobSearchIndex()
+
+
+@register_job_listener
+def _update_job_search_index(event: JobChangeEvent) -> None:
+    if event.reset:
+        job_search_index.clear()
+    job_search_index.remove(event.removed)
+    job_search_index.add(event.added)
@@ -1,12 +1,41 @@
 import asyncio
 import json
-from typing import List, Optional, Dict, Any
+import numpy as np
+from typing import List, Optional, Dict, Any, Sequence, Tuple, Union
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, or_
 from models import Job
-from schemas.job import JobCreate, JobUpdate, JobResponse
+from schemas.job import JobCreate, JobUpdate, JobResponse, JobSearchResult, JobPage, JobSearchPage
 from database.database import SessionLocal
 from utils.data_fetcher import fetch_job_data
+from utils.data_utils import job_record
+from core.rollup_service import add_jobs_to_rollups, remove_jobs_from_rollups, refresh_stale_extremes
+from core.job_events import publish_job_change
+from core.skill_heavy_hitters import top_skill_counts
+from core.job_search_index import job_search_index, highlights
+from core.salary_index import salary_index
+from core.job_filter_index import job_filter_index, get_facets
+from core.job_query_cache import job_query_cache, contains_keyword
+from core.job_pagination import (
+    RELEVANCE, Cursor, parse_sort, decode_cursor, keyset_page, keyset_keys, keyset_page_in_ids, keyset_page_in_memory
+)
+
+# 关键词需要校验原文时，每批校验的候选职位数
+SEARCH_VERIFY_BATCH = 1000
+
+# 职位列表的 keyword 与搜索接口匹配的字段
+LIST_KEYWORD_FIELDS = ("title", "company", "description")
+SEARCH_KEYWORD_FIELDS = ("title", "company", "description", "requirements")
+
+# 游标分页使用的 (排序字段, id) 索引
+PAGINATION_INDEXES = ("ix_jobs_salary_max_id", "ix_jobs_created_at_id")
+
+def create_job_indexes() -> None:
+    """为已有的职位表补建游标分页使用的索引（已存在时跳过）"""
+    from database.database import engine
+    for index in Job.__table__.indexes:
+        if index.name in PAGINATION_INDEXES:
+            index.create(bind=engine, checkfirst=True)
 
 async def create_job(job_data: JobCreate) -> JobResponse:
     """创建职位"""
@@ -19,8 +48,13 @@ async def create_job(job_data: JobCreate) -> JobResponse:
         
         db_job = Job(**job_dict)
         db.add(db_job)
+        db.flush()
+        
+        # 在同一事务中更新聚合表
+        add_jobs_to_rollups(db, [job_record(db_job)])
         db.commit()
         db.refresh(db_job)
+        publish_job_change(added=[job_record(db_job)])
         
         # 转换为响应模型
         return JobResponse.model_validate(db_job)
@@ -32,10 +66,8 @@ async def get_job_by_id(job_id: int) -> Optional[JobResponse]:
     from database.database import SessionLocal
     db = SessionLocal()
     try:
-        db_job = db.query(Job).filter(Job.id == job_id).first()
-        if db_job:
-            return JobResponse.model_validate(db_job)
-        return None
+        jobs = _job_responses(db, [job_id])
+        return jobs[0] if jobs else None
     finally:
         db.close()
 
@@ -48,49 +80,129 @@ async def get_jobs(
     salary_max: Optional[int] = None,
     experience: Optional[str] = None,
     education: Optional[str] = None,
-    category: Optional[str] = None
-) -> List[JobResponse]:
-    """获取职位列表"""
+    category: Optional[str] = None,
+    facets: Sequence[str] = ()
+) -> Union[List[JobResponse], JobPage]:
+    """获取职位列表；指定 facets 时返回附带分面统计的 JobPage"""
     from database.database import SessionLocal
+    # 空字符串与未指定相同，规范化后作为缓存键
+    keyword, city, experience, education, category = (
+        value or None for value in (keyword, city, experience, education, category)
+    )
+    cache_key = (
+        "jobs", keyword, city, salary_min, salary_max, experience, education, category,
+        tuple(sorted(set(facets))), skip, limit
+    )
+    version = job_query_cache.version
+    hit, cached = job_query_cache.get(cache_key)
     db = SessionLocal()
     try:
-        query = db.query(Job)
+        if hit:
+            page_ids, facet_counts = cached
+        else:
+            # 筛选条件由位图索引和薪资区间索引解析为职位ID
+            matched_ids = _list_ids(city, salary_min, salary_max, experience, education, category)
+            
+            # 关键词搜索；需要分面统计时取全部匹配职位，否则取到当前页为止
+            if keyword:
+                matched_ids = _keyword_ids(
+                    db, keyword, LIST_KEYWORD_FIELDS, matched_ids, None if facets else skip + limit
+                )
+                page_ids = matched_ids[skip:skip + limit]
+            elif matched_ids is not None:
+                page_ids = matched_ids[skip:skip + limit].tolist()
+            else:
+                page_ids = [job_id for (job_id,) in db.query(Job.id).offset(skip).limit(limit)]
+            facet_counts = get_facets(facets, matched_ids) if facets else None
+            job_query_cache.set(
+                cache_key, version, (page_ids, facet_counts),
+                _list_predicate(keyword, city, salary_min, salary_max, experience, education, category)
+            )
         
-        # 关键词搜索
+        # 只按主键读取当前页的职位，已在行缓存中的不再查询
+        items = _job_responses(db, page_ids)
+        if not facets:
+            return items
+        return JobPage(items=items, facets=facet_counts)
+    finally:
+        db.close()
+
+async def get_job_page(
+    limit: int = 10,
+    keyword: Optional[str] = None,
+    city: Optional[str] = None,
+    salary_min: Optional[int] = None,
+    salary_max: Optional[int] = None,
+    experience: Optional[str] = None,
+    education: Optional[str] = None,
+    category: Optional[str] = None,
+    sort: str = "id",
+    cursor: Optional[str] = None,
+    facets: Sequence[str] = ()
+) -> JobPage:
+    """按游标分页获取职位列表，cursor 无效时抛出 ValueError；指定 facets 时附带分面统计"""
+    page_cursor = decode_cursor(cursor, sort) if cursor else None
+    db = SessionLocal()
+    try:
         if keyword:
-            query = query.filter(
-                Job.title.contains(keyword) | 
-                Job.company.contains(keyword) |
-                Job.description.contains(keyword)
+            # 关键词的匹配集合已由全文索引得到，只在匹配集合内按排序键分页
+            matched_ids = _keyword_ids(
+                db, keyword, LIST_KEYWORD_FIELDS,
+                _list_ids(city, salary_min, salary_max, experience, education, category)
             )
+            page_ids, next_cursor, prev_cursor = _matched_page(db, matched_ids, sort, page_cursor, limit)
+            db_jobs = _fetch_jobs(db, page_ids)
+        else:
+            # 按排序索引顺序扫描，取满一页即停止，筛选条件留在SQL中逐行判断
+            filters = _list_filters(city, salary_min, salary_max, experience, education, category)
+            db_jobs, next_cursor, prev_cursor = keyset_page(db.query(Job).filter(*filters), sort, page_cursor, limit)
+            if facets:
+                matched_ids = _list_ids(city, salary_min, salary_max, experience, education, category)
         
-        # 城市筛选
-        if city:
-            query = query.filter(Job.city == city)
-        
-        # 薪资范围筛选
-        if salary_min is not None:
-            query = query.filter(Job.salary_max >= salary_min)
-        if salary_max is not None:
-            query = query.filter(Job.salary_min <= salary_max)
-        
-        # 经验要求筛选
-        if experience:
-            query = query.filter(Job.experience_required == experience)
-        
-        # 学历要求筛选
-        if education:
-            query = query.filter(Job.education_required == education)
-        
-        # 职位类别筛选
-        if category:
-            query = query.filter(Job.category == category)
-        
-        db_jobs = query.offset(skip).limit(limit).all()
-        return [JobResponse.model_validate(job) for job in db_jobs]
+        return JobPage(
+            items=[JobResponse.model_validate(job) for job in db_jobs],
+            next_cursor=next_cursor,
+            prev_cursor=prev_cursor,
+            facets=get_facets(facets, matched_ids) if facets else None
+        )
     finally:
         db.close()
 
+def _list_filters(
+    city: Optional[str],
+    salary_min: Optional[int],
+    salary_max: Optional[int],
+    experience: Optional[str],
+    education: Optional[str],
+    category: Optional[str]
+) -> list:
+    """职位列表的筛选条件（SQL），用于按排序索引扫描的游标分页"""
+    filters = []
+    
+    # 城市筛选
+    if city:
+        filters.append(Job.city == city)
+    
+    # 薪资范围筛选
+    if salary_min is not None:
+        filters.append(Job.salary_max >= salary_min)
+    if salary_max is not None:
+        filters.append(Job.salary_min <= salary_max)
+    
+    # 经验要求筛选
+    if experience:
+        filters.append(Job.experience_required == experience)
+    
+    # 学历要求筛选
+    if education:
+        filters.append(Job.education_required == education)
+    
+    # 职位类别筛选
+    if category:
+        filters.append(Job.category == category)
+    
+    return filters
+
 async def update_job(job_id: int, job_data: JobUpdate) -> Optional[JobResponse]:
     """更新职位信息"""
     from database.database import SessionLocal
@@ -100,12 +212,19 @@ async def update_job(job_id: int, job_data: JobUpdate) -> Optional[JobResponse]:
         if not db_job:
             return None
         
+        previous = job_record(db_job)
+        
         # 更新字段
         for field, value in job_data.dict(exclude_unset=True).items():
             setattr(db_job, field, value)
         
+        # 在同一事务中用新旧取值修正聚合表
+        remove_jobs_from_rollups(db, [previous])
+        add_jobs_to_rollups(db, [job_record(db_job)])
+        refresh_stale_extremes(db)
         db.commit()
         db.refresh(db_job)
+        publish_job_change(added=[job_record(db_job)], removed=[previous])
         
         return JobResponse.model_validate(db_job)
     finally:
@@ -120,8 +239,12 @@ async def delete_job(job_id: int) -> bool:
         if not db_job:
             return False
         
+        removed = job_record(db_job)
+        remove_jobs_from_rollups(db, [removed])
         db.delete(db_job)
+        refresh_stale_extremes(db)
         db.commit()
+        publish_job_change(removed=[removed])
         return True
     finally:
         db.close()
@@ -140,7 +263,7 @@ async def initialize_job_data() -> int:
         
         # 获取模拟数据
         jobs_data = fetch_job_data("mock")
-        created_count = 0
+        created_jobs = []
         
         for job_data in jobs_data:
             try:
@@ -151,11 +274,16 @@ async def initialize_job_data() -> int:
                 
                 db_job = Job(**job_dict)
                 db.add(db_job)
-                created_count += 1
+                created_jobs.append(db_job)
             except Exception as e:
                 print(f"创建职位失败: {e}")
         
+        db.flush()
+        created_records = [job_record(job) for job in created_jobs]
+        add_jobs_to_rollups(db, created_records)
         db.commit()
+        publish_job_change(added=created_records)
+        created_count = len(created_jobs)
         print(f"成功初始化 {created_count} 条职位数据")
         return created_count
         
@@ -185,18 +313,8 @@ async def get_job_statistics() -> Dict[str, Any]:
         avg_salary_min = db.query(func.avg(Job.salary_min)).scalar() or 0
         avg_salary_max = db.query(func.avg(Job.salary_max)).scalar() or 0
         
-        # 热门技能标签
-        all_tags = []
-        for job in db.query(Job.tags).all():
-            if job.tags:
-                try:
-                    tags = json.loads(job.tags)
-                    all_tags.extend(tags)
-                except:
-                    pass
-        
-        from collections import Counter
-        top_skills = Counter(all_tags).most_common(10)
+        # 热门技能标签：由随职位变更维护的 Space-Saving 计数器给出
+        top_skills = top_skill_counts(10)
         
         return {
             'total_jobs': total_jobs,
@@ -215,33 +333,243 @@ async def search_jobs(
     salary_min: Optional[int] = None, 
     salary_max: Optional[int] = None,
     skip: int = 0, 
-    limit: int = 10
-) -> List[JobResponse]:
-    """搜索职位"""
+    limit: int = 10,
+    facets: Sequence[str] = ()
+) -> Union[List[JobSearchResult], JobSearchPage]:
+    """搜索职位，按相关度（BM25F）排序并附带高亮片段；指定 facets 时返回附带分面统计的 JobSearchPage"""
     from database.database import SessionLocal
     db = SessionLocal()
     try:
-        query = db.query(Job)
-        
-        # 根据关键词搜索
-        query = query.filter(
-            Job.title.contains(q) | 
-            Job.company.contains(q) |
-            Job.description.contains(q) |
-            Job.requirements.contains(q)
+        # 根据关键词搜索，按相关度排序，只读取当前页的职位
+        cache_key = (
+            "search", q, city or None, salary_min or None, salary_max or None,
+            tuple(sorted(set(facets))), skip, limit
         )
+        version = job_query_cache.version
+        hit, cached = job_query_cache.get(cache_key)
+        if hit:
+            ranked, facet_counts = cached
+        else:
+            matched_ids = _search_ids(db, q, city, salary_min, salary_max)
+            ranked = job_search_index.top(q, set(matched_ids), skip + limit)[skip:]
+            facet_counts = get_facets(facets, matched_ids) if facets else None
+            job_query_cache.set(
+                cache_key, version, (ranked, facet_counts),
+                _search_predicate(q, city, salary_min, salary_max), scored=True
+            )
+        items = _search_results(q, _job_responses(db, [job_id for job_id, _ in ranked]), dict(ranked))
         
-        # 过滤城市
-        if city:
-            query = query.filter(Job.city == city)
-        
-        # 过滤薪资范围
-        if salary_min:
-            query = query.filter(Job.salary_min >= salary_min)
-        if salary_max:
-            query = query.filter(Job.salary_max <= salary_max)
+        if not facets:
+            return items
+        return JobSearchPage(items=items, facets=facet_counts)
+    finally:
+        db.close()
+
+async def search_job_page(
+    q: str,
+    city: Optional[str] = None,
+    salary_min: Optional[int] = None,
+    salary_max: Optional[int] = None,
+    limit: int = 10,
+    sort: str = RELEVANCE,
+    cursor: Optional[str] = None,
+    facets: Sequence[str] = ()
+) -> JobSearchPage:
+    """按游标分页搜索职位，默认按相关度排序，cursor 无效时抛出 ValueError；指定 facets 时附带分面统计"""
+    page_cursor = decode_cursor(cursor, sort) if cursor else None
+    db = SessionLocal()
+    try:
+        matched_ids = _search_ids(db, q, city, salary_min, salary_max)
+        if sort == RELEVANCE:
+            scores = job_search_index.scores(q, set(matched_ids))
+            page_ids, next_cursor, prev_cursor = keyset_page_in_memory(scores, sort, page_cursor, limit)
+        else:
+            page_ids, next_cursor, prev_cursor = _matched_page(db, matched_ids, sort, page_cursor, limit)
+            scores = job_search_index.scores(q, set(page_ids))
         
-        db_jobs = query.offset(skip).limit(limit).all()
-        return [JobResponse.model_validate(job) for job in db_jobs]
+        return JobSearchPage(
+            items=_search_results(q, _job_responses(db, page_ids), scores),
+            next_cursor=next_cursor,
+            prev_cursor=prev_cursor,
+            facets=get_facets(facets, matched_ids) if facets else None
+        )
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def _search_ids(
+    db: Session, q: str, city: Optional[str], salary_min: Optional[int], salary_max: Optional[int]
+) -> List[int]:
+    """匹配搜索词、城市和薪资范围的职位ID，薪资范围需完全落在 [salary_min, salary_max] 内"""
+    conditions = {"city": [city]} if city else {}
+    # 薪资条件为0时与未指定相同
+    salary_ids = _salary_ids(salary_min or None, salary_max or None, overlap=False)
+    return _keyword_ids(db, q, SEARCH_KEYWORD_FIELDS, _indexed_ids(conditions, salary_ids))
+
+def _list_ids(
+    city: Optional[str],
+    salary_min: Optional[int],
+    salary_max: Optional[int],
+    experience: Optional[str],
+    education: Optional[str],
+    category: Optional[str]
+) -> Optional[np.ndarray]:
+    """职位列表筛选条件对应的职位ID（升序），薪资范围与 [salary_min, salary_max] 有交集即可；没有筛选条件时返回 None"""
+    values = {"city": city, "experience": experience, "education": education, "category": category}
+    conditions = {dimension: [value] for dimension, value in values.items() if value}
+    return _indexed_ids(conditions, _salary_ids(salary_min, salary_max, overlap=True))
+
+def _indexed_ids(conditions: Dict[str, List[Any]], salary_ids: Optional[np.ndarray]) -> Optional[np.ndarray]:
+    """位图索引的筛选结果与薪资区间索引的结果求交集，两者都不限时返回 None"""
+    bitmap = job_filter_index.select(conditions)
+    if bitmap is None:
+        return salary_ids
+    filtered_ids = bitmap.to_array()
+    if salary_ids is None:
+        return filtered_ids
+    return np.intersect1d(filtered_ids, salary_ids, assume_unique=True)
+
+def _salary_ids(salary_min: Optional[int], salary_max: Optional[int], overlap: bool) -> Optional[np.ndarray]:
+    """
+    薪资范围筛选对应的职位ID（升序），由薪资区间索引给出；未指定薪资条件时返回 None。
+    overlap 为 True 时取薪资范围与 [salary_min, salary_max] 有交集的职位，否则取完全落在其中的职位
+    """
+    if salary_min is None and salary_max is None:
+        return None
+    if overlap:
+        return salary_index.overlapping(salary_min, salary_max)
+    return salary_index.within(salary_min, salary_max)
+
+def _search_results(q: str, jobs: List[JobResponse], scores: Dict[int, float]) -> List[JobSearchResult]:
+    """搜索结果附带相关度得分和高亮片段"""
+    results = []
+    for job in jobs:
+        fields = job.model_dump()
+        results.append(JobSearchResult(
+            **fields, score=round(scores.get(job.id, 0.0), 4), highlights=highlights(fields, q)
+        ))
+    return results
+
+def _list_predicate(
+    keyword: Optional[str],
+    city: Optional[str],
+    salary_min: Optional[int],
+    salary_max: Optional[int],
+    experience: Optional[str],
+    education: Optional[str],
+    category: Optional[str]
+):
+    """判断一条职位数据是否匹配职位列表的筛选条件，用于查询结果缓存的精确失效"""
+    def matches(record: Dict[str, Any]) -> bool:
+        if city and record["city"] != city:
+            return False
+        if experience and record["experience_required"] != experience:
+            return False
+        if education and record["education_required"] != education:
+            return False
+        if category and record["category"] != category:
+            return False
+        if salary_min is not None and record["salary_max"] < salary_min:
+            return False
+        if salary_max is not None and record["salary_min"] > salary_max:
+            return False
+        return not keyword or contains_keyword(record, keyword, LIST_KEYWORD_FIELDS)
+    return matches
+
+def _search_predicate(q: str, city: Optional[str], salary_min: Optional[int], salary_max: Optional[int]):
+    """
+    判断一条职位数据是否匹配搜索条件，用于查询结果缓存的精确失效；
+    影响相关度统计的变更由缓存按 scored 标记另行处理
+    """
+    def matches(record: Dict[str, Any]) -> bool:
+        if city and record["city"] != city:
+            return False
+        if salary_min and record["salary_min"] < salary_min:
+            return False
+        if salary_max and record["salary_max"] > salary_max:
+            return False
+        return contains_keyword(record, q, SEARCH_KEYWORD_FIELDS)
+    return matches
+
+def _keyword_filter(keyword: str, fields: tuple):
+    return or_(*(getattr(Job, field).contains(keyword) for field in fields))
+
+def _keyword_ids(
+    db: Session,
+    keyword: str,
+    fields: tuple,
+    filtered_ids: Optional[np.ndarray] = None,
+    needed: Optional[int] = None
+) -> List[int]:
+    """
+    匹配关键词和筛选条件的职位ID（按ID升序，指定 needed 时取到前 needed 个为止）：
+    先由全文索引得到候选职位ID，与筛选条件对应的 filtered_ids（None 表示不限）求交集，
+    再只在候选职位上校验关键词原文（索引结果已精确时跳过）
+    """
+    keyword_filter = _keyword_filter(keyword, fields)
+    resolved = job_search_index.candidates(keyword, fields)
+    if resolved is None:
+        # 关键词中没有可索引的字符，只能逐行匹配
+        if filtered_ids is not None:
+            return _verify_ids(db, filtered_ids.tolist(), [keyword_filter], needed)
+        query = db.query(Job.id).filter(keyword_filter).order_by(Job.id)
+        if needed is not None:
+            query = query.limit(needed)
+        return [job_id for (job_id,) in query]
+    
+    candidate_ids, exact = resolved
+    if filtered_ids is not None:
+        candidate_ids = np.intersect1d(
+            np.array(candidate_ids, dtype=np.int64), filtered_ids, assume_unique=True
+        ).tolist()
+    return _verify_ids(db, candidate_ids, [] if exact else [keyword_filter], needed)
+
+def _verify_ids(db: Session, candidate_ids: List[int], filters: list, needed: Optional[int] = None) -> List[int]:
+    """在按ID升序的候选职位上分批校验筛选条件（SQL），指定 needed 时取到前 needed 个为止"""
+    if not filters:
+        return candidate_ids[:needed]
+    
+    matched_ids = []
+    for start in range(0, len(candidate_ids), SEARCH_VERIFY_BATCH):
+        batch = candidate_ids[start:start + SEARCH_VERIFY_BATCH]
+        matched_ids.extend(
+            job_id for (job_id,) in
+            db.query(Job.id).filter(Job.id.in_(batch), *filters).order_by(Job.id)
+        )
+        if needed is not None and len(matched_ids) >= needed:
+            break
+    return matched_ids
+
+def _matched_page(
+    db: Session, job_ids: List[int], sort: str, cursor: Optional[Cursor], limit: int
+) -> Tuple[List[int], Optional[str], Optional[str]]:
+    """
+    在按ID升序的匹配职位内取一页，返回 (职位ID, 下一页游标, 上一页游标)：
+    按ID排序时直接二分查找，不查询数据库；按其他字段排序时每批匹配职位在SQL中带游标条件只取 limit+1 条，
+    再在内存中合并出当前页，不读取全部匹配职位的排序键
+    """
+    field, _ = parse_sort(sort)
+    if field == "id":
+        return keyset_page_in_ids(job_ids, sort, cursor, limit)
+    keys = {}
+    for start in range(0, len(job_ids), SEARCH_VERIFY_BATCH):
+        batch = job_ids[start:start + SEARCH_VERIFY_BATCH]
+        keys.update(keyset_keys(db.query(Job).filter(Job.id.in_(batch)), sort, cursor, limit))
+    return keyset_page_in_memory(keys, sort, cursor, limit)
+
+def _job_responses(db: Session, job_ids: List[int]) -> List[JobResponse]:
+    """按给定顺序返回职位，先取行缓存，缺少的再按主键读取并写入行缓存"""
+    version = job_query_cache.version
+    rows = job_query_cache.get_rows(job_ids)
+    missing = [job_id for job_id in job_ids if job_id not in rows]
+    if missing:
+        fetched = {job.id: JobResponse.model_validate(job) for job in _fetch_jobs(db, missing)}
+        job_query_cache.set_rows(fetched, version)
+        rows.update(fetched)
+    return [rows[job_id] for job_id in job_ids if job_id in rows]
+
+def _fetch_jobs(db: Session, job_ids: List[int]) -> List[Job]:
+    """按给定顺序读取职位"""
+    if not job_ids:
+        return []
+    jobs = {job.id: job for job in db.query(Job).filter(Job.id.in_(job_ids))}
+    return [jobs[job_id] for job_id in job_ids if job_id in jobs]
@@ -0,0 +1,123 @@
+"""
+职位多维分析立方体
+以 城市 × 类别 × 经验 × 学历 为坐标，维护稠密的职位数与薪资和数组（维度取值字典编码），
+随职位变更增量更新；任意维度组合的筛选、分组汇总都只在内存数组上完成，不访问职位表
+"""
+from typing import Dict, List, Any, Iterable, Optional
+import numpy as np
+from core.job_events import JobChangeEvent, register_job_listener
+
+# 立方体维度及对应的职位字段，顺序即数组轴的顺序
+CUBE_DIMENSIONS = {
+    "city": "city",
+    "category": "category",
+    "experience": "experience_required",
+    "education": "education_required",
+}
+
+
+class JobCube:
+    """职位数与薪资中位值之和的稠密多维数组"""
+
+    def __init__(self):
+        self.dimensions = list(CUBE_DIMENSIONS.keys())
+        self._codes: Dict[str, Dict[Any, int]] = {dimension: {} for dimension in self.dimensions}
+        self.values: Dict[str, List[Any]] = {dimension: [] for dimension in self.dimensions}
+        shape = (1,) * len(self.dimensions)
+        self.counts = np.zeros(shape, dtype=np.int64)
+        self.salary_sums = np.zeros(shape, dtype=np.int64)
+
+    def clear(self) -> None:
+        self.__init__()
+
+    def _code(self, axis: int, value: Any) -> int:
+        """取值的编码，新取值时按需扩容对应的轴（容量翻倍）"""
+        dimension = self.dimensions[axis]
+        codes = self._codes[dimension]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(codes)
+            self.values[dimension].append(value)
+            capacity = self.counts.shape[axis]
+            if code >= capacity:
+                padding = [(0, 0)] * len(self.dimensions)
+                padding[axis] = (0, capacity)
+                self.counts = np.pad(self.counts, padding)
+                self.salary_sums = np.pad(self.salary_sums, padding)
+        return code
+
+    def apply(self, records: Iterable[Dict[str, Any]], weight: int) -> None:
+        """加入（weight=1）或移除（weight=-1）一批职位"""
+        for record in records:
+            cell = tuple(
+                self._code(axis, record[field])
+                for axis, field in enumerate(CUBE_DIMENSIONS.values())
+            )
+            self.counts[cell] += weight
+            self.salary_sums[cell] += weight * ((record["salary_min"] + record["salary_max"]) // 2)
+
+    def _axis_codes(self, dimension: str, values: Optional[List[Any]]) -> np.ndarray:
+        if values is None:
+            return np.arange(len(self.values[dimension]))
+        codes = self._codes[dimension]
+        return np.array([codes[value] for value in values if value in codes], dtype=np.int64)
+
+    def query(self, filters: Dict[str, List[Any]], group_by: List[str]) -> Dict[str, Any]:
+        """
+        按 filters（维度 -> 允许的取值）筛选，再按 group_by 中的维度汇总，
+        未出现在 group_by 中的维度全部上卷
+        """
+        selector = np.ix_(*[
+            self._axis_codes(dimension, filters.get(dimension))
+            for dimension in self.dimensions
+        ])
+        counts = self.counts[selector]
+        sums = self.salary_sums[selector]
+        axis_values = [
+            [self.values[dimension][code] for code in self._axis_codes(dimension, filters.get(dimension))]
+            for dimension in self.dimensions
+        ]
+
+        rolled_up = tuple(axis for axis, dimension in enumerate(self.dimensions) if dimension not in group_by)
+        counts = counts.sum(axis=rolled_up)
+        sums = sums.sum(axis=rolled_up)
+        kept = [axis for axis in range(len(self.dimensions)) if axis not in rolled_up]
+
+        # 按 group_by 指定的顺序排列结果中的维度
+        order = [kept.index(self.dimensions.index(dimension)) for dimension in group_by]
+        counts = np.transpose(counts, order) if order else counts
+        sums = np.transpose(sums, order) if order else sums
+
+        cells = []
+        for position in zip(*np.nonzero(counts > 0)) if group_by else ():
+            cell = {
+                dimension: axis_values[self.dimensions.index(dimension)][index]
+                for dimension, index in zip(group_by, position)
+            }
+            count = int(counts[position])
+            cell["count"] = count
+            cell["avg_salary"] = int(sums[position]) // count
+            cells.append(cell)
+        cells.sort(key=lambda cell: cell["count"], reverse=True)
+
+        total_count = int(counts.sum())
+        return {
+            "filters": filters,
+            "group_by": group_by,
+            "total": {
+                "count": total_count,
+                "avg_salary": int(sums.sum()) // total_count if total_count else 0
+            },
+            "cells": cells
+        }
+
+
+job_cube = JobCube()
+
+
+@register_job_listener
+def _update_job_cube(event: JobChangeEvent) -> None:
+    if event.reset:
+        job_cube.clear()
+    job_cube.apply(event.removed, -1)
+    job_cube.apply(event.added, 1)
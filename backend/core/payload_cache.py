@@ -0,0 +1,67 @@
+"""
+图表响应缓存
+缓存分析接口序列化后的JSON字节及其内容哈希（作为ETag）。职位数据变化或生成新的分析快照时
+整体失效（只有分析结果确实变化的快照才会使其失效）；客户端携带 If-None-Match 且与当前ETag一致时，接口直接返回304，不再计算和序列化
+"""
+import hashlib
+import json
+import os
+from typing import Any, Dict, Optional
+from core.analysis_cache import VersionedResultCache
+from core.analytics_snapshot import AnalyticsSnapshot, register_snapshot_listener
+from core.job_events import JobChangeEvent, register_job_listener
+
+
+class CachedPayload:
+    """序列化后的响应体及其ETag"""
+
+    __slots__ = ("body", "etag")
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        # no-cache 表示浏览器可以缓存，但每次使用前都要用ETag向服务端确认
+        return {"ETag": self.etag, "Cache-Control": "no-cache"}
+
+
+def serialize_payload(content: Any) -> CachedPayload:
+    """按与 JSONResponse 相同的方式序列化"""
+    body = json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":")
+    ).encode("utf-8")
+    return CachedPayload(body)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """判断请求头 If-None-Match 是否与ETag匹配（弱比较）"""
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in [
+        candidate[2:] if candidate.startswith("W/") else candidate
+        for candidate in candidates
+    ]
+
+
+payload_cache = VersionedResultCache(
+    max_entries=int(os.getenv("PAYLOAD_CACHE_SIZE", "256")),
+    ttl_seconds=float(os.getenv("ANALYSIS_CACHE_TTL", "300"))
+)
+
+
+@register_job_listener
+def _invalidate_on_job_change(event: JobChangeEvent) -> None:
+    payload_cache.bump_version()
+
+
+@register_snapshot_listener
+def _invalidate_on_snapshot(snapshot: AnalyticsSnapshot) -> None:
+    if snapshot.changed:
+        payload_cache.bump_version()
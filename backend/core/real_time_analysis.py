@@ -1,102 +1,127 @@
 """
 实时数据分析服务
-基于当前数据库中的职位数据进行实时分析
+基于当前数据库中的职位数据进行实时分析。
+统计过程拆分为 累加部分结果 -> 合并 -> 生成结果 三步，启用 ANALYSIS_WORKERS 时
+按ID区间分片、在进程池中并行累加后合并，结果与单进程计算一致
 """
-import asyncio
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Iterable, Tuple
 from collections import Counter
 from database.database import SessionLocal
 from models import Job
+from core.analysis_service import ANALYSIS_ENGINE
+from core.analysis_cache import cached_analysis
+from core.rollup_service import rollup_real_time_analysis
+from core.sharded_aggregation import sharding_enabled, map_id_ranges
+from core.skill_heavy_hitters import top_skill_counts
 
+# 实时分析需要的职位字段；热门技能取自增量维护的计数器，无需读取标签
+REAL_TIME_COLUMNS = (
+    Job.city, Job.category, Job.experience_required,
+    Job.salary_min, Job.salary_max
+)
+
+def empty_partial() -> Dict[str, Any]:
+    """空的部分结果：城市/行业 -> [薪资和, 职位数]，经验计数"""
+    return {
+        "total_jobs": 0,
+        "city_salaries": {},
+        "industry_salaries": {},
+        "experience_counts": Counter()
+    }
+
+def accumulate_real_time(rows: Iterable[Tuple]) -> Dict[str, Any]:
+    """累加一批职位的部分结果"""
+    partial = empty_partial()
+    city_salaries = partial["city_salaries"]
+    industry_salaries = partial["industry_salaries"]
+    experience_counts = partial["experience_counts"]
+    
+    for city, category, experience, salary_min, salary_max in rows:
+        salary = ((salary_min or 0) + (salary_max or 0)) // 2
+        partial["total_jobs"] += 1
+        
+        city_total = city_salaries.setdefault(city, [0, 0])
+        city_total[0] += salary
+        city_total[1] += 1
+        
+        industry_total = industry_salaries.setdefault(category, [0, 0])
+        industry_total[0] += salary
+        industry_total[1] += 1
+        
+        experience_counts[experience] += 1
+    
+    return partial
+
+def merge_real_time(partials: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """按顺序合并各分片的部分结果，保持分组首次出现的顺序"""
+    merged = empty_partial()
+    for partial in partials:
+        merged["total_jobs"] += partial["total_jobs"]
+        for field in ("city_salaries", "industry_salaries"):
+            for key, (salary_sum, count) in partial[field].items():
+                total = merged[field].setdefault(key, [0, 0])
+                total[0] += salary_sum
+                total[1] += count
+        merged["experience_counts"].update(partial["experience_counts"])
+    return merged
+
+def _top_average_salaries(salaries: Dict[Any, List[int]], limit: int) -> List[Tuple[Any, int]]:
+    """按平均薪资降序取前 limit 个分组"""
+    averages = {key: salary_sum // count for key, (salary_sum, count) in salaries.items() if count}
+    return sorted(averages.items(), key=lambda x: x[1], reverse=True)[:limit]
+
+def finalize_real_time(partial: Dict[str, Any]) -> Dict[str, Any]:
+    """由合并后的部分结果生成实时分析结果"""
+    # 1. 城市薪资分析：按平均薪资排序，取前10个城市
+    sorted_cities = _top_average_salaries(partial["city_salaries"], 10)
+    
+    # 2. 经验要求分布
+    exp_counts = partial["experience_counts"]
+    
+    # 3. 行业薪资分析：按平均薪资排序，取前10个行业
+    sorted_industries = _top_average_salaries(partial["industry_salaries"], 10)
+    
+    # 4. 技能热度分析：取前10个热门技能
+    top_skills = top_skill_counts(10)
+    
+    return {
+        "total_jobs": partial["total_jobs"],
+        "cities": [city for city, _ in sorted_cities],
+        "salaries": [salary for _, salary in sorted_cities],
+        "experiences": list(exp_counts.keys()),
+        "counts": list(exp_counts.values()),
+        "industries": [industry for industry, _ in sorted_industries],
+        "industry_salaries": [salary for _, salary in sorted_industries],
+        "skills": [skill for skill, _ in top_skills],
+        "skill_counts": [count for _, count in top_skills]
+    }
+
+def aggregate_id_range(start: int, end: int) -> Dict[str, Any]:
+    """在工作进程中累加 [start, end) 区间内职位的部分结果"""
+    db = SessionLocal()
+    try:
+        rows = db.query(*REAL_TIME_COLUMNS).filter(
+            Job.id >= start, Job.id < end
+        ).order_by(Job.id).yield_per(10000)
+        return accumulate_real_time(rows)
+    finally:
+        db.close()
+
+@cached_analysis("real_time")
 async def get_real_time_analysis() -> Dict[str, Any]:
     """获取实时数据分析结果"""
     db = SessionLocal()
     try:
-        # 查询所有职位数据
-        jobs = db.query(Job).all()
-        
-        if not jobs:
-            return {
-                "total_jobs": 0,
-                "cities": [],
-                "salaries": [],
-                "experiences": [],
-                "counts": [],
-                "industries": [],
-                "industry_salaries": [],
-                "skills": [],
-                "skill_counts": []
-            }
-        
-        # 1. 城市薪资分析
-        city_salaries = {}
-        for job in jobs:
-            if job.city not in city_salaries:
-                city_salaries[job.city] = []
-            city_salaries[job.city].append((job.salary_min + job.salary_max) // 2)
-        
-        # 计算各城市平均薪资并排序
-        avg_city_salaries = {}
-        for city, salaries in city_salaries.items():
-            if salaries:
-                avg_city_salaries[city] = sum(salaries) // len(salaries)
-        
-        # 按薪资排序，取前10个城市
-        sorted_cities = sorted(avg_city_salaries.items(), key=lambda x: x[1], reverse=True)[:10]
-        cities = [city for city, _ in sorted_cities]
-        salaries = [salary for _, salary in sorted_cities]
-        
-        # 2. 经验要求分布
-        exp_counts = Counter(job.experience_required for job in jobs)
-        experiences = list(exp_counts.keys())
-        counts = list(exp_counts.values())
-        
-        # 3. 行业薪资分析
-        industry_salaries = {}
-        for job in jobs:
-            if job.category not in industry_salaries:
-                industry_salaries[job.category] = []
-            industry_salaries[job.category].append((job.salary_min + job.salary_max) // 2)
-        
-        avg_industry_salaries = {}
-        for industry, salaries in industry_salaries.items():
-            if salaries:
-                avg_industry_salaries[industry] = sum(salaries) // len(salaries)
-        
-        # 按薪资排序，取前10个行业
-        sorted_industries = sorted(avg_industry_salaries.items(), key=lambda x: x[1], reverse=True)[:10]
-        industries = [industry for industry, _ in sorted_industries]
-        industry_salaries_list = [salary for _, salary in sorted_industries]
-        
-        # 4. 技能热度分析（从职位标签中提取）
-        all_skills = []
-        for job in jobs:
-            if job.tags:
-                try:
-                    import json
-                    skills = json.loads(job.tags) if isinstance(job.tags, str) else job.tags
-                    if isinstance(skills, list):
-                        all_skills.extend(skills)
-                except:
-                    pass
+        if ANALYSIS_ENGINE == "rollup":
+            return rollup_real_time_analysis(db)
         
-        skill_counts = Counter(all_skills)
-        # 取前10个热门技能
-        top_skills = skill_counts.most_common(10)
-        skills = [skill for skill, _ in top_skills]
-        skill_counts_list = [count for _, count in top_skills]
+        if sharding_enabled():
+            partial = merge_real_time(await map_id_ranges(aggregate_id_range, db))
+        else:
+            rows = db.query(*REAL_TIME_COLUMNS).order_by(Job.id).yield_per(10000)
+            partial = accumulate_real_time(rows)
         
-        return {
-            "total_jobs": len(jobs),
-            "cities": cities,
-            "salaries": salaries,
-            "experiences": experiences,
-            "counts": counts,
-            "industries": industries,
-            "industry_salaries": industry_salaries_list,
-            "skills": skills,
-            "skill_counts": skill_counts_list
-        }
+        return finalize_real_time(partial)
         
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
@@ -0,0 +1,398 @@
+"""
+职位聚合表服务
+职位写入时在同一事务内增量维护 job_rollups（按城市、类别、经验、薪资区间、技能汇总的
+职位数、薪资和、最低/最高薪资）以及按天/周的技能趋势聚合表 skill_trend_rollups，
+分析接口只读取 O(分组数) 行聚合结果。
+扣除职位时若它是分组的最值（最低/最高薪资、最小职位ID），先把该分组的最值置空标记为过期，
+在同一事务结束前按维度批量重算（只有删除或修改了分组最值的职位时才查询 jobs 表），读取聚合表没有副作用。
+
+从 jobs 表重建并校验聚合表：
+    cd backend
+    python -m core.rollup_service rebuild
+    python -m core.rollup_service verify
+"""
+import argparse
+from bisect import bisect_right
+from collections import defaultdict
+from typing import Dict, List, Any, Iterable, Iterator, Tuple
+from sqlalchemy import String, case, func, or_, type_coerce
+from sqlalchemy.orm import Session
+from database.database import SessionLocal, engine
+from models import Job, JobRollup, SkillTrendRollup
+from core.aggregation_engine import SALARY_BUCKET_EDGES, SALARY_BUCKET_LABELS
+from core.sql_aggregation import SALARY_BUCKET, upsert
+from utils.data_utils import parse_job_tags
+from core.trend_service import (
+    add_jobs_to_trends, remove_jobs_from_trends, clear_trends,
+    build_trend_rows, verify_trends, trend_total
+)
+
+RollupKey = Tuple[str, str]
+
+# 可以直接按职位字段过滤的维度
+DIMENSION_COLUMNS = {
+    "city": Job.city,
+    "category": Job.category,
+    "experience": Job.experience_required,
+}
+
+
+def salary_bucket_label(salary_mid: int) -> str:
+    """薪资中位值所属的薪资区间"""
+    return SALARY_BUCKET_LABELS[bisect_right(SALARY_BUCKET_EDGES, salary_mid)]
+
+
+def _rollup_keys(record: Dict[str, Any], salary_mid: int) -> List[RollupKey]:
+    """一个职位所计入的全部聚合行"""
+    keys = [
+        ("total", ""),
+        ("city", record["city"] or ""),
+        ("category", record["category"] or ""),
+        ("experience", record["experience_required"] or ""),
+        ("salary_bucket", salary_bucket_label(salary_mid)),
+    ]
+    keys.extend(("skill", tag) for tag in record["tags"])
+    return keys
+
+
+def _accumulate(records: Iterable[Dict[str, Any]]) -> Dict[RollupKey, List[int]]:
+    """汇总一批职位对各聚合行的贡献：[职位数, 薪资和, 最低薪资, 最高薪资, 最小职位ID]"""
+    deltas: Dict[RollupKey, List[int]] = {}
+    for record in records:
+        salary_min = record["salary_min"]
+        salary_max = record["salary_max"]
+        salary_mid = (salary_min + salary_max) // 2
+        for key in _rollup_keys(record, salary_mid):
+            delta = deltas.get(key)
+            if delta is None:
+                deltas[key] = [1, salary_mid, salary_min, salary_max, record["id"]]
+            else:
+                delta[0] += 1
+                delta[1] += salary_mid
+                delta[2] = min(delta[2], salary_min)
+                delta[3] = max(delta[3], salary_max)
+                delta[4] = min(delta[4], record["id"])
+    return deltas
+
+
+def add_jobs_to_rollups(db: Session, records: Iterable[Dict[str, Any]]) -> None:
+    """
+    把新增职位计入聚合表，由调用方在同一事务中提交
+    records 需包含已分配的职位ID（插入后先 flush）；分组行不存在时插入、已存在时累加，由一条 upsert 语句完成
+    """
+    records = list(records)
+    for (dimension, value), (count, total, lowest, highest, first_id) in _accumulate(records).items():
+        upsert(db, JobRollup, {
+            "dimension": dimension,
+            "value": value,
+            "job_count": count,
+            "salary_sum": total,
+            "salary_min": lowest,
+            "salary_max": highest,
+            "first_job_id": first_id,
+        }, {
+            "job_count": JobRollup.job_count + count,
+            "salary_sum": JobRollup.salary_sum + total,
+            "salary_min": case((JobRollup.salary_min > lowest, lowest), else_=JobRollup.salary_min),
+            "salary_max": case((JobRollup.salary_max < highest, highest), else_=JobRollup.salary_max),
+            "first_job_id": case((JobRollup.first_job_id > first_id, first_id), else_=JobRollup.first_job_id),
+            "updated_at": func.now(),
+        })
+    add_jobs_to_trends(db, records)
+    db.flush()
+
+
+def remove_jobs_from_rollups(db: Session, records: Iterable[Dict[str, Any]]) -> None:
+    """
+    从聚合表中扣除职位，由调用方在同一事务中提交
+    records 为职位修改/删除前的取值；被扣除的职位恰好是分组最值时，只把该分组的最值置空标记为过期，
+    调用方在职位修改/删除之后、提交之前调用 refresh_stale_extremes 批量重算
+    """
+    records = list(records)
+    for (dimension, value), (count, total, lowest, highest, first_id) in _accumulate(records).items():
+        filters = (JobRollup.dimension == dimension, JobRollup.value == value)
+        db.query(JobRollup).filter(*filters).update({
+            JobRollup.job_count: JobRollup.job_count - count,
+            JobRollup.salary_sum: JobRollup.salary_sum - total,
+        }, synchronize_session=False)
+
+        row = db.query(JobRollup).filter(*filters).populate_existing().first()
+        if row is None:
+            continue
+        if row.job_count <= 0:
+            db.delete(row)
+        elif row.first_job_id is not None and (
+            lowest <= row.salary_min or highest >= row.salary_max or first_id <= row.first_job_id
+        ):
+            row.salary_min = row.salary_max = row.first_job_id = None
+    remove_jobs_from_trends(db, records)
+    db.flush()
+
+
+def _group_extremes(db: Session, dimension: str, values: List[str]) -> Dict[str, Tuple[int, int, int]]:
+    """从 jobs 表计算一个维度中若干分组的 (最低薪资, 最高薪资, 最小职位ID)，每个维度只执行一次查询"""
+    salary_min = func.coalesce(Job.salary_min, 0)
+    salary_max = func.coalesce(Job.salary_max, 0)
+    if dimension == "skill":
+        # 标签以JSON文本存储，先用LIKE缩小范围再解析确认
+        wanted = set(values)
+        rows = db.query(Job.id, Job.salary_min, Job.salary_max, Job.tags).filter(
+            or_(*[type_coerce(Job.tags, String).contains(value, autoescape=True) for value in values])
+        ).yield_per(10000)
+        extremes: Dict[str, Tuple[int, int, int]] = {}
+        for row in rows:
+            for tag in wanted.intersection(parse_job_tags(row.tags)):
+                current = extremes.get(tag)
+                candidate = (row.salary_min or 0, row.salary_max or 0, row.id)
+                extremes[tag] = candidate if current is None else (
+                    min(current[0], candidate[0]), max(current[1], candidate[1]), min(current[2], candidate[2])
+                )
+        return extremes
+
+    aggregates = (func.min(salary_min), func.max(salary_max), func.min(Job.id))
+    if dimension == "total":
+        return {"": tuple(db.query(*aggregates).one())}
+    if dimension == "salary_bucket":
+        indexes = [SALARY_BUCKET_LABELS.index(value) for value in values]
+        rows = db.query(SALARY_BUCKET, *aggregates).filter(SALARY_BUCKET.in_(indexes)).group_by(SALARY_BUCKET).all()
+        return {SALARY_BUCKET_LABELS[int(index)]: tuple(extremes) for index, *extremes in rows}
+    # 聚合行以空字符串表示字段为空
+    column = func.coalesce(DIMENSION_COLUMNS[dimension], "")
+    rows = db.query(column, *aggregates).filter(column.in_(values)).group_by(column).all()
+    return {value: tuple(extremes) for value, *extremes in rows}
+
+
+def refresh_stale_extremes(db: Session) -> int:
+    """重算被标记为过期的聚合行的最值，由调用方在同一事务中提交，返回重算的行数"""
+    # 先写入本事务中的职位变更，重算结果才不包含已删除或修改前的取值
+    db.flush()
+    stale = db.query(JobRollup).filter(JobRollup.first_job_id.is_(None)).all()
+    if not stale:
+        return 0
+    by_dimension = defaultdict(list)
+    for row in stale:
+        by_dimension[row.dimension].append(row)
+    for dimension, rows in by_dimension.items():
+        extremes = _group_extremes(db, dimension, [row.value for row in rows])
+        for row in rows:
+            lowest, highest, first_id = extremes.get(row.value, (None, None, None))
+            # 只更新仍处于过期状态的行
+            db.query(JobRollup).filter(JobRollup.id == row.id, JobRollup.first_job_id.is_(None)).update({
+                JobRollup.salary_min: lowest,
+                JobRollup.salary_max: highest,
+                JobRollup.first_job_id: first_id,
+            }, synchronize_session=False)
+    return len(stale)
+
+
+def clear_rollups(db: Session) -> None:
+    """清空聚合表，由调用方在同一事务中提交"""
+    db.query(JobRollup).delete(synchronize_session=False)
+    clear_trends(db)
+
+
+def _iter_job_records(db: Session) -> Iterator[Dict[str, Any]]:
+    """流式读取计算聚合所需的职位字段"""
+    query = db.query(
+        Job.id, Job.city, Job.category, Job.experience_required,
+        Job.salary_min, Job.salary_max, Job.tags
+    ).yield_per(10000)
+    for row in query:
+        yield {
+            "id": row.id,
+            "city": row.city,
+            "category": row.category,
+            "experience_required": row.experience_required,
+            "salary_min": row.salary_min or 0,
+            "salary_max": row.salary_max or 0,
+            "tags": parse_job_tags(row.tags)
+        }
+
+
+def rebuild_rollups(db: Session) -> int:
+    """从 jobs 表重新生成聚合表，返回聚合行数"""
+    deltas = _accumulate(_iter_job_records(db))
+    clear_rollups(db)
+    db.add_all([
+        JobRollup(
+            dimension=dimension,
+            value=value,
+            job_count=count,
+            salary_sum=total,
+            salary_min=lowest,
+            salary_max=highest,
+            first_job_id=first_id
+        )
+        for (dimension, value), (count, total, lowest, highest, first_id) in deltas.items()
+    ])
+    trend_rows = build_trend_rows(db)
+    db.add_all(trend_rows)
+    db.commit()
+    return len(deltas) + len(trend_rows)
+
+
+def verify_rollups(db: Session) -> List[str]:
+    """对比聚合表与 jobs 表的实际统计，返回不一致的聚合行说明（最值仍为过期状态的行也会列出）"""
+    expected = _accumulate(_iter_job_records(db))
+    actual = {
+        (row.dimension, row.value): [row.job_count, row.salary_sum, row.salary_min, row.salary_max, row.first_job_id]
+        for row in db.query(JobRollup).all()
+    }
+
+    problems = []
+    for key in sorted(expected.keys() | actual.keys()):
+        if expected.get(key) != actual.get(key):
+            dimension, value = key
+            problems.append(f"{dimension}={value}: 期望 {expected.get(key)}，实际 {actual.get(key)}")
+    problems.extend(verify_trends(db))
+    return problems
+
+
+def create_rollup_tables() -> None:
+    """创建聚合表（已存在时跳过）"""
+    JobRollup.__table__.create(bind=engine, checkfirst=True)
+    SkillTrendRollup.__table__.create(bind=engine, checkfirst=True)
+
+
+def sync_rollups() -> None:
+    """启动时确保聚合表存在，并在其职位总数与 jobs 表不一致时重建，一致时只重算过期的最值"""
+    create_rollup_tables()
+    db = SessionLocal()
+    try:
+        rollup_total = db.query(JobRollup.job_count).filter(JobRollup.dimension == "total").scalar() or 0
+        job_total = db.query(func.count(Job.id)).scalar() or 0
+        # 没有创建时间的职位不计入趋势聚合表
+        dated_total = db.query(func.count(Job.id)).filter(Job.created_at.isnot(None)).scalar() or 0
+        if rollup_total != job_total or trend_total(db) != dated_total:
+            print(f"聚合表职位数 {rollup_total} 与职位表 {job_total} 不一致，正在重建...")
+            rebuild_rollups(db)
+        elif refresh_stale_extremes(db):
+            db.commit()
+    finally:
+        db.close()
+
+
+def _load_rollups(db: Session) -> Dict[str, List[JobRollup]]:
+    """读取全部聚合行，按维度分组并保持分组首次出现顺序"""
+    rollups = defaultdict(list)
+    for row in db.query(JobRollup).order_by(JobRollup.first_job_id).all():
+        rollups[row.dimension].append(row)
+    return rollups
+
+
+def _group_value(row: JobRollup) -> Any:
+    """分组取值：聚合表以空字符串存储缺失的城市/类别/经验，读取时还原为 None，与其他分析引擎一致"""
+    return row.value or None
+
+
+def _counts(rows: List[JobRollup]) -> Dict[Any, int]:
+    return {_group_value(row): row.job_count for row in rows}
+
+
+def _averages(rows: List[JobRollup]) -> Dict[Any, int]:
+    return {_group_value(row): row.salary_sum // row.job_count for row in rows}
+
+
+def _top(scores: Dict[Any, int], limit: int) -> List[Tuple[Any, int]]:
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+
+def rollup_salary_analysis(db: Session) -> Dict[str, Any]:
+    """薪资分析（读取聚合表）"""
+    rollups = _load_rollups(db)
+    total = rollups["total"][0] if rollups["total"] else None
+
+    if total is None:
+        return {
+            "average_salary": 0,
+            "salary_distribution": {},
+            "top_paying_cities": [],
+            "salary_by_experience": {},
+            "total_positions": 0
+        }
+
+    salary_ranges = dict.fromkeys(SALARY_BUCKET_LABELS, 0)
+    for row in rollups["salary_bucket"]:
+        salary_ranges[row.value] = row.job_count
+
+    return {
+        "average_salary": total.salary_sum // total.job_count,
+        "salary_distribution": salary_ranges,
+        "top_paying_cities": [
+            {"city": city, "avg_salary": salary} for city, salary in _top(_averages(rollups["city"]), 5)
+        ],
+        "salary_by_experience": _averages(rollups["experience"]),
+        "total_positions": total.job_count
+    }
+
+
+def rollup_city_analysis(db: Session) -> Dict[str, Any]:
+    """城市分析（读取聚合表）"""
+    rows = _load_rollups(db)["city"]
+    counts = _counts(rows)
+    return {
+        "city_job_distribution": dict(_top(counts, 20)),
+        "city_average_salary": _averages(rows),
+        "top_job_cities": dict(_top(counts, 10))
+    }
+
+
+def rollup_experience_analysis(db: Session) -> Dict[str, Any]:
+    """经验要求分析（读取聚合表）"""
+    rows = _load_rollups(db)["experience"]
+    return {
+        "experience_distribution": _counts(rows),
+        "average_salary_by_experience": _averages(rows)
+    }
+
+
+def rollup_industry_analysis(db: Session) -> Dict[str, Any]:
+    """行业分析（读取聚合表）"""
+    rows = _load_rollups(db)["category"]
+    return {
+        "category_distribution": dict(_top(_counts(rows), 20)),
+        "average_salary_by_category": _averages(rows)
+    }
+
+
+def rollup_real_time_analysis(db: Session) -> Dict[str, Any]:
+    """实时数据分析（读取聚合表）"""
+    rollups = _load_rollups(db)
+    total_jobs = rollups["total"][0].job_count if rollups["total"] else 0
+
+    top_cities = _top(_averages(rollups["city"]), 10)
+    top_industries = _top(_averages(rollups["category"]), 10)
+    top_skills = _top({row.value: row.job_count for row in rollups["skill"]}, 10)
+
+    return {
+        "total_jobs": total_jobs,
+        "cities": [city for city, _ in top_cities],
+        "salaries": [salary for _, salary in top_cities],
+        "experiences": [_group_value(row) for row in rollups["experience"]],
+        "counts": [row.job_count for row in rollups["experience"]],
+        "industries": [industry for industry, _ in top_industries],
+        "industry_salaries": [salary for _, salary in top_industries],
+        "skills": [skill for skill, _ in top_skills],
+        "skill_counts": [count for _, count in top_skills]
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="职位聚合表维护")
+    parser.add_argument("command", choices=["rebuild", "verify"], help="rebuild: 从职位表重建；verify: 校验一致性")
+    args = parser.parse_args()
+
+    create_rollup_tables()
+    session = SessionLocal()
+    try:
+        if args.command == "rebuild":
+            print(f"聚合表重建完成，共 {rebuild_rollups(session)} 行")
+        problems = verify_rollups(session)
+        if problems:
+            print(f"聚合表与职位表不一致（{len(problems)} 处）：")
+            for problem in problems:
+                print(f"  {problem}")
+            raise SystemExit(1)
+        print("聚合表与职位表一致")
+    finally:
+        session.close()
@@ -0,0 +1,201 @@
+"""
+薪资区间索引
+把职位的薪资范围 [salary_min, salary_max] 分别按最低薪资、最高薪资排序存为 numpy 数组，
+每个数组同时保存对应的职位ID和另一端薪资。区间查询（与 [low, high] 有交集、或完全落在其中）
+对两个排序数组各做二分查找得到两个连续片段，只在较短的片段上检查另一端条件，
+开销为 O(log n + 较短片段的长度)，不再需要两个条件都能用上的数据库索引。
+职位变更先记入待合并集合，查询时对其单独判断；待合并的职位较多时，按二分查找的位置从排序数组中
+删除这些职位的旧值、插入新值（O(n) 的数组移动，不重新排序）
+"""
+from typing import Dict, List, Any, Iterable, Optional, Set, Tuple
+import numpy as np
+from core.job_events import JobChangeEvent, register_job_listener
+
+# 待合并的职位数超过 职位总数 / MERGE_RATIO（限制在 [MERGE_MIN_PENDING, MERGE_MAX_PENDING] 内）时合并进排序数组：
+# 职位少时合并很快，职位多时也不让每次查询逐个判断的待合并职位过多
+MERGE_RATIO = 16
+MERGE_MIN_PENDING = 64
+MERGE_MAX_PENDING = 1024
+
+_NO_LIMIT = np.iinfo(np.int64).max
+
+
+class SalaryIntervalIndex:
+    """职位薪资范围的区间索引，随职位变更增量更新"""
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self) -> None:
+        # 职位ID -> (最低薪资, 最高薪资)，始终与职位表一致
+        self._salaries: Dict[int, Tuple[int, int]] = {}
+        # 上次合并后新增、修改或删除过的职位ID，排序数组中这些职位的取值可能已过期
+        self._pending: Set[int] = set()
+        self._build()
+
+    def _build(self) -> None:
+        count = len(self._salaries)
+        ids = np.fromiter(self._salaries.keys(), dtype=np.int64, count=count)
+        bounds = np.fromiter(
+            (value for pair in self._salaries.values() for value in pair), dtype=np.int64, count=2 * count
+        ).reshape(count, 2)
+        salary_min, salary_max = bounds[:, 0], bounds[:, 1]
+
+        by_min = np.argsort(salary_min, kind="stable")
+        self._min_sorted = salary_min[by_min]
+        self._min_ids = ids[by_min]
+        self._min_other = salary_max[by_min]
+
+        by_max = np.argsort(salary_max, kind="stable")
+        self._max_sorted = salary_max[by_max]
+        self._max_ids = ids[by_max]
+        self._max_other = salary_min[by_max]
+
+        self._mid_sorted = np.sort((salary_min + salary_max) // 2)
+        self._pending.clear()
+
+    def _pending_current(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """待合并职位中仍然存在的职位的 (职位ID, 最低薪资, 最高薪资)"""
+        current = [job_id for job_id in self._pending if job_id in self._salaries]
+        ids = np.array(current, dtype=np.int64)
+        bounds = np.array([self._salaries[job_id] for job_id in current], dtype=np.int64).reshape(len(current), 2)
+        return ids, bounds[:, 0], bounds[:, 1]
+
+    def _merge(self) -> None:
+        """把待合并的职位并入排序数组：删除其旧值，按二分查找的位置插入新值"""
+        pending = np.fromiter(self._pending, dtype=np.int64, count=len(self._pending))
+        stale = np.isin(self._min_ids, pending)
+        stale_mids = (self._min_sorted[stale] + self._min_other[stale]) // 2
+        ids, salary_min, salary_max = self._pending_current()
+
+        self._min_sorted, self._min_ids, self._min_other = _insert_sorted(
+            *(array[~stale] for array in (self._min_sorted, self._min_ids, self._min_other)),
+            salary_min, ids, salary_max
+        )
+        stale = np.isin(self._max_ids, pending)
+        self._max_sorted, self._max_ids, self._max_other = _insert_sorted(
+            *(array[~stale] for array in (self._max_sorted, self._max_ids, self._max_other)),
+            salary_max, ids, salary_min
+        )
+        mids = _delete_sorted(self._mid_sorted, stale_mids)
+        new_mids = np.sort((salary_min + salary_max) // 2)
+        self._mid_sorted = np.insert(mids, np.searchsorted(mids, new_mids, side="right"), new_mids)
+        self._pending.clear()
+
+    def add(self, records: Iterable[Dict[str, Any]]) -> None:
+        for record in records:
+            self._salaries[record["id"]] = (record["salary_min"], record["salary_max"])
+            self._pending.add(record["id"])
+
+    def remove(self, records: Iterable[Dict[str, Any]]) -> None:
+        for record in records:
+            self._salaries.pop(record["id"], None)
+            self._pending.add(record["id"])
+
+    def _refresh(self, force: bool = False) -> None:
+        threshold = min(MERGE_MAX_PENDING, max(MERGE_MIN_PENDING, len(self._salaries) // MERGE_RATIO))
+        if (force and self._pending) or len(self._pending) > threshold:
+            self._merge()
+
+    def __len__(self) -> int:
+        return len(self._salaries)
+
+    def select(
+        self,
+        min_low: Optional[int] = None,
+        min_high: Optional[int] = None,
+        max_low: Optional[int] = None,
+        max_high: Optional[int] = None
+    ) -> np.ndarray:
+        """
+        最低薪资在 [min_low, min_high]、最高薪资在 [max_low, max_high] 内的职位ID（升序），
+        边界为 None 表示不限。只在两个片段中较短的一个上检查另一端条件，开销与较短片段的长度成正比；
+        两端条件都很宽（如与中间一段薪资有交集）时两个片段都接近全部职位，即使结果很少也退化为 O(n)
+        """
+        self._refresh()
+        min_low = -_NO_LIMIT if min_low is None else min_low
+        min_high = _NO_LIMIT if min_high is None else min_high
+        max_low = -_NO_LIMIT if max_low is None else max_low
+        max_high = _NO_LIMIT if max_high is None else max_high
+
+        min_start = np.searchsorted(self._min_sorted, min_low, side="left")
+        min_end = np.searchsorted(self._min_sorted, min_high, side="right")
+        max_start = np.searchsorted(self._max_sorted, max_low, side="left")
+        max_end = np.searchsorted(self._max_sorted, max_high, side="right")
+
+        # 在较短的片段上检查另一端的条件
+        if min_end - min_start <= max_end - max_start:
+            others = self._min_other[min_start:min_end]
+            ids = self._min_ids[min_start:min_end][(others >= max_low) & (others <= max_high)]
+        else:
+            others = self._max_other[max_start:max_end]
+            ids = self._max_ids[max_start:max_end][(others >= min_low) & (others <= min_high)]
+
+        if self._pending:
+            pending = np.fromiter(self._pending, dtype=np.int64, count=len(self._pending))
+            ids = ids[~np.isin(ids, pending)]
+            current, salary_min, salary_max = self._pending_current()
+            matched = (salary_min >= min_low) & (salary_min <= min_high) & (salary_max >= max_low) & (salary_max <= max_high)
+            ids = np.concatenate([ids, current[matched]])
+        return np.sort(ids)
+
+    def overlapping(self, low: Optional[int] = None, high: Optional[int] = None) -> np.ndarray:
+        """薪资范围与 [low, high] 有交集的职位：最高薪资 >= low 且 最低薪资 <= high"""
+        return self.select(min_high=high, max_low=low)
+
+    def within(self, low: Optional[int] = None, high: Optional[int] = None) -> np.ndarray:
+        """薪资范围完全落在 [low, high] 内的职位：最低薪资 >= low 且 最高薪资 <= high"""
+        return self.select(min_low=low, max_high=high)
+
+    def highest_paid(self, limit: int) -> List[int]:
+        """
+        最高薪资最高的 limit 个职位ID（降序）：取排序数组末尾 limit + 待合并职位数 个职位，
+        去掉待合并的职位后与待合并职位的当前取值合并，不需要先合并排序数组
+        """
+        if not self._pending:
+            return self._max_ids[::-1][:limit].tolist()
+        pending = np.fromiter(self._pending, dtype=np.int64, count=len(self._pending))
+        start = max(len(self._max_ids) - limit - len(pending), 0)
+        tail_ids, tail_salaries = self._max_ids[start:], self._max_sorted[start:]
+        keep = ~np.isin(tail_ids, pending)
+        current, _, salary_max = self._pending_current()
+        ids = np.concatenate([tail_ids[keep], current])
+        salaries = np.concatenate([tail_salaries[keep], salary_max])
+        order = np.argsort(salaries, kind="stable")[::-1][:limit]
+        return ids[order].tolist()
+
+    def sorted_bounds(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """排序后的 (最低薪资, 最高薪资, 薪资中位值) 数组，供直方图等统计直接二分查找；有待合并职位时先合并"""
+        self._refresh(force=True)
+        return self._min_sorted, self._max_sorted, self._mid_sorted
+
+
+def _insert_sorted(keys: np.ndarray, ids: np.ndarray, others: np.ndarray,
+                   new_keys: np.ndarray, new_ids: np.ndarray, new_others: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """把新的 (排序键, 职位ID, 另一端薪资) 按排序键插入已排序的数组"""
+    order = np.argsort(new_keys, kind="stable")
+    positions = np.searchsorted(keys, new_keys[order], side="right")
+    return (
+        np.insert(keys, positions, new_keys[order]),
+        np.insert(ids, positions, new_ids[order]),
+        np.insert(others, positions, new_others[order]),
+    )
+
+
+def _delete_sorted(values: np.ndarray, removed: np.ndarray) -> np.ndarray:
+    """从已排序的数组中各删除一次 removed 中的取值（removed 中的取值都在数组中）"""
+    removed = np.sort(removed)
+    # 相同取值依次占用其后的位置
+    offsets = np.arange(len(removed)) - np.searchsorted(removed, removed, side="left")
+    return np.delete(values, np.searchsorted(values, removed, side="left") + offsets)
+
+
+salary_index = SalaryIntervalIndex()
+
+
+@register_job_listener
+def _update_salary_index(event: JobChangeEvent) -> None:
+    if event.reset:
+        salary_index.clear()
+    salary_index.remove(event.removed)
+    salary_index.add(event.added)
@@ -0,0 +1,313 @@
+"""
+技能薪资溢价模型
+以职位薪资中位值的对数为因变量，对技能（Job.tags）、城市、经验要求的 one-hot 特征拟合岭回归：
+    log(薪资中位值) = 截距 + Σ 技能系数 + 城市系数 + 经验系数
+技能溢价 = exp(技能系数) - 1，即在城市、经验相同的情况下要求该技能的职位薪资高出的比例。
+设计矩阵以稀疏矩阵存储，中心化后用共轭梯度法求解正规方程 (XᵀX + αI)β = Xᵀy，截距不参与正则化。
+职位数据变化后由后台任务重新拟合，系数写入 salary_model_coefficients 表；
+接口直接读取内存中的模型，查询单个技能为常数时间
+"""
+import asyncio
+import math
+import os
+import re
+from datetime import datetime
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import LinearOperator, cg
+from sqlalchemy.orm import Session
+from database.database import SessionLocal, engine
+from models import Job, SalaryModelCoefficient
+from core.job_events import JobChangeEvent, register_job_listener
+from utils.data_utils import parse_job_tags
+
+# 岭回归正则化强度，越大系数越向0收缩，出现次数少的技能受影响越明显
+SALARY_MODEL_ALPHA = float(os.getenv("SALARY_MODEL_ALPHA", "1.0"))
+
+# 职位数据变化后重新拟合的最短间隔（秒），小于等于0时不启动后台拟合
+SALARY_MODEL_REFIT_INTERVAL = float(os.getenv("SALARY_MODEL_REFIT_INTERVAL", "300"))
+
+# 出现次数低于该值的技能不作为特征，其影响归入截距
+MIN_SKILL_SUPPORT = 3
+
+# 参与拟合的技能特征上限（按出现次数取前若干个）
+MAX_SKILL_FEATURES = 2000
+
+FEATURE_TYPES = ("skill", "city", "experience")
+
+FeatureKey = Tuple[str, str]
+
+
+class SalaryModel:
+    """拟合完成的模型：截距、各特征的系数及出现次数"""
+
+    def __init__(self, intercept: float, coefficients: Dict[FeatureKey, Tuple[float, int]],
+                 sample_size: int, r_squared: Optional[float], alpha: float, fitted_at: datetime):
+        self.intercept = intercept
+        self.coefficients = coefficients
+        self.sample_size = sample_size
+        self.r_squared = r_squared
+        self.alpha = alpha
+        self.fitted_at = fitted_at
+        # 技能 -> 溢价信息，以及按溢价降序的技能列表，查询时无需再计算
+        self.premiums: Dict[str, Dict[str, Any]] = {
+            value: _premium_item(value, coefficient, support)
+            for (feature_type, value), (coefficient, support) in coefficients.items()
+            if feature_type == "skill"
+        }
+        self.ranking: List[Dict[str, Any]] = sorted(
+            self.premiums.values(), key=lambda item: (-item["coefficient"], item["skill"])
+        )
+
+    def coefficient(self, feature_type: str, value: Optional[str]) -> float:
+        if value is None:
+            return 0.0
+        return self.coefficients.get((feature_type, value), (0.0, 0))[0]
+
+    def experience_levels(self) -> List[str]:
+        return [value for feature_type, value in self.coefficients if feature_type == "experience"]
+
+    def predict(self, skills: Iterable[str], city: Optional[str], experience: Optional[str]) -> float:
+        """预测薪资中位值；未出现在模型中的技能、城市、经验取基准值"""
+        log_salary = self.intercept
+        log_salary += sum(self.coefficient("skill", skill) for skill in dict.fromkeys(skills))
+        log_salary += self.coefficient("city", city)
+        log_salary += self.coefficient("experience", experience)
+        return math.exp(log_salary)
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "sample_size": self.sample_size,
+            "skill_features": len(self.premiums),
+            "r_squared": self.r_squared,
+            "alpha": self.alpha,
+            "fitted_at": self.fitted_at.isoformat()
+        }
+
+
+def _premium_item(skill: str, coefficient: float, support: int) -> Dict[str, Any]:
+    return {
+        "skill": skill,
+        "premium": round(math.expm1(coefficient), 4),
+        "coefficient": round(coefficient, 6),
+        "job_count": support
+    }
+
+
+def _feature_values(city: Optional[str], experience: Optional[str], tags: Any) -> List[FeatureKey]:
+    """职位的全部候选特征"""
+    features = [("skill", skill) for skill in dict.fromkeys(parse_job_tags(tags))]
+    if city:
+        features.append(("city", city))
+    if experience:
+        features.append(("experience", experience))
+    return features
+
+
+def fit_salary_model(rows: List[Tuple], alpha: float = SALARY_MODEL_ALPHA) -> Optional[SalaryModel]:
+    """
+    用职位行 (city, experience_required, tags, salary_min, salary_max) 拟合模型，
+    没有有效薪资的职位不参与拟合；没有可用数据时返回 None
+    """
+    targets = []
+    job_features = []
+    support: Dict[FeatureKey, int] = {}
+    for city, experience, tags, salary_min, salary_max in rows:
+        salary_mid = ((salary_min or 0) + (salary_max or 0)) / 2
+        if salary_mid <= 0:
+            continue
+        features = _feature_values(city, experience, tags)
+        for feature in features:
+            support[feature] = support.get(feature, 0) + 1
+        targets.append(math.log(salary_mid))
+        job_features.append(features)
+
+    if not targets:
+        return None
+
+    skills = sorted(
+        (feature for feature in support if feature[0] == "skill" and support[feature] >= MIN_SKILL_SUPPORT),
+        key=lambda feature: (-support[feature], feature[1])
+    )[:MAX_SKILL_FEATURES]
+    others = sorted(feature for feature in support if feature[0] != "skill")
+    columns = {feature: index for index, feature in enumerate(skills + others)}
+
+    # 按行构建 CSR 稀疏设计矩阵，所有非零值均为1
+    indices = []
+    indptr = [0]
+    for features in job_features:
+        indices.extend(columns[feature] for feature in features if feature in columns)
+        indptr.append(len(indices))
+    n, p = len(targets), len(columns)
+    X = sparse.csr_matrix(
+        (np.ones(len(indices)), np.array(indices, dtype=np.int64), np.array(indptr, dtype=np.int64)),
+        shape=(n, p)
+    )
+    y = np.array(targets)
+    y_mean = y.mean()
+
+    if p:
+        # 中心化后求解，截距不受正则化影响；中心化以秩1修正表示，设计矩阵保持稀疏
+        means = np.asarray(X.mean(axis=0)).ravel()
+        gram = LinearOperator(
+            (p, p),
+            matvec=lambda v: X.T @ (X @ v) - n * means * (means @ v) + alpha * v,
+            dtype=np.float64
+        )
+        rhs = X.T @ y - n * means * y_mean
+        beta, status = cg(gram, rhs, maxiter=max(100, 10 * p))
+        if status != 0:
+            print(f"薪资模型求解未完全收敛（status={status}），使用当前近似解")
+        intercept = float(y_mean - means @ beta)
+        residuals = y - (X @ beta + intercept)
+    else:
+        beta = np.zeros(0)
+        intercept = float(y_mean)
+        residuals = y - y_mean
+
+    total_variance = float(((y - y_mean) ** 2).sum())
+    r_squared = round(1 - float((residuals ** 2).sum()) / total_variance, 4) if total_variance > 0 else None
+
+    coefficients = {feature: (float(beta[index]), support[feature]) for feature, index in columns.items()}
+    return SalaryModel(intercept, coefficients, n, r_squared, alpha, datetime.now())
+
+
+def _query_training_rows(db: Session) -> List[Tuple]:
+    return db.query(
+        Job.city, Job.experience_required, Job.tags, Job.salary_min, Job.salary_max
+    ).all()
+
+
+def save_salary_model(db: Session, model: SalaryModel) -> None:
+    """用新模型整体替换已保存的系数；截距以 intercept 类型保存，其出现次数为样本数"""
+    db.query(SalaryModelCoefficient).delete(synchronize_session=False)
+    db.add(SalaryModelCoefficient(
+        feature_type="intercept", feature_value="", coefficient=model.intercept,
+        support=model.sample_size, fitted_at=model.fitted_at
+    ))
+    db.add_all(
+        SalaryModelCoefficient(
+            feature_type=feature_type, feature_value=value, coefficient=coefficient,
+            support=support, fitted_at=model.fitted_at
+        )
+        for (feature_type, value), (coefficient, support) in model.coefficients.items()
+    )
+    db.commit()
+
+
+def load_salary_model(db: Session) -> Optional[SalaryModel]:
+    """读取已保存的系数，没有时返回 None"""
+    rows = db.query(SalaryModelCoefficient).all()
+    intercept_row = next((row for row in rows if row.feature_type == "intercept"), None)
+    if intercept_row is None:
+        return None
+    coefficients = {
+        (row.feature_type, row.feature_value): (row.coefficient, row.support)
+        for row in rows if row.feature_type in FEATURE_TYPES
+    }
+    # 已保存的模型不记录拟合优度和正则化强度
+    return SalaryModel(
+        intercept_row.coefficient, coefficients, intercept_row.support,
+        None, SALARY_MODEL_ALPHA, intercept_row.fitted_at
+    )
+
+
+_model: Optional[SalaryModel] = None
+_stale = True
+
+
+def get_salary_model() -> Optional[SalaryModel]:
+    return _model
+
+
+@register_job_listener
+def _mark_model_stale(event: JobChangeEvent) -> None:
+    global _stale
+    _stale = True
+
+
+def create_salary_model_table() -> None:
+    """创建系数表（已存在时跳过）"""
+    SalaryModelCoefficient.__table__.create(bind=engine, checkfirst=True)
+
+
+def refit_salary_model() -> Optional[SalaryModel]:
+    """从职位表重新拟合模型，保存系数并替换内存中的模型"""
+    global _model, _stale
+    _stale = False
+    db = SessionLocal()
+    try:
+        model = fit_salary_model(_query_training_rows(db))
+        if model is not None:
+            save_salary_model(db, model)
+            _model = model
+        return model
+    except Exception:
+        db.rollback()
+        _stale = True
+        raise
+    finally:
+        db.close()
+
+
+def load_persisted_salary_model() -> Optional[SalaryModel]:
+    """启动时读取已保存的系数，后台任务重新拟合前先用它提供服务"""
+    global _model
+    create_salary_model_table()
+    db = SessionLocal()
+    try:
+        _model = load_salary_model(db)
+    finally:
+        db.close()
+    return _model
+
+
+async def run_salary_model_refitter(interval: float = SALARY_MODEL_REFIT_INTERVAL) -> None:
+    """后台拟合循环：启动时拟合一次，之后每隔 interval 秒检查职位数据是否变化，变化时重新拟合"""
+    while True:
+        if _stale:
+            try:
+                model = await asyncio.to_thread(refit_salary_model)
+                if model is not None:
+                    print(f"薪资模型已重新拟合，样本 {model.sample_size} 条，R²={model.r_squared}")
+            except Exception as e:
+                print(f"薪资模型拟合失败: {e}")
+        await asyncio.sleep(interval)
+
+
+_EXPERIENCE_NUMBERS = re.compile(r"\d+")
+
+
+def experience_level_for_years(years: int, levels: List[str]) -> Optional[str]:
+    """把工作年限映射到模型中的经验要求取值（如 3 年 -> "3-5年"），无法匹配时返回 None"""
+    for level in levels:
+        numbers = [int(number) for number in _EXPERIENCE_NUMBERS.findall(level)]
+        if len(numbers) == 2 and numbers[0] <= years < numbers[1]:
+            return level
+        if len(numbers) == 1 and "以上" in level and years >= numbers[0]:
+            return level
+    # 超出所有区间时按"经验不限"处理
+    return next((level for level in levels if "不限" in level), None)
+
+
+def get_skill_premiums(skill: Optional[str] = None, limit: int = 20) -> Optional[Dict[str, Any]]:
+    """技能薪资溢价；指定 skill 时只返回该技能。模型尚未拟合时返回 None"""
+    model = _model
+    if model is None:
+        return None
+    result = {"model": model.info()}
+    if skill is not None:
+        result["skill"] = model.premiums.get(skill)
+    else:
+        result["premiums"] = model.ranking[:limit]
+    return result
+
+
+if __name__ == "__main__":
+    create_salary_model_table()
+    fitted = refit_salary_model()
+    if fitted is None:
+        print("没有可用于拟合的职位薪资数据")
+    else:
+        print(f"薪资模型拟合完成：{fitted.info()}")
@@ -0,0 +1,137 @@
+"""
+薪资分位数草图
+使用对数等比分箱的固定直方图（与 DDSketch 同样的分箱方式）估计薪资分位数：
+每个箱的上下界之比固定为 GAMMA，分位数的相对误差不超过 (GAMMA-1)/(GAMMA+1)（约1%）。
+草图支持增量加入/移除职位，并可直接按箱相加合并多个分片的结果。
+"""
+import math
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+import numpy as np
+from core.job_events import JobChangeEvent, register_job_listener
+
+GAMMA = 1.02
+MIN_SALARY = 1000          # 低于该值的薪资统一计入第一个箱
+MAX_SALARY = 10_000_000    # 高于该值的薪资统一计入最后一个箱
+_LOG_GAMMA = math.log(GAMMA)
+_OFFSET = math.floor(math.log(MIN_SALARY) / _LOG_GAMMA)
+NUM_BINS = math.ceil(math.log(MAX_SALARY) / _LOG_GAMMA) - _OFFSET + 1
+
+DEFAULT_QUANTILES = {"p25": 0.25, "median": 0.5, "p75": 0.75, "p90": 0.9}
+
+# 维护分位数草图的维度及对应的职位字段
+SKETCH_DIMENSIONS = {
+    "city": "city",
+    "category": "category",
+    "experience": "experience_required",
+}
+
+
+def _bin_index(salary: float) -> int:
+    salary = min(max(salary, MIN_SALARY), MAX_SALARY)
+    return math.ceil(math.log(salary) / _LOG_GAMMA) - _OFFSET
+
+
+def _bin_value(index: int) -> float:
+    """箱内代表值：箱上下界的调和中点，使相对误差对称"""
+    upper = GAMMA ** (index + _OFFSET)
+    return 2 * upper / (GAMMA + 1)
+
+
+class SalarySketch:
+    """可合并、可增删的薪资分位数草图"""
+
+    def __init__(self, counts: Optional[np.ndarray] = None):
+        self.counts = counts if counts is not None else np.zeros(NUM_BINS, dtype=np.int64)
+
+    @classmethod
+    def from_salaries(cls, salaries: np.ndarray) -> "SalarySketch":
+        """由一组薪资批量构建"""
+        clipped = np.clip(np.asarray(salaries, dtype=np.float64), MIN_SALARY, MAX_SALARY)
+        indexes = np.ceil(np.log(clipped) / _LOG_GAMMA).astype(np.int64) - _OFFSET
+        return cls(np.bincount(indexes, minlength=NUM_BINS).astype(np.int64))
+
+    @property
+    def count(self) -> int:
+        return int(self.counts.sum())
+
+    def add(self, salary: float, weight: int = 1) -> None:
+        self.counts[_bin_index(salary)] += weight
+
+    def remove(self, salary: float) -> None:
+        self.add(salary, -1)
+
+    def merge(self, other: "SalarySketch") -> "SalarySketch":
+        """合并另一个草图（如其他分片），就地累加"""
+        self.counts += other.counts
+        return self
+
+    def quantile(self, q: float) -> Optional[int]:
+        """估计第 q 分位数（0 <= q <= 1），草图为空时返回 None"""
+        total = self.count
+        if total <= 0:
+            return None
+        rank = q * (total - 1)
+        index = int(np.searchsorted(np.cumsum(self.counts), rank, side="right"))
+        return int(round(_bin_value(index)))
+
+    def summary(self, quantiles: Dict[str, float] = DEFAULT_QUANTILES) -> Dict[str, Any]:
+        result = {"count": self.count}
+        result.update({name: self.quantile(q) for name, q in quantiles.items()})
+        return result
+
+
+class SalarySketchRegistry:
+    """按 (维度, 取值) 维护的薪资草图集合，随职位变更增量更新"""
+
+    def __init__(self):
+        self._sketches: Dict[Tuple[str, Any], SalarySketch] = {}
+
+    def _keys(self, record: Dict[str, Any]) -> List[Tuple[str, Any]]:
+        keys = [("total", "")]
+        keys.extend((dimension, record[field]) for dimension, field in SKETCH_DIMENSIONS.items())
+        return keys
+
+    def apply(self, records: Iterable[Dict[str, Any]], weight: int) -> None:
+        for record in records:
+            salary_mid = (record["salary_min"] + record["salary_max"]) // 2
+            for key in self._keys(record):
+                sketch = self._sketches.get(key)
+                if sketch is None:
+                    sketch = self._sketches[key] = SalarySketch()
+                sketch.add(salary_mid, weight)
+
+    def clear(self) -> None:
+        self._sketches.clear()
+
+    def get(self, dimension: str, value: Any = "") -> Optional[SalarySketch]:
+        return self._sketches.get((dimension, value))
+
+    def summaries(self, dimension: str) -> Dict[Any, Dict[str, Any]]:
+        """某维度下各取值的分位数统计，忽略已没有职位的取值"""
+        return {
+            value: sketch.summary()
+            for (sketch_dimension, value), sketch in self._sketches.items()
+            if sketch_dimension == dimension and sketch.count > 0
+        }
+
+
+salary_sketches = SalarySketchRegistry()
+
+
+@register_job_listener
+def _update_salary_sketches(event: JobChangeEvent) -> None:
+    if event.reset:
+        salary_sketches.clear()
+    salary_sketches.apply(event.removed, -1)
+    salary_sketches.apply(event.added, 1)
+
+
+def get_salary_percentiles(dimension: str) -> Dict[str, Any]:
+    """按维度返回薪资中位数及 p25/p75/p90"""
+    total = salary_sketches.get("total")
+    return {
+        "dimension": dimension,
+        "overall": total.summary() if total else SalarySketch().summary(),
+        "percentiles": salary_sketches.summaries(dimension),
+        "relative_error": round((GAMMA - 1) / (GAMMA + 1), 4)
+    }
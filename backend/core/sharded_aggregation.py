@@ -0,0 +1,75 @@
+"""
+分片并行聚合
+把职位表按ID区间切分为多个分片，在进程池中并行聚合，每个工作进程使用自己的数据库连接；
+各分片返回可合并的部分结果（计数、薪资和、标签计数等），由调用方按分片顺序合并。
+ANALYSIS_WORKERS 为进程数，默认为0（不启用，在当前进程中计算）
+"""
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Any, Callable, Optional, Tuple
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from database.database import engine
+from models import Job
+
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", "0"))
+
+# 每个进程分到的分片数，分片多于进程数可以平衡ID空洞造成的负载不均
+SHARDS_PER_WORKER = 4
+
+# 单个分片至少覆盖的ID数，数据量小时减少分片以降低调度开销
+MIN_SHARD_SPAN = 5000
+
+IdRange = Tuple[int, int]
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def _init_worker() -> None:
+    """工作进程启动时丢弃从父进程继承的连接池，之后按需建立自己的连接"""
+    engine.dispose(close=False)
+
+
+def sharding_enabled() -> bool:
+    return ANALYSIS_WORKERS > 1
+
+
+def get_executor() -> ProcessPoolExecutor:
+    """惰性创建进程池，之后的请求复用同一组工作进程"""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=ANALYSIS_WORKERS, initializer=_init_worker)
+    return _executor
+
+
+def shutdown_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def id_ranges(db: Session, shards: int) -> List[IdRange]:
+    """把 [最小ID, 最大ID] 切分为不超过 shards 个左闭右开区间，按ID升序返回"""
+    lowest, highest = db.query(func.min(Job.id), func.max(Job.id)).one()
+    if lowest is None:
+        return []
+    span = highest - lowest + 1
+    shards = max(1, min(shards, -(-span // MIN_SHARD_SPAN)))
+    step = -(-span // shards)
+    return [(start, min(start + step, highest + 1)) for start in range(lowest, highest + 1, step)]
+
+
+async def map_id_ranges(aggregate_range: Callable[[int, int], Any], db: Session) -> List[Any]:
+    """
+    在进程池中对每个ID区间执行 aggregate_range(起始ID, 结束ID)，按区间顺序返回部分结果。
+    aggregate_range 必须是模块级函数，以便传给工作进程
+    """
+    ranges = id_ranges(db, ANALYSIS_WORKERS * SHARDS_PER_WORKER)
+    loop = asyncio.get_running_loop()
+    executor = get_executor()
+    return await asyncio.gather(*(
+        loop.run_in_executor(executor, aggregate_range, start, end)
+        for start, end in ranges
+    ))
@@ -3,6 +3,9 @@ import re
 from typing import List, Dict, Tuple, Any
 from collections import Counter, defaultdict
 from schemas.skill import SkillAnalysisRequest, SkillAnalysisResponse
+from database.database import SessionLocal
+from core.trend_service import compute_skill_trends
+from core.skill_cooccurrence import skill_cooccurrence
 
 # 技能词典 - 这里是部分常用技能，实际项目中可以从外部加载
 SKILL_DICTIONARY = {
@@ -143,6 +146,16 @@ def preprocess_text(text: str) -> str:
     return text.strip()
 
 def compute_related_skills(skills: List[str]) -> Dict[str, List[str]]:
+    """计算相关技能：优先使用职位标签共现统计，没有共现数据的技能按技能分类推断"""
+    related_skills = {}
+    
+    for skill in skills:
+        related = [item["skill"] for item in skill_cooccurrence.related(skill, 5)]
+        related_skills[skill] = related or dictionary_related_skills([skill])[skill]
+    
+    return related_skills
+
+def dictionary_related_skills(skills: List[str]) -> Dict[str, List[str]]:
     """计算相关技能（基于技能分类）"""
     related_skills = {}
     
@@ -169,32 +182,13 @@ def compute_related_skills(skills: List[str]) -> Dict[str, List[str]]:
     
     return related_skills
 
-async def get_skill_trends() -> Dict[str, Any]:
-    """获取技能趋势数据"""
-    # 这里可以连接到真实的数据源，目前返回模拟数据
-    return {
-        "rising_skills": [
-            {"skill": "Python", "growth": 25, "demand": 85},
-            {"skill": "Docker", "growth": 22, "demand": 78},
-            {"skill": "Kubernetes", "growth": 20, "demand": 72},
-            {"skill": "React", "growth": 18, "demand": 80},
-            {"skill": "TypeScript", "growth": 15, "demand": 65}
-        ],
-        "declining_skills": [
-            {"skill": "jQuery", "growth": -10, "demand": 30},
-            {"skill": "PHP", "growth": -5, "demand": 45},
-            {"skill": "AngularJS", "growth": -8, "demand": 25},
-            {"skill": "Flash", "growth": -15, "demand": 5},
-            {"skill": "VB.NET", "growth": -12, "demand": 20}
-        ],
-        "hot_categories": [
-            {"category": "人工智能", "demand": 90},
-            {"category": "云计算", "demand": 85},
-            {"category": "前端开发", "demand": 80},
-            {"category": "数据科学", "demand": 75},
-            {"category": "移动开发", "demand": 70}
-        ]
-    }
+async def get_skill_trends(window_days: int = 30, period: str = "day", limit: int = 5) -> Dict[str, Any]:
+    """获取技能趋势数据（基于按天/周维护的技能趋势聚合表）"""
+    db = SessionLocal()
+    try:
+        return compute_skill_trends(db, window_days=window_days, period=period, limit=limit)
+    finally:
+        db.close()
 
 async def get_skill_recommendations(user_skills: List[str]) -> Dict[str, Any]:
     """根据用户技能推荐学习路径"""
@@ -0,0 +1,117 @@
+"""
+技能共现矩阵
+由职位标签统计技能 × 技能的共现次数（稀疏存储：技能 -> 共现技能计数），随职位变更增量更新。
+相关度使用提升度 lift = N·c(a,b) / (c(a)·c(b)) 及其对数 PMI，每个技能预先计算前 TOP_K 个相关技能，
+只有计数发生变化的技能会在下次查询时重新计算，查询直接返回预先计算的列表
+"""
+import math
+from collections import Counter
+from typing import Dict, List, Any, Iterable, Optional, Set, Tuple
+from core.job_events import JobChangeEvent, register_job_listener
+
+# 每个技能预先计算的相关技能数量
+TOP_K = 10
+
+# 共现次数低于该值的技能对不参与排名，避免偶然共现的冷门技能 lift 过高
+MIN_COOCCURRENCE = 2
+
+
+class SkillCooccurrence:
+    """技能出现次数、两两共现次数和预先计算的相关技能列表"""
+
+    def __init__(self, top_k: int = TOP_K, min_cooccurrence: int = MIN_COOCCURRENCE):
+        self.top_k = top_k
+        self.min_cooccurrence = min_cooccurrence
+        self.clear()
+
+    def clear(self) -> None:
+        self.total_jobs = 0
+        self.skill_counts: Counter = Counter()
+        self.pair_counts: Dict[str, Counter] = {}
+        # 技能 -> (计算时的职位总数, 相关技能列表)
+        self._neighbours: Dict[str, Tuple[int, List[Dict[str, Any]]]] = {}
+        self._dirty: Set[str] = set()
+
+    def apply(self, records: Iterable[Dict[str, Any]], weight: int) -> None:
+        """加入（weight=1）或移除（weight=-1）一批职位"""
+        for record in records:
+            # 同一职位重复的标签只计一次
+            skills = list(dict.fromkeys(record["tags"]))
+            self.total_jobs += weight
+            for skill in skills:
+                self.skill_counts[skill] += weight
+                if self.skill_counts[skill] <= 0:
+                    del self.skill_counts[skill]
+                pairs = self.pair_counts.setdefault(skill, Counter())
+                for other in skills:
+                    if other != skill:
+                        pairs[other] += weight
+                        if pairs[other] <= 0:
+                            del pairs[other]
+                if not pairs:
+                    del self.pair_counts[skill]
+                # 该技能及其共现技能的得分都依赖该技能的出现次数
+                self._dirty.add(skill)
+                self._dirty.update(self.pair_counts.get(skill, ()))
+
+    def _rank(self, skill: str) -> List[Dict[str, Any]]:
+        """按 lift 降序（相同时依次按共现次数降序、技能名称）计算技能的前 top_k 个相关技能"""
+        count = self.skill_counts.get(skill, 0)
+        candidates = []
+        for other, together in self.pair_counts.get(skill, {}).items():
+            if together < self.min_cooccurrence:
+                continue
+            lift = self.total_jobs * together / (count * self.skill_counts[other])
+            candidates.append({
+                "skill": other,
+                "count": together,
+                "lift": round(lift, 4),
+                "pmi": round(math.log(lift), 4),
+                # 包含该技能的职位中同时要求 other 的比例
+                "confidence": round(together / count, 4)
+            })
+        candidates.sort(key=lambda item: (-item["lift"], -item["count"], item["skill"]))
+        return candidates[:self.top_k]
+
+    def related(self, skill: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        技能的相关技能列表；相关计数未变化时直接使用预先计算的结果。
+        只有职位总数变化时排名不变，lift 按总数等比例换算
+        """
+        if skill in self._dirty or skill not in self._neighbours:
+            self._dirty.discard(skill)
+            if skill in self.skill_counts:
+                self._neighbours[skill] = (self.total_jobs, self._rank(skill))
+            else:
+                self._neighbours.pop(skill, None)
+
+        computed_total, neighbours = self._neighbours.get(skill, (self.total_jobs, []))
+        neighbours = neighbours[:limit]
+        if computed_total == self.total_jobs:
+            return neighbours
+        scale = self.total_jobs / computed_total
+        return [
+            {**item, "lift": round(item["lift"] * scale, 4), "pmi": round(item["pmi"] + math.log(scale), 4)}
+            for item in neighbours
+        ]
+
+
+skill_cooccurrence = SkillCooccurrence()
+
+
+@register_job_listener
+def _update_skill_cooccurrence(event: JobChangeEvent) -> None:
+    if event.reset:
+        skill_cooccurrence.clear()
+    skill_cooccurrence.apply(event.removed, -1)
+    skill_cooccurrence.apply(event.added, 1)
+
+
+def get_related_skills(skill: str, limit: int = TOP_K) -> Dict[str, Any]:
+    """基于职位标签共现的相关技能"""
+    return {
+        "skill": skill,
+        "job_count": skill_cooccurrence.skill_counts.get(skill, 0),
+        "total_jobs": skill_cooccurrence.total_jobs,
+        "related": skill_cooccurrence.related(skill, limit)
+    }
@@ -0,0 +1,178 @@
+"""
+热门技能计数（Space-Saving）
+全局以及按城市、类别各维护一个容量固定的 Space-Saving 计数器，随职位变更增量更新，
+查询热门技能时不再解析全部职位的标签。
+每个计数器最多记录 capacity 个技能：新技能在计数器已满时替换计数最小的技能，并继承其计数作为误差上界，
+因此记录的计数不小于真实计数，且高估不超过 总标签数 / capacity。
+删除职位时只对仍在记录中的技能减少计数（Space-Saving±），未记录的技能直接忽略；
+删除比例不高时误差界仍然成立，下次启动重放职位数据时计数器重建。
+计数器在事件循环中随职位变更更新，同时会在后台线程（分析快照刷新）中读取，读写都在同一把锁内进行
+"""
+import heapq
+import os
+import threading
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+from core.job_events import JobChangeEvent, register_job_listener
+
+# 每个计数器记录的技能数，越大越精确：高估上界为 总标签数 / 容量
+SKILL_HEAVY_HITTER_CAPACITY = int(os.getenv("SKILL_HEAVY_HITTER_CAPACITY", "100"))
+
+# 维护计数器的维度及对应的职位字段
+HEAVY_HITTER_DIMENSIONS = {
+    "city": "city",
+    "category": "category",
+}
+
+
+class SpaceSaving:
+    """Space-Saving 计数器：技能 -> [计数, 误差, 开始记录的顺序]"""
+
+    def __init__(self, capacity: int = SKILL_HEAVY_HITTER_CAPACITY):
+        self.capacity = capacity
+        self.total = 0
+        self.entries: Dict[str, List[int]] = {}
+        # (计数, 顺序, 技能) 小顶堆，计数变化时压入新项，弹出时跳过已过期的项
+        self._heap: List[Tuple[int, int, str]] = []
+        self._sequence = 0
+        self._ranking: Optional[List[Tuple[str, List[int]]]] = None
+
+    def _push(self, item: str, entry: List[int]) -> None:
+        heapq.heappush(self._heap, (entry[0], entry[2], item))
+        if len(self._heap) > 4 * self.capacity + 16:
+            self._heap = [(entry[0], entry[2], item) for item, entry in self.entries.items()]
+            heapq.heapify(self._heap)
+
+    def _pop_min(self) -> Tuple[str, List[int]]:
+        """移除并返回计数最小的技能"""
+        while True:
+            count, sequence, item = heapq.heappop(self._heap)
+            entry = self.entries.get(item)
+            if entry is not None and entry[0] == count and entry[2] == sequence:
+                return item, self.entries.pop(item)
+
+    def add(self, item: str) -> None:
+        self.total += 1
+        self._ranking = None
+        entry = self.entries.get(item)
+        if entry is not None:
+            entry[0] += 1
+        elif len(self.entries) < self.capacity:
+            entry = self.entries[item] = [1, 0, self._sequence]
+            self._sequence += 1
+        else:
+            _, (min_count, _, _) = self._pop_min()
+            entry = self.entries[item] = [min_count + 1, min_count, self._sequence]
+            self._sequence += 1
+        self._push(item, entry)
+
+    def remove(self, item: str) -> None:
+        self.total -= 1
+        entry = self.entries.get(item)
+        if entry is None:
+            return
+        self._ranking = None
+        entry[0] -= 1
+        entry[1] = min(entry[1], entry[0])
+        if entry[0] <= 0:
+            del self.entries[item]
+        else:
+            self._push(item, entry)
+
+    @property
+    def max_error(self) -> int:
+        """任一技能计数的高估上界；计数器未满时从未替换过技能，计数是精确的"""
+        if len(self.entries) < self.capacity:
+            return max((entry[1] for entry in self.entries.values()), default=0)
+        return min(entry[0] for entry in self.entries.values())
+
+    def top(self, limit: int) -> List[Dict[str, Any]]:
+        """按计数降序（相同时按开始记录的顺序）返回前 limit 个技能"""
+        if self._ranking is None:
+            self._ranking = sorted(self.entries.items(), key=lambda item: (-item[1][0], item[1][2]))
+        ranking = self._ranking
+        # 第 limit+1 名的计数：计数减去误差仍不小于它的技能一定属于真实的前 limit 名
+        threshold = ranking[limit][1][0] if len(ranking) > limit else self.max_error
+        return [
+            {"skill": skill, "count": count, "error": error, "guaranteed": count - error >= threshold}
+            for skill, (count, error, _) in ranking[:limit]
+        ]
+
+
+class SkillHeavyHitters:
+    """全局及按 (维度, 取值) 维护的热门技能计数器"""
+
+    def __init__(self, capacity: int = SKILL_HEAVY_HITTER_CAPACITY):
+        self.capacity = capacity
+        self._counters: Dict[Tuple[str, Any], SpaceSaving] = {}
+        self._lock = threading.Lock()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._counters.clear()
+
+    def _keys(self, record: Dict[str, Any]) -> List[Tuple[str, Any]]:
+        keys = [("total", "")]
+        keys.extend((dimension, record[field]) for dimension, field in HEAVY_HITTER_DIMENSIONS.items())
+        return keys
+
+    def add(self, records: Iterable[Dict[str, Any]]) -> None:
+        with self._lock:
+            for record in records:
+                for key in self._keys(record):
+                    counter = self._counters.get(key)
+                    if counter is None:
+                        counter = self._counters[key] = SpaceSaving(self.capacity)
+                    for skill in record["tags"]:
+                        counter.add(skill)
+
+    def remove(self, records: Iterable[Dict[str, Any]]) -> None:
+        with self._lock:
+            for record in records:
+                for key in self._keys(record):
+                    counter = self._counters.get(key)
+                    if counter is None:
+                        continue
+                    for skill in record["tags"]:
+                        counter.remove(skill)
+                    if counter.total <= 0:
+                        del self._counters[key]
+
+    def summary(self, limit: int, dimension: str = "total", value: Any = "") -> Optional[Dict[str, Any]]:
+        """在锁内读取计数器的前 limit 个技能、标签总数和误差上界；没有该计数器时返回 None"""
+        with self._lock:
+            counter = self._counters.get((dimension, value))
+            if counter is None:
+                return None
+            return {"total": counter.total, "max_error": counter.max_error, "skills": counter.top(limit)}
+
+
+skill_heavy_hitters = SkillHeavyHitters()
+
+
+@register_job_listener
+def _update_skill_heavy_hitters(event: JobChangeEvent) -> None:
+    if event.reset:
+        skill_heavy_hitters.clear()
+    skill_heavy_hitters.remove(event.removed)
+    skill_heavy_hitters.add(event.added)
+
+
+def top_skill_counts(limit: int = 10, dimension: str = "total", value: Any = "") -> List[Tuple[str, int]]:
+    """热门技能及其计数 [(技能, 计数)]，计数为不小于真实值的估计"""
+    summary = skill_heavy_hitters.summary(limit, dimension, value)
+    if summary is None:
+        return []
+    return [(item["skill"], item["count"]) for item in summary["skills"]]
+
+
+def get_popular_skills(limit: int = 10, dimension: str = "total", value: Any = "") -> Dict[str, Any]:
+    """热门技能，附带每个技能计数的误差上界及是否确定属于前 limit 名"""
+    summary = skill_heavy_hitters.summary(limit, dimension, value)
+    return {
+        "dimension": dimension,
+        "value": value if dimension != "total" else None,
+        "total_tags": summary["total"] if summary else 0,
+        "capacity": skill_heavy_hitters.capacity,
+        "max_error": summary["max_error"] if summary else 0,
+        "skills": summary["skills"] if summary else []
+    }
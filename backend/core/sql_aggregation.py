@@ -0,0 +1,144 @@
+"""
+SQL聚合路径
+把薪资分桶、按城市/经验/类别分组求平均等计算下推到数据库的 GROUP BY 查询中，
+API进程只接收几十行聚合结果，返回结构与 analysis_service 中的函数保持一致
+"""
+from typing import Dict, List, Any, Tuple
+from sqlalchemy import UniqueConstraint, case, func
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from models import Job
+from core.aggregation_engine import SALARY_BUCKET_EDGES, SALARY_BUCKET_LABELS
+
+# 单个职位的薪资中位值，与逐行计算的 ((salary_min or 0) + (salary_max or 0)) // 2 一致
+SALARY_MID = func.floor((func.coalesce(Job.salary_min, 0) + func.coalesce(Job.salary_max, 0)) / 2)
+
+# 薪资分桶：按薪资中位值左闭右开划分，返回分桶下标
+SALARY_BUCKET = case(
+    *[(SALARY_MID < edge, index) for index, edge in enumerate(SALARY_BUCKET_EDGES)],
+    else_=len(SALARY_BUCKET_EDGES)
+)
+
+
+def upsert(db: Session, model, values: Dict[str, Any], updates: Dict[str, Any]) -> None:
+    """
+    插入一行，唯一键已存在时改为按 updates 更新该行（MySQL 为 INSERT ... ON DUPLICATE KEY UPDATE，
+    SQLite 为 INSERT ... ON CONFLICT DO UPDATE）。插入与更新由数据库在一条语句内完成，
+    并发写入同一个新分组时不会因唯一键冲突而失败
+    """
+    table = model.__table__
+    if db.get_bind().dialect.name == "mysql":
+        statement = mysql_insert(table).values(**values).on_duplicate_key_update(**updates)
+    else:
+        unique = next(constraint for constraint in table.constraints if isinstance(constraint, UniqueConstraint))
+        statement = sqlite_insert(table).values(**values).on_conflict_do_update(
+            index_elements=[column.name for column in unique.columns],
+            set_=updates
+        )
+    db.execute(statement)
+
+
+def _grouped_salary(db: Session, column) -> List[Tuple[Any, int, int]]:
+    """按列分组统计 (取值, 职位数, 薪资中位值之和)，按分组首次出现顺序返回"""
+    first_id = func.min(Job.id)
+    rows = db.query(
+        column,
+        func.count(Job.id),
+        func.sum(SALARY_MID)
+    ).group_by(column).order_by(first_id).all()
+    return [(value, int(count), int(total or 0)) for value, count, total in rows]
+
+
+def _averages(groups: List[Tuple[Any, int, int]]) -> Dict[Any, int]:
+    return {value: total // count for value, count, total in groups}
+
+
+def _top_by_count(groups: List[Tuple[Any, int, int]], limit: int) -> Dict[Any, int]:
+    """按职位数降序取前 limit 个分组，数量相同时保持首次出现顺序"""
+    ranked = sorted(groups, key=lambda group: group[1], reverse=True)[:limit]
+    return {value: count for value, count, _ in ranked}
+
+
+def sql_salary_analysis(db: Session) -> Dict[str, Any]:
+    """薪资分析（SQL聚合）"""
+    total_positions, total_salary = db.query(func.count(Job.id), func.sum(SALARY_MID)).one()
+
+    if not total_positions:
+        return {
+            "average_salary": 0,
+            "salary_distribution": {},
+            "top_paying_cities": [],
+            "salary_by_experience": {},
+            "total_positions": 0
+        }
+
+    # 薪资分布
+    salary_ranges = dict.fromkeys(SALARY_BUCKET_LABELS, 0)
+    bucket_rows = db.query(SALARY_BUCKET, func.count(Job.id)).group_by(SALARY_BUCKET).all()
+    for bucket, count in bucket_rows:
+        salary_ranges[SALARY_BUCKET_LABELS[int(bucket)]] = int(count)
+
+    # 高薪城市：由数据库排序并截取前5
+    avg_salary = func.floor(func.sum(SALARY_MID) / func.count(Job.id))
+    top_paying_cities = db.query(Job.city, avg_salary).group_by(Job.city).order_by(
+        avg_salary.desc(), func.min(Job.id)
+    ).limit(5).all()
+
+    return {
+        "average_salary": int(total_salary or 0) // total_positions,
+        "salary_distribution": salary_ranges,
+        "top_paying_cities": [{"city": city, "avg_salary": int(salary)} for city, salary in top_paying_cities],
+        "salary_by_experience": _averages(_grouped_salary(db, Job.experience_required)),
+        "total_positions": total_positions
+    }
+
+
+def sql_city_analysis(db: Session) -> Dict[str, Any]:
+    """城市分析（SQL聚合）"""
+    groups = _grouped_salary(db, Job.city)
+
+    if not groups:
+        return {
+            "city_job_distribution": {},
+            "city_average_salary": {},
+            "top_job_cities": {}
+        }
+
+    return {
+        "city_job_distribution": _top_by_count(groups, 20),
+        "city_average_salary": _averages(groups),
+        "top_job_cities": _top_by_count(groups, 10)
+    }
+
+
+def sql_experience_analysis(db: Session) -> Dict[str, Any]:
+    """经验要求分析（SQL聚合）"""
+    groups = _grouped_salary(db, Job.experience_required)
+
+    if not groups:
+        return {
+            "experience_distribution": {},
+            "average_salary_by_experience": {}
+        }
+
+    return {
+        "experience_distribution": {value: count for value, count, _ in groups},
+        "average_salary_by_experience": _averages(groups)
+    }
+
+
+def sql_industry_analysis(db: Session) -> Dict[str, Any]:
+    """行业分析（SQL聚合）"""
+    groups = _grouped_salary(db, Job.category)
+
+    if not groups:
+        return {
+            "category_distribution": {},
+            "average_salary_by_category": {}
+        }
+
+    return {
+        "category_distribution": _top_by_count(groups, 20),
+        "average_salary_by_category": _averages(groups)
+    }
@@ -0,0 +1,271 @@
+"""
+技能趋势聚合服务
+按发布日期（Job.created_at）把职位汇总到按天、按周的 skill_trend_rollups 行中：
+每个技能/类别在每个时间桶内的职位数和薪资和。写入职位时由 rollup_service 在同一事务中增量维护，
+趋势查询只读取窗口内的聚合行，计算增长率、需求占比和平均薪资。
+没有创建时间的职位无法归入时间桶，不计入趋势
+"""
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Tuple
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+from models import Job, SkillTrendRollup
+from core.sql_aggregation import upsert
+from utils.data_utils import parse_job_tags
+
+TREND_PERIODS = ("day", "week")
+
+TrendKey = Tuple[str, date, str, str]
+
+
+def _posting_date(created_at: Any) -> Optional[date]:
+    """职位的发布日期；创建时间为空或无法解析时（如直接写入数据库、未设置时间的数据）返回 None"""
+    if isinstance(created_at, datetime):
+        return created_at.date()
+    if isinstance(created_at, date):
+        return created_at
+    if isinstance(created_at, str):
+        try:
+            return datetime.fromisoformat(created_at).date()
+        except ValueError:
+            pass
+    return None
+
+
+def bucket_start(day: date, period: str) -> date:
+    """日期所在时间桶的起始日：按天为当天，按周为当周周一"""
+    if period == "week":
+        return day - timedelta(days=day.weekday())
+    return day
+
+
+def bucket_end(day: date, period: str) -> date:
+    """日期所在时间桶的结束日（不含）"""
+    return bucket_start(day, period) + timedelta(days=7 if period == "week" else 1)
+
+
+def _trend_keys(record: Dict[str, Any]) -> List[TrendKey]:
+    day = _posting_date(record.get("created_at"))
+    keys = []
+    if day is None:
+        return keys
+    for period in TREND_PERIODS:
+        start = bucket_start(day, period)
+        keys.append((period, start, "total", ""))
+        keys.append((period, start, "category", record["category"] or ""))
+        # 同一职位重复的标签只计一次
+        keys.extend((period, start, "skill", tag) for tag in dict.fromkeys(record["tags"]))
+    return keys
+
+
+def _accumulate(records: Iterable[Dict[str, Any]]) -> Dict[TrendKey, List[int]]:
+    """汇总一批职位对各趋势聚合行的贡献：[职位数, 薪资和]"""
+    deltas: Dict[TrendKey, List[int]] = {}
+    for record in records:
+        salary_mid = (record["salary_min"] + record["salary_max"]) // 2
+        for key in _trend_keys(record):
+            delta = deltas.setdefault(key, [0, 0])
+            delta[0] += 1
+            delta[1] += salary_mid
+    return deltas
+
+
+def _filters(key: TrendKey) -> tuple:
+    period, start, dimension, value = key
+    return (
+        SkillTrendRollup.period == period,
+        SkillTrendRollup.bucket_start == start,
+        SkillTrendRollup.dimension == dimension,
+        SkillTrendRollup.value == value,
+    )
+
+
+def add_jobs_to_trends(db: Session, records: Iterable[Dict[str, Any]]) -> None:
+    """把新增职位计入趋势聚合表，由调用方在同一事务中提交；时间桶行不存在时插入、已存在时累加"""
+    for (period, start, dimension, value), (count, total) in _accumulate(records).items():
+        upsert(db, SkillTrendRollup, {
+            "period": period,
+            "bucket_start": start,
+            "dimension": dimension,
+            "value": value,
+            "posting_count": count,
+            "salary_sum": total,
+        }, {
+            "posting_count": SkillTrendRollup.posting_count + count,
+            "salary_sum": SkillTrendRollup.salary_sum + total,
+        })
+    db.flush()
+
+
+def remove_jobs_from_trends(db: Session, records: Iterable[Dict[str, Any]]) -> None:
+    """从趋势聚合表中扣除职位，由调用方在同一事务中提交"""
+    for key, (count, total) in _accumulate(records).items():
+        db.query(SkillTrendRollup).filter(*_filters(key)).update({
+            SkillTrendRollup.posting_count: SkillTrendRollup.posting_count - count,
+            SkillTrendRollup.salary_sum: SkillTrendRollup.salary_sum - total,
+        }, synchronize_session=False)
+        db.query(SkillTrendRollup).filter(
+            *_filters(key), SkillTrendRollup.posting_count <= 0
+        ).delete(synchronize_session=False)
+    db.flush()
+
+
+def clear_trends(db: Session) -> None:
+    """清空趋势聚合表，由调用方在同一事务中提交"""
+    db.query(SkillTrendRollup).delete(synchronize_session=False)
+
+
+def _iter_trend_records(db: Session) -> Iterator[Dict[str, Any]]:
+    """流式读取计算趋势所需的职位字段"""
+    query = db.query(
+        Job.category, Job.salary_min, Job.salary_max, Job.tags, Job.created_at
+    ).yield_per(10000)
+    for row in query:
+        yield {
+            "category": row.category,
+            "salary_min": row.salary_min or 0,
+            "salary_max": row.salary_max or 0,
+            "tags": parse_job_tags(row.tags),
+            "created_at": row.created_at
+        }
+
+
+def build_trend_rows(db: Session) -> List[SkillTrendRollup]:
+    """从 jobs 表计算全部趋势聚合行（不写入数据库）"""
+    return [
+        SkillTrendRollup(
+            period=period,
+            bucket_start=start,
+            dimension=dimension,
+            value=value,
+            posting_count=count,
+            salary_sum=total
+        )
+        for (period, start, dimension, value), (count, total) in _accumulate(_iter_trend_records(db)).items()
+    ]
+
+
+def verify_trends(db: Session) -> List[str]:
+    """对比趋势聚合表与 jobs 表的实际统计，返回不一致的聚合行说明"""
+    expected = _accumulate(_iter_trend_records(db))
+    actual = {
+        (row.period, row.bucket_start, row.dimension, row.value): [row.posting_count, row.salary_sum]
+        for row in db.query(SkillTrendRollup).all()
+    }
+
+    problems = []
+    for key in sorted(expected.keys() | actual.keys()):
+        if expected.get(key) != actual.get(key):
+            period, start, dimension, value = key
+            problems.append(
+                f"{period}:{start.isoformat()} {dimension}={value}: 期望 {expected.get(key)}，实际 {actual.get(key)}"
+            )
+    return problems
+
+
+def trend_total(db: Session) -> int:
+    """趋势聚合表中记录的职位总数，应与有创建时间的职位数一致"""
+    return db.query(func.sum(SkillTrendRollup.posting_count)).filter(
+        SkillTrendRollup.period == "day",
+        SkillTrendRollup.dimension == "total"
+    ).scalar() or 0
+
+
+def _growth(current: int, previous: int) -> float:
+    """当前窗口相对上一窗口的增长率（百分比）"""
+    if previous:
+        return round((current - previous) / previous * 100, 1)
+    return 100.0 if current else 0.0
+
+
+def compute_skill_trends(db: Session, window_days: int = 30, period: str = "day", limit: int = 5) -> Dict[str, Any]:
+    """
+    对比最近 window_days 天（按周时扩展到整周）与之前同样长度窗口的聚合行，计算技能和类别的增长率、
+    需求占比（包含该技能的职位占当前窗口职位数的百分比）和平均薪资
+    """
+    today = date.today()
+    current_start = bucket_start(today - timedelta(days=window_days - 1), period)
+    current_end = bucket_end(today, period)
+    # 两个窗口包含相同数量的时间桶
+    previous_start = current_start - (current_end - current_start)
+    in_current = SkillTrendRollup.bucket_start >= current_start
+
+    rows = db.query(
+        SkillTrendRollup.dimension,
+        SkillTrendRollup.value,
+        func.sum(case((in_current, SkillTrendRollup.posting_count), else_=0)),
+        func.sum(case((in_current, 0), else_=SkillTrendRollup.posting_count)),
+        func.sum(case((in_current, SkillTrendRollup.salary_sum), else_=0))
+    ).filter(
+        SkillTrendRollup.period == period,
+        SkillTrendRollup.bucket_start >= previous_start,
+        SkillTrendRollup.bucket_start < current_end
+    ).group_by(SkillTrendRollup.dimension, SkillTrendRollup.value).all()
+
+    total_postings = 0
+    skills = []
+    categories = []
+    for dimension, value, current, previous, salary_sum in rows:
+        current, previous, salary_sum = int(current or 0), int(previous or 0), int(salary_sum or 0)
+        if dimension == "total":
+            total_postings = current
+            continue
+        item = {
+            "name": value,
+            "count": current,
+            "previous_count": previous,
+            "growth": _growth(current, previous),
+            "avg_salary": salary_sum // current if current else 0
+        }
+        (skills if dimension == "skill" else categories).append(item)
+
+    def demand(count: int) -> float:
+        return round(count / total_postings * 100, 1) if total_postings else 0.0
+
+    def skill_item(item: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "skill": item["name"],
+            "growth": item["growth"],
+            "demand": demand(item["count"]),
+            "count": item["count"],
+            "avg_salary": item["avg_salary"]
+        }
+
+    active_skills = [item for item in skills if item["count"] > 0]
+    rising = sorted(
+        (item for item in active_skills if item["growth"] > 0),
+        key=lambda item: (item["growth"], item["count"]),
+        reverse=True
+    )
+    declining = sorted(
+        (item for item in skills if item["growth"] < 0),
+        key=lambda item: (item["growth"], -item["count"])
+    )
+    top = sorted(active_skills, key=lambda item: item["count"], reverse=True)
+    hot_categories = sorted(
+        (item for item in categories if item["count"] > 0),
+        key=lambda item: item["count"],
+        reverse=True
+    )
+
+    return {
+        "window_days": window_days,
+        "period": period,
+        "current_window_start": current_start.isoformat(),
+        "previous_window_start": previous_start.isoformat(),
+        "total_postings": total_postings,
+        "total_skills_analyzed": sum(item["count"] for item in active_skills),
+        "unique_skills": len(active_skills),
+        "rising_skills": [skill_item(item) for item in rising[:limit]],
+        "declining_skills": [skill_item(item) for item in declining[:limit]],
+        "top_skills": [skill_item(item) for item in top[:limit]],
+        "hot_categories": [
+            {
+                "category": item["name"],
+                "demand": demand(item["count"]),
+                "growth": item["growth"],
+                "avg_salary": item["avg_salary"]
+            }
+            for item in hot_categories[:limit]
+        ]
+    }
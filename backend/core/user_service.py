@@ -86,6 +86,14 @@ async def create_user(user_data: UserCreate) -> UserResponse:
 
 def calculate_salary_by_skills(user_skills: list, user_experience: int, user_location: str) -> tuple:
     """基于技能和经验计算薪资范围（备选算法）"""
+    # 薪资模型已拟合时，用从职位数据中学到的技能、城市、经验系数预测
+    from core.salary_model import get_salary_model, experience_level_for_years
+    model = get_salary_model()
+    if model is not None:
+        experience_level = experience_level_for_years(user_experience, model.experience_levels())
+        predicted_salary = model.predict(user_skills, user_location, experience_level)
+        return int(predicted_salary * 0.8), int(predicted_salary * 1.3)
+    
     # 技能权重和薪资影响因子
     skill_weights = {
         'Python': {'weight': 0.8, 'salary_boost': 0.15},
@@ -128,6 +136,15 @@ def calculate_salary_by_skills(user_skills: list, user_experience: int, user_loc
     
     return reasonable_min, reasonable_max
 
+def _highest_paid_jobs(db: Session, limit: int) -> list:
+    """最高薪资最高的职位，直接取自薪资区间索引的排序数组"""
+    from models import Job
+    from core.salary_index import salary_index
+    
+    job_ids = salary_index.highest_paid(limit)
+    jobs = {job.id: job for job in db.query(Job).filter(Job.id.in_(job_ids))}
+    return [jobs[job_id] for job_id in job_ids if job_id in jobs]
+
 def generate_simple_job_recommendations(user_skills: list, user_location: str, user_experience: int) -> list:
     """基于用户技能和数据库职位生成简单实用的推荐"""
     from database.database import SessionLocal
@@ -207,7 +224,7 @@ def generate_simple_job_recommendations(user_skills: list, user_location: str, u
         # 如果匹配的职位太少，补充一些热门职位
         if len(recommendations) < 6:
             # 按薪资排序获取热门职位
-            popular_jobs = db.query(Job).order_by(Job.salary_max.desc()).limit(10).all()
+            popular_jobs = _highest_paid_jobs(db, 10)
             for job in popular_jobs:
                 if job.id not in [r['id'] for r in recommendations] and len(recommendations) < 6:
                     # 为热门职位计算一个基础匹配度
@@ -231,7 +248,7 @@ def generate_simple_job_recommendations(user_skills: list, user_location: str, u
         # 确保至少有3个推荐
         if len(recommendations) < 3:
             # 获取所有职位，按薪资排序
-            all_jobs_sorted = db.query(Job).order_by(Job.salary_max.desc()).limit(6).all()
+            all_jobs_sorted = _highest_paid_jobs(db, 6)
             for job in all_jobs_sorted:
                 if job.id not in [r['id'] for r in recommendations] and len(recommendations) < 3:
                     recommendations.append({
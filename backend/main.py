@@ -7,7 +7,12 @@ import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from api import router as api_router
-from core.job_service import initialize_job_data
+from core.job_service import initialize_job_data, create_job_indexes
+from core.rollup_service import sync_rollups
+from core.analytics_snapshot import SNAPSHOT_INTERVAL, run_snapshot_refresher
+from core.job_events import replay_job_events
+from core.sharded_aggregation import shutdown_executor
+from core.salary_model import SALARY_MODEL_REFIT_INTERVAL, load_persisted_salary_model, run_salary_model_refitter
 import asyncio
 import uvicorn
 
@@ -31,10 +36,39 @@ app.include_router(api_router, prefix="/api/v1")
 
 @app.on_event("startup")
 async def startup_event():
+    # 确保职位表索引、聚合表存在且与职位表一致
+    create_job_indexes()
+    sync_rollups()
+    
     # 初始化职位数据
     print("正在初始化职位数据...")
     count = await initialize_job_data()
     print(f"职位数据初始化完成，共 {count} 条数据")
+    
+    # 用当前职位数据构建内存中的派生结构
+    replayed = replay_job_events()
+    print(f"已加载 {replayed} 条职位到内存统计结构")
+    
+    # 启动分析快照的后台刷新任务
+    if SNAPSHOT_INTERVAL > 0:
+        app.state.snapshot_task = asyncio.create_task(run_snapshot_refresher())
+    
+    # 先用已保存的系数提供技能薪资溢价，再由后台任务按最新职位数据重新拟合
+    load_persisted_salary_model()
+    if SALARY_MODEL_REFIT_INTERVAL > 0:
+        app.state.salary_model_task = asyncio.create_task(run_salary_model_refitter())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    snapshot_task = getattr(app.state, "snapshot_task", None)
+    if snapshot_task:
+        snapshot_task.cancel()
+    salary_model_task = getattr(app.state, "salary_model_task", None)
+    if salary_model_task:
+        salary_model_task.cancel()
+    
+    # 关闭分片聚合的进程池
+    shutdown_executor()
 
 @app.get("/")
 def read_root():
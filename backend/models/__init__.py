@@ -1,14 +1,16 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy import Column, Integer, BigInteger, Float, String, Text, Date, DateTime, Index, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
 from sqlalchemy.types import TypeDecorator, TEXT
 import json
+from datetime import datetime
 
 Base = declarative_base()
 
 class JSONEncodedDict(TypeDecorator):
     """Represents an immutable structure as a json-encoded string."""
     impl = TEXT
+    cache_ok = True
 
     def process_bind_param(self, value, dialect):
         if value is not None:
@@ -25,6 +27,11 @@ class JSONEncodedDict(TypeDecorator):
 
 class Job(Base):
     __tablename__ = "jobs"
+    __table_args__ = (
+        # 游标分页按 (排序字段, id) 定位
+        Index("ix_jobs_salary_max_id", "salary_max", "id"),
+        Index("ix_jobs_created_at_id", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(255), index=True)
@@ -38,9 +45,55 @@ class Job(Base):
     requirements = Column(Text)
     category = Column(String(100), index=True)
     tags = Column(JSONEncodedDict)  # 存储技能标签列表
-    created_at = Column(DateTime, server_default=func.now())
+    # 创建时间在插入时由应用写入，flush 之后即可读取，聚合表的趋势时间桶与库中保存的值一致；
+    # server_default 保留给直接写入数据库的数据
+    created_at = Column(DateTime, default=datetime.now, server_default=func.now())
     updated_at = Column(DateTime, onupdate=func.now())
 
+class JobRollup(Base):
+    """职位聚合表：按维度取值汇总的职位数与薪资统计，随职位写入增量维护"""
+    __tablename__ = "job_rollups"
+    __table_args__ = (UniqueConstraint("dimension", "value", name="uq_job_rollup_dimension_value"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    dimension = Column(String(20), nullable=False)  # total / city / category / experience / salary_bucket / skill
+    value = Column(String(255), nullable=False, default="")
+    job_count = Column(Integer, nullable=False, default=0)
+    salary_sum = Column(BigInteger, nullable=False, default=0)  # 薪资中位值之和
+    salary_min = Column(Integer)  # 分组内最低薪资
+    salary_max = Column(Integer)  # 分组内最高薪资
+    first_job_id = Column(Integer)  # 分组内最小职位ID，用于保持分组的首次出现顺序
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+class SkillTrendRollup(Base):
+    """技能趋势聚合表：按天/按周汇总各技能、类别的职位数与薪资，随职位写入增量维护"""
+    __tablename__ = "skill_trend_rollups"
+    __table_args__ = (
+        UniqueConstraint("period", "bucket_start", "dimension", "value", name="uq_skill_trend_bucket"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    period = Column(String(10), nullable=False)  # day / week
+    bucket_start = Column(Date, nullable=False, index=True)  # 当天或当周周一
+    dimension = Column(String(20), nullable=False)  # total / skill / category
+    value = Column(String(255), nullable=False, default="")
+    posting_count = Column(Integer, nullable=False, default=0)
+    salary_sum = Column(BigInteger, nullable=False, default=0)  # 薪资中位值之和
+
+class SalaryModelCoefficient(Base):
+    """技能薪资溢价模型的系数表：每次重新拟合后整体替换"""
+    __tablename__ = "salary_model_coefficients"
+    __table_args__ = (
+        UniqueConstraint("feature_type", "feature_value", name="uq_salary_model_feature"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    feature_type = Column(String(20), nullable=False)  # intercept / skill / city / experience
+    feature_value = Column(String(255), nullable=False, default="")
+    coefficient = Column(Float, nullable=False)  # 对数薪资上的系数
+    support = Column(Integer, nullable=False, default=0)  # 含该特征的职位数，截距行为样本数
+    fitted_at = Column(DateTime, nullable=False)
+
 class User(Base):
     __tablename__ = "users"
     
@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Dict
 import json
 
 class JobBase(BaseModel):
@@ -74,4 +74,29 @@ class JobResponse(JobBase):
         else:
             instance_data['tags'] = []
         
-        return cls(**instance_data)
\ No newline at end of file
+        return cls(**instance_data)
+
+class JobSearchResult(JobResponse):
+    """搜索结果：职位信息、相关度得分和各字段的高亮片段"""
+    score: float = 0.0
+    highlights: Dict[str, str] = {}
+
+
+class FacetCount(BaseModel):
+    """分面统计中的一个取值及其职位数"""
+    value: str
+    count: int
+
+class JobPage(BaseModel):
+    """
+    一页职位：游标分页时 next_cursor / prev_cursor 为空表示没有下一页 / 上一页（offset 分页时始终为空）；
+    facets 为请求的各维度在全部匹配职位上的分面统计
+    """
+    items: List[JobResponse]
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+    facets: Optional[Dict[str, List[FacetCount]]] = None
+
+class JobSearchPage(JobPage):
+    """游标分页的一页搜索结果"""
+    items: List[JobSearchResult]
@@ -0,0 +1,12 @@
+"""
+测试配置：在导入业务模块之前把数据库指向临时的 SQLite 文件，测试不会连接 MySQL
+    cd backend
+    python -m pytest -q
+"""
+import os
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "test.db")
@@ -0,0 +1,109 @@
+"""
+列式聚合引擎：随机职位数据（含空字段、并列的分组）上，各分析结果及其键的顺序与逐行遍历的原始实现一致
+"""
+import random
+from collections import Counter
+import pytest
+from core.aggregation_engine import EncodedColumn, JobColumns, top_groups
+from core.analysis_service import (
+    compute_salary_analysis, compute_city_analysis, compute_experience_analysis, compute_industry_analysis
+)
+
+
+def random_rows(rng: random.Random, count: int) -> list:
+    cities = [f"城市{index}" for index in range(rng.randint(1, 30))] + [None]
+    categories = [f"类别{index}" for index in range(rng.randint(1, 25))]
+    experiences = ["1-3年", "3-5年", "经验不限", None]
+    return [
+        (
+            job_id,
+            rng.choice([None, rng.randint(0, 50) * 1000]),
+            rng.choice([None, rng.randint(0, 80) * 1000]),
+            rng.choice(cities),
+            rng.choice(categories),
+            rng.choice(experiences),
+            rng.choice(["本科", "硕士", None]),
+        )
+        for job_id in range(1, count + 1)
+    ]
+
+
+def averages(rows: list, field: int) -> dict:
+    groups = {}
+    for row in rows:
+        groups.setdefault(row[field], []).append(((row[1] or 0) + (row[2] or 0)) // 2)
+    return {key: sum(values) // len(values) for key, values in groups.items()}
+
+
+def reference_analyses(rows: list) -> dict:
+    """与改为列式计算之前逐行遍历职位的实现相同"""
+    mids = [((row[1] or 0) + (row[2] or 0)) // 2 for row in rows]
+    labels = ["0-5K", "5K-10K", "10K-15K", "15K-20K", "20K-30K", "30K+"]
+    edges = [5000, 10000, 15000, 20000, 30000]
+    distribution = dict.fromkeys(labels, 0)
+    for mid in mids:
+        distribution[labels[sum(mid >= edge for edge in edges)]] += 1
+    city_averages = averages(rows, 3)
+    city_counts = Counter(row[3] for row in rows)
+    category_counts = Counter(row[4] for row in rows)
+    return {
+        "salary": {
+            "average_salary": sum(mids) // len(rows),
+            "salary_distribution": distribution,
+            "top_paying_cities": [
+                {"city": city, "avg_salary": salary}
+                for city, salary in sorted(city_averages.items(), key=lambda item: item[1], reverse=True)[:5]
+            ],
+            "salary_by_experience": averages(rows, 5),
+            "total_positions": len(rows),
+        },
+        "city": {
+            "city_job_distribution": dict(city_counts.most_common(20)),
+            "city_average_salary": city_averages,
+            "top_job_cities": dict(city_counts.most_common(10)),
+        },
+        "experience": {
+            "experience_distribution": dict(Counter(row[5] for row in rows)),
+            "average_salary_by_experience": averages(rows, 5),
+        },
+        "industry": {
+            "category_distribution": dict(category_counts.most_common(20)),
+            "average_salary_by_category": averages(rows, 4),
+        },
+    }
+
+
+def ordered(value):
+    """把字典转换为键值对列表，比较时同时检查顺序"""
+    if isinstance(value, dict):
+        return [(key, ordered(item)) for key, item in value.items()]
+    if isinstance(value, list):
+        return [ordered(item) for item in value]
+    return value
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_columnar_results_match_row_by_row_reference(seed):
+    rng = random.Random(seed)
+    rows = random_rows(rng, rng.choice([1, 7, 300, 2000]))
+    columns = JobColumns.from_rows(rows)
+    expected = reference_analyses(rows)
+    assert ordered(compute_salary_analysis(columns)) == ordered(expected["salary"])
+    assert ordered(compute_city_analysis(columns)) == ordered(expected["city"])
+    assert ordered(compute_experience_analysis(columns)) == ordered(expected["experience"])
+    assert ordered(compute_industry_analysis(columns)) == ordered(expected["industry"])
+
+
+def test_empty_columns():
+    columns = JobColumns.from_rows([])
+    assert compute_salary_analysis(columns)["total_positions"] == 0
+    assert compute_city_analysis(columns)["city_job_distribution"] == {}
+    assert compute_experience_analysis(columns)["experience_distribution"] == {}
+    assert compute_industry_analysis(columns)["category_distribution"] == {}
+
+
+def test_encoding_keeps_first_appearance_order_and_ties():
+    column = EncodedColumn.encode(["乙", "甲", None, "乙", "丙", None])
+    assert column.values == ["乙", "甲", None, "丙"]
+    assert column.codes.tolist() == [0, 1, 2, 0, 3, 2]
+    assert top_groups({"乙": 2, "甲": 1, None: 2, "丙": 1}, 3) == [("乙", 2), (None, 2), ("甲", 1)]
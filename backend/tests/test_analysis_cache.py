@@ -0,0 +1,123 @@
+"""
+分析结果缓存：版本递增后旧结果失效，计算期间版本变化的结果不写入，受LRU容量和TTL限制；
+通过接口写入职位后，缓存的分析结果与重新计算的结果一致
+"""
+import asyncio
+import json
+import pytest
+from database.database import SessionLocal, engine
+from models import Base, Job
+from core import analysis_cache as analysis_cache_module
+from core import job_service
+from core.analysis_cache import VersionedResultCache, analysis_cache, cached_analysis
+from core.aggregation_engine import load_job_columns
+from core.analysis_service import compute_city_analysis, get_city_analysis
+from core.job_events import publish_job_change, replay_job_events
+from schemas.job import JobCreate, JobUpdate
+
+
+def job_fields(city: str, salary_min: int) -> dict:
+    return {
+        "title": "工程师", "company": "公司", "city": city, "salary_min": salary_min,
+        "salary_max": salary_min + 2000, "experience_required": "经验不限", "education_required": "本科",
+        "description": "", "requirements": "", "category": "技术开发", "tags": ["Python"],
+    }
+
+
+def test_bumped_version_invalidates_entries():
+    cache = VersionedResultCache()
+    cache.set("key", cache.version, 1)
+    assert cache.get("key", cache.version) == (True, 1)
+    cache.bump_version()
+    assert cache.get("key", cache.version) == (False, None)
+    assert cache.stats()["entries"] == 0
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_result_computed_before_a_write_is_not_stored():
+    cache = VersionedResultCache()
+    version = cache.version
+    cache.bump_version()
+    cache.set("key", version, "旧数据")
+    assert cache.get("key", cache.version) == (False, None)
+    assert cache.stats()["entries"] == 0
+
+
+def test_lru_capacity_and_ttl(monkeypatch):
+    cache = VersionedResultCache(max_entries=2, ttl_seconds=10)
+    cache.set("a", 0, 1)
+    cache.set("b", 0, 2)
+    # 访问 a 使 b 成为最久未使用的条目
+    assert cache.get("a", 0) == (True, 1)
+    cache.set("c", 0, 3)
+    assert cache.get("b", 0) == (False, None)
+    assert cache.get("a", 0) == (True, 1)
+    assert cache.evictions == 1
+
+    now = analysis_cache_module.time.monotonic()
+    monkeypatch.setattr(analysis_cache_module.time, "monotonic", lambda: now + 11)
+    assert cache.get("a", 0) == (False, None)
+    assert cache.get("c", 0) == (False, None)
+
+
+def test_decorator_caches_per_arguments_until_a_job_change():
+    calls = []
+
+    @cached_analysis("test_decorator")
+    async def analysis(value: int, scale: int = 1):
+        calls.append((value, scale))
+        return value * scale
+
+    assert asyncio.run(analysis(2, scale=3)) == 6
+    assert asyncio.run(analysis(2, scale=3)) == 6
+    assert asyncio.run(analysis(2)) == 2
+    assert calls == [(2, 3), (2, 1)]
+    publish_job_change(added=[])
+    assert asyncio.run(analysis(2, scale=3)) == 6
+    assert calls == [(2, 3), (2, 1), (2, 3)]
+
+
+@pytest.fixture
+def seeded_jobs():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        for index, city in enumerate(["北京", "上海", "北京", "深圳"]):
+            record = job_fields(city, 10000 + index * 1000)
+            db.add(Job(**dict(record, tags=json.dumps(record["tags"], ensure_ascii=False))))
+        db.commit()
+    finally:
+        db.close()
+    replay_job_events()
+    try:
+        yield
+    finally:
+        publish_job_change(reset=True)
+        Base.metadata.drop_all(bind=engine)
+
+
+def fresh_city_analysis() -> dict:
+    db = SessionLocal()
+    try:
+        return compute_city_analysis(load_job_columns(db))
+    finally:
+        db.close()
+
+
+def test_cached_analysis_follows_job_writes(seeded_jobs):
+    assert asyncio.run(get_city_analysis()) == fresh_city_analysis()
+    hits = analysis_cache.hits
+    asyncio.run(get_city_analysis())
+    assert analysis_cache.hits == hits + 1
+
+    job = asyncio.run(job_service.create_job(JobCreate(**job_fields("杭州", 30000))))
+    assert asyncio.run(get_city_analysis()) == fresh_city_analysis()
+    assert "杭州" in asyncio.run(get_city_analysis())["city_job_distribution"]
+
+    asyncio.run(job_service.update_job(job.id, JobUpdate(city="成都")))
+    assert asyncio.run(get_city_analysis()) == fresh_city_analysis()
+
+    asyncio.run(job_service.delete_job(job.id))
+    result = asyncio.run(get_city_analysis())
+    assert result == fresh_city_analysis()
+    assert "成都" not in result["city_job_distribution"]
@@ -0,0 +1,91 @@
+"""
+分析快照：刷新生成新一代只读快照并整体替换，已取得的旧快照不受影响；结果未变化的刷新标记为未变化；
+快照生成前在请求路径上计算；职位变更触发后台刷新
+"""
+import asyncio
+import pytest
+from core import analytics_snapshot
+from core.analytics_snapshot import read_analysis, refresh_snapshot, get_snapshot, snapshot_headers
+from core.job_events import publish_job_change
+
+
+@pytest.fixture
+def sources(monkeypatch):
+    """用计数器替代真实的分析计算，state["total"] 为当前的"职位数"""
+    state = {"total": 3, "calls": 0}
+
+    async def salary():
+        state["calls"] += 1
+        return {"total_positions": state["total"]}
+
+    async def city():
+        return {"city_job_distribution": {"北京": state["total"]}}
+
+    monkeypatch.setattr(analytics_snapshot, "SNAPSHOT_SOURCES", {"salary": salary, "city": city})
+    monkeypatch.setattr(analytics_snapshot, "_current", None)
+    monkeypatch.setattr(analytics_snapshot, "_snapshot_listeners", [])
+    monkeypatch.setattr(analytics_snapshot, "REFRESH_COALESCE_SECONDS", 0)
+    # 测试结束后恢复，已关闭的事件循环不再接收刷新请求
+    monkeypatch.setattr(analytics_snapshot, "_loop", None)
+    monkeypatch.setattr(analytics_snapshot, "_refresh_event", None)
+    return state
+
+
+def test_reads_compute_on_request_before_first_snapshot(sources):
+    assert get_snapshot() is None
+    assert snapshot_headers() == {}
+    assert asyncio.run(read_analysis("salary")) == ({"total_positions": 3}, None)
+    sources["total"] = 4
+    assert asyncio.run(read_analysis("salary")) == ({"total_positions": 4}, None)
+
+
+def test_refresh_swaps_immutable_snapshots(sources):
+    received = []
+    analytics_snapshot.register_snapshot_listener(received.append)
+
+    first = asyncio.run(refresh_snapshot())
+    assert (first.generation, first.changed) == (1, True)
+    assert get_snapshot() is first
+    assert snapshot_headers()["X-Snapshot-Generation"] == "1"
+    with pytest.raises(TypeError):
+        first.results["salary"] = {}
+
+    # 数据未变化：代数递增但标记为未变化
+    second = asyncio.run(refresh_snapshot())
+    assert (second.generation, second.changed) == (2, False)
+
+    sources["total"] = 7
+    third = asyncio.run(refresh_snapshot())
+    assert (third.generation, third.changed) == (3, True)
+    assert received == [first, second, third]
+
+    # 请求读取最新快照，不再调用计算函数；先前取得的快照保持不变
+    calls = sources["calls"]
+    result, snapshot = asyncio.run(read_analysis("city"))
+    assert (result, snapshot) == ({"city_job_distribution": {"北京": 7}}, third)
+    assert sources["calls"] == calls
+    assert first.results["salary"] == {"total_positions": 3}
+
+
+def test_job_change_triggers_background_refresh(sources):
+    async def scenario():
+        task = asyncio.create_task(analytics_snapshot.run_snapshot_refresher(interval=60))
+        try:
+            while get_snapshot() is None:
+                await asyncio.sleep(0.01)
+            assert get_snapshot().generation == 1
+
+            sources["total"] = 9
+            # 监听器可能在其他线程中调用
+            await asyncio.to_thread(publish_job_change, added=[])
+            for _ in range(200):
+                if get_snapshot().generation == 2:
+                    break
+                await asyncio.sleep(0.01)
+            snapshot = get_snapshot()
+            assert (snapshot.generation, snapshot.changed) == (2, True)
+            assert snapshot.results["salary"] == {"total_positions": 9}
+        finally:
+            task.cancel()
+
+    asyncio.run(scenario())
@@ -0,0 +1,117 @@
+"""
+实时分析推送：视图差异的计算；新订阅者只收到一次完整快照，之后只收到差异；
+职位变更在合并等待后计算一次差异并推送，不依赖分析快照的刷新
+"""
+import asyncio
+import json
+import pytest
+from core import analytics_stream
+from core.analytics_stream import AnalyticsBroadcaster, diff_views
+
+VIEW = {
+    "total_jobs": 3,
+    "city_salaries": {"北京": 20000, "上海": 18000},
+    "experience_counts": {"1-3年": 2, "3-5年": 1},
+}
+
+
+def parse(message: str) -> tuple:
+    event, data = message.strip().split("\n")
+    return event[len("event: "):], json.loads(data[len("data: "):])
+
+
+def drain(queue: asyncio.Queue) -> list:
+    messages = []
+    while not queue.empty():
+        messages.append(parse(queue.get_nowait()))
+    return messages
+
+
+def test_diff_views_reports_changes_removals_and_order():
+    current = {
+        "total_jobs": 4,
+        "city_salaries": {"上海": 21000, "北京": 20000},
+        "experience_counts": {"1-3年": 2},
+    }
+    assert diff_views(VIEW, current) == {
+        "total_jobs": 4,
+        "city_salaries": {"changed": {"上海": 21000}, "order": ["上海", "北京"]},
+        "experience_counts": {"removed": ["3-5年"]},
+    }
+    assert diff_views(current, current) == {}
+
+
+def test_subscriber_receives_one_snapshot_then_deltas():
+    broadcaster = AnalyticsBroadcaster()
+    first, message = broadcaster.subscribe(VIEW)
+    assert parse(message) == ("snapshot", {"generation": 1, **VIEW})
+    # 初始快照只通过返回值给出，队列中没有重复的快照
+    assert first.empty()
+
+    # 已有视图时，后来的订阅者拿到的是当前视图而不是自己计算的旧视图
+    second, message = broadcaster.subscribe({"total_jobs": 0})
+    assert parse(message)[1]["total_jobs"] == 3
+
+    broadcaster.publish(dict(VIEW, total_jobs=5))
+    broadcaster.publish(dict(VIEW, total_jobs=5))
+    for queue in (first, second):
+        assert drain(queue) == [("delta", {"generation": 2, "total_jobs": 5})]
+
+    broadcaster.unsubscribe(first)
+    broadcaster.publish(VIEW)
+    assert drain(first) == []
+    assert drain(second) == [("delta", {"generation": 3, "total_jobs": 3})]
+
+
+def test_slow_subscriber_gets_full_snapshot_instead_of_backlog():
+    broadcaster = AnalyticsBroadcaster(queue_size=2)
+    queue, _ = broadcaster.subscribe(VIEW)
+    for total in range(10, 15):
+        broadcaster.publish(dict(VIEW, total_jobs=total))
+    # 队列满时清空积压，只保留当前视图的完整快照
+    assert drain(queue) == [("snapshot", {"generation": 6, **dict(VIEW, total_jobs=14)})]
+    broadcaster.publish(dict(VIEW, total_jobs=15))
+    assert drain(queue) == [("delta", {"generation": 7, "total_jobs": 15})]
+
+
+def test_job_changes_push_debounced_deltas(monkeypatch):
+    views = []
+
+    async def compute_view():
+        views.append(dict(VIEW, total_jobs=VIEW["total_jobs"] + len(views) + 1))
+        return views[-1]
+
+    monkeypatch.setattr(analytics_stream, "_compute_view", compute_view)
+
+    async def scenario():
+        broadcaster = AnalyticsBroadcaster(debounce_seconds=0.05)
+        broadcaster.bind(asyncio.get_running_loop())
+        queue, _ = broadcaster.subscribe(VIEW)
+        # 短时间内的多次写入只计算一次
+        for _ in range(5):
+            broadcaster.request_update()
+        await asyncio.sleep(0.2)
+        assert len(views) == 1
+        assert drain(queue) == [("delta", {"generation": 2, "total_jobs": 4})]
+
+        broadcaster.request_update()
+        await asyncio.sleep(0.2)
+        assert drain(queue) == [("delta", {"generation": 3, "total_jobs": 5})]
+
+        # 没有订阅者时不计算，丢弃视图，下一个订阅者使用自己取得的视图
+        broadcaster.unsubscribe(queue)
+        broadcaster.request_update()
+        await asyncio.sleep(0.2)
+        assert len(views) == 2
+        _, message = broadcaster.subscribe(dict(VIEW, total_jobs=9))
+        assert parse(message)[1]["total_jobs"] == 9
+
+    asyncio.run(scenario())
+
+
+def test_request_update_without_bound_loop_is_ignored():
+    broadcaster = AnalyticsBroadcaster()
+    broadcaster.request_update()
+    queue, message = broadcaster.subscribe(VIEW)
+    assert parse(message)[0] == "snapshot"
+    assert queue.empty()
@@ -0,0 +1,121 @@
+"""
+近似分析：增删职位后蓄水池样本仍是剩余职位的等概率样本；样本覆盖全部职位时估计精确且区间宽度为0；
+重复抽样时95%置信区间覆盖真实值的比例接近置信水平；只有一个样本的层借用合并方差
+"""
+import random
+from collections import Counter
+import numpy as np
+import pytest
+from core.aggregation_engine import JobColumns
+from core.analysis_service import compute_city_analysis, compute_salary_analysis
+from core.approx_analysis import SampleFrame, approx_city_analysis, approx_salary_analysis
+from core.job_sample import JobSampler, ReservoirSample
+from tests.test_aggregation_engine import random_rows
+
+CITIES = ["北京", "上海", "深圳", "杭州"]
+
+
+def population_rows(rng: random.Random, count: int) -> list:
+    rows = []
+    for job_id in range(1, count + 1):
+        city = rng.choices(CITIES, weights=[5, 3, 2, 1])[0]
+        base = {"北京": 25000, "上海": 22000, "深圳": 20000, "杭州": 16000}[city]
+        salary_min = max(int(rng.gauss(base, 5000)), 0)
+        rows.append((job_id, salary_min, salary_min + rng.randint(0, 10) * 1000, city, "技术开发", "经验不限", "本科"))
+    return rows
+
+
+def test_reservoir_stays_uniform_after_deletions():
+    inclusions = Counter()
+    trials = 4000
+    for trial in range(trials):
+        sample = ReservoirSample(5, random.Random(trial))
+        for job_id in range(30):
+            sample.add((job_id,))
+        for job_id in range(0, 20, 2):
+            sample.remove(job_id)
+        for job_id in range(30, 35):
+            sample.add((job_id,))
+        ids = [row[0] for row in sample.rows()]
+        assert len(ids) == len(set(ids)) <= 5
+        assert sample.population == 25
+        inclusions.update(ids)
+    survivors = [job_id for job_id in range(35) if job_id >= 20 or job_id % 2]
+    assert set(inclusions) <= set(survivors)
+    mean = sum(inclusions.values()) / len(survivors)
+    for job_id in survivors:
+        assert abs(inclusions[job_id] - mean) < 0.15 * mean, job_id
+
+
+def test_full_sample_gives_exact_results_with_zero_width():
+    rows = random_rows(random.Random(2), 300)
+    rows = [(row[0], row[1] or 0, row[2] or 0, *row[3:]) for row in rows]
+    columns = JobColumns.from_rows(rows)
+    for strata in ([(len(rows), rows)], [
+        (len(group), group) for group in
+        ([row for row in rows if row[3] == city] for city in dict.fromkeys(row[3] for row in rows))
+    ]):
+        frame = SampleFrame(strata)
+        city = approx_city_analysis(frame, "test")
+        exact = compute_city_analysis(columns)
+        assert city["city_job_distribution"] == exact["city_job_distribution"]
+        assert city["city_average_salary"] == exact["city_average_salary"]
+        for city_name, (low, high) in city["confidence_intervals"]["city_job_distribution"].items():
+            assert low == high == exact["city_job_distribution"][city_name]
+        salary = approx_salary_analysis(frame, "test")
+        assert salary["average_salary"] == compute_salary_analysis(columns)["average_salary"]
+        low, high = salary["confidence_intervals"]["average_salary"]
+        assert high - low <= 1
+
+
+@pytest.mark.parametrize("sampling", ["uniform", "stratified"])
+def test_confidence_intervals_cover_true_values(sampling):
+    rng = random.Random(8)
+    rows = population_rows(rng, 4000)
+    true_mean = sum((row[1] + row[2]) // 2 for row in rows) / len(rows)
+    true_counts = Counter(row[3] for row in rows)
+    records = [dict(zip(["id", "salary_min", "salary_max", "city", "category",
+                         "experience_required", "education_required"], row)) for row in rows]
+    trials = 300
+    covered_mean = 0
+    covered_counts = 0
+    for trial in range(trials):
+        # 固定各蓄水池的随机数种子，使测试结果可复现
+        sampler = JobSampler(sample_size=200, stratum_size=50)
+        sampler.uniform = ReservoirSample(200, random.Random(trial))
+        for index, city in enumerate(CITIES):
+            sampler.by_city[city] = ReservoirSample(50, random.Random(trial * len(CITIES) + index))
+        sampler.apply(records, 1)
+        frame = SampleFrame(sampler.strata(sampling))
+        assert frame.population_size == len(rows)
+        low, high = frame.overall()["avg_salary_ci"]
+        covered_mean += low <= true_mean <= high + 1
+        if sampling == "uniform":
+            low, high = frame.estimate(frame.columns.city)["杭州"]["count_ci"]
+            covered_counts += low <= true_counts["杭州"] <= high
+    assert covered_mean / trials > 0.88
+    if sampling == "uniform":
+        assert covered_counts / trials > 0.88
+
+
+def test_single_sample_strata_borrow_pooled_variance():
+    rows = population_rows(random.Random(4), 200)
+    by_city = {city: [row for row in rows if row[3] == city] for city in CITIES}
+    # 上海、杭州各只抽到一个样本
+    strata = [
+        (len(by_city["北京"]), by_city["北京"][:20]),
+        (len(by_city["上海"]), by_city["上海"][:1]),
+        (len(by_city["深圳"]), by_city["深圳"][:20]),
+        (len(by_city["杭州"]), by_city["杭州"][:1]),
+    ]
+    frame = SampleFrame(strata)
+    assert frame.pooled_variance_strata == 2
+    estimates = frame.estimate(frame.columns.city)
+    for city in ["上海", "杭州"]:
+        assert estimates[city]["count"] == len(by_city[city])
+        low, high = estimates[city]["avg_salary_ci"]
+        # 借用的方差为正，区间有宽度且不为 NaN
+        assert high > low
+    overall = frame.overall()
+    assert np.isfinite(overall["avg_salary"])
+    assert overall["count"] == len(rows)
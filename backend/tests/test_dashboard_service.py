@@ -0,0 +1,85 @@
+"""
+仪表盘批量接口：各面板的数据与对应单独接口的响应一致；没有快照时只查询一次职位表；
+有快照时直接取自快照；不支持的面板返回400
+"""
+import asyncio
+import json
+import random
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from database.database import SessionLocal, engine
+from models import Base, Job
+from api import router
+from core import analytics_snapshot
+from core.dashboard_service import DASHBOARD_PANELS, get_dashboard
+from core.job_events import publish_job_change, replay_job_events
+from tests.test_aggregation_engine import random_rows
+
+app = FastAPI()
+app.include_router(router, prefix="/api/v1")
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(analytics_snapshot, "_current", None)
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(9)
+    db = SessionLocal()
+    try:
+        for job_id, salary_min, salary_max, city, category, experience, education in random_rows(rng, 400):
+            db.add(Job(
+                id=job_id, title="职位", company="公司",
+                salary_min=salary_min or 0, salary_max=max(salary_min or 0, salary_max or 0),
+                city=city or "北京", category=category, experience_required=experience or "经验不限",
+                education_required=education or "本科", description="", requirements="",
+                tags=json.dumps(rng.sample(["Python", "Java", "Go", "Vue", "MySQL"], rng.randint(0, 3)))
+            ))
+        db.commit()
+    finally:
+        db.close()
+    replay_job_events()
+    try:
+        yield TestClient(app)
+    finally:
+        publish_job_change(reset=True)
+        Base.metadata.drop_all(bind=engine)
+
+
+def test_panels_match_individual_endpoints(client):
+    dashboard = client.get("/api/v1/analysis/dashboard")
+    assert dashboard.status_code == 200
+    panels = dashboard.json()["panels"]
+    assert list(panels) == list(DASHBOARD_PANELS)
+    for panel, data in panels.items():
+        assert data == client.get(f"/api/v1/analysis/{panel}").json(), panel
+
+
+def test_selected_panels_in_request_order(client):
+    response = client.get("/api/v1/analysis/dashboard", params={"panels": "real-time,city,real-time"})
+    assert list(response.json()["panels"]) == ["real-time", "city"]
+    response = client.get("/api/v1/analysis/dashboard", params={"panels": "city,unknown"})
+    assert response.status_code == 400
+
+
+def test_one_scan_without_snapshot_and_none_with_snapshot(client):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        data, snapshot = asyncio.run(get_dashboard(list(DASHBOARD_PANELS)))
+        assert snapshot is None
+        assert len([statement for statement in statements if "FROM jobs" in statement]) == 1
+
+        current = asyncio.run(analytics_snapshot.refresh_snapshot())
+        statements.clear()
+        from_snapshot, snapshot = asyncio.run(get_dashboard(list(DASHBOARD_PANELS)))
+        assert snapshot is current
+        assert statements == []
+        assert from_snapshot == data
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
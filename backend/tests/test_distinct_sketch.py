@@ -0,0 +1,119 @@
+"""
+去重计数草图：HyperLogLog 的估计误差在理论标准误差的范围内，合并结果与整体加入一致；
+随机修改、删除职位后，各城市、类别的估计与职位表中的精确去重数一致，没有职位的取值不再列出
+"""
+import asyncio
+import json
+import random
+import pytest
+from database.database import SessionLocal, engine
+from models import Base, Job
+from core import job_service
+from core.distinct_sketch import NUM_REGISTERS, HyperLogLog, distinct_sketches, get_distinct_counts
+from core.job_events import publish_job_change, replay_job_events
+from schemas.job import JobUpdate
+from utils.data_utils import parse_job_tags
+
+STANDARD_ERROR = 1.04 / NUM_REGISTERS ** 0.5
+CITIES = ["北京", "上海", "深圳", "杭州", "成都"]
+CATEGORIES = ["技术开发", "产品", "运营"]
+
+
+@pytest.mark.parametrize("cardinality", [10, 1000, 20000, 200000])
+def test_estimate_within_standard_error(cardinality):
+    sketch = HyperLogLog()
+    for value in range(cardinality):
+        sketch.add(f"值{value}")
+    # 重复加入不改变估计
+    for value in range(0, cardinality, 7):
+        sketch.add(f"值{value}")
+    # 小基数时线性计数几乎精确，其余情况允许4倍标准误差
+    assert abs(sketch.count() - cardinality) <= max(1, 4 * STANDARD_ERROR * cardinality)
+
+
+def test_merge_equals_sketch_of_union():
+    left, right, union = HyperLogLog(), HyperLogLog(), HyperLogLog()
+    for value in range(30000):
+        (left if value % 3 else right).add(str(value))
+        union.add(str(value))
+    assert (left.merge(right).registers == union.registers).all()
+    assert HyperLogLog().count() == 0
+
+
+@pytest.fixture
+def seeded_jobs():
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(12)
+    db = SessionLocal()
+    try:
+        for index in range(300):
+            db.add(Job(
+                title=f"职位{rng.randint(1, 80)}",
+                company=f"公司{rng.randint(1, 120)}",
+                city=rng.choice(CITIES),
+                category=rng.choice(CATEGORIES),
+                tags=json.dumps(rng.sample(["Python", "Java", "Go", "Vue", "MySQL", "Redis"], 2)),
+                salary_min=10000, salary_max=20000, experience_required="经验不限", education_required="本科",
+                description="", requirements="",
+            ))
+        db.commit()
+    finally:
+        db.close()
+    replay_job_events()
+    try:
+        yield rng
+    finally:
+        publish_job_change(reset=True)
+        Base.metadata.drop_all(bind=engine)
+
+
+def exact_counts(dimension: str) -> dict:
+    db = SessionLocal()
+    try:
+        jobs = db.query(Job).all()
+    finally:
+        db.close()
+    groups = {}
+    for job in jobs:
+        key = getattr(job, dimension)
+        group = groups.setdefault(key, {"companies": set(), "titles": set(), "skills": set()})
+        group["companies"].add(job.company)
+        group["titles"].add(job.title)
+        group["skills"].update(parse_job_tags(job.tags))
+    return {key: {target: len(values) for target, values in group.items()} for key, group in groups.items()}
+
+
+def assert_counts_match_table():
+    for dimension in ("city", "category"):
+        expected = exact_counts(dimension)
+        result = get_distinct_counts(dimension)["distinct_counts"]
+        # 取值不超过几百个时线性计数的估计几乎精确
+        assert set(result) == set(expected)
+        for value, counts in result.items():
+            for target, count in counts.items():
+                assert abs(count - expected[value][target]) <= 2, (dimension, value, target)
+
+
+def test_removed_and_updated_jobs_no_longer_counted(seeded_jobs):
+    rng = seeded_jobs
+    assert_counts_match_table()
+
+    db = SessionLocal()
+    try:
+        ids = [job_id for (job_id,) in db.query(Job.id)]
+        chengdu = [job_id for (job_id,) in db.query(Job.id).filter(Job.city == "成都")]
+    finally:
+        db.close()
+    # 成都的职位全部迁走，取值不再列出
+    for job_id in chengdu:
+        asyncio.run(job_service.update_job(job_id, JobUpdate(city="北京", company="迁入公司")))
+    for job_id in rng.sample([job_id for job_id in ids if job_id not in chengdu], 60):
+        if rng.random() < 0.5:
+            asyncio.run(job_service.delete_job(job_id))
+        else:
+            asyncio.run(job_service.update_job(job_id, JobUpdate(
+                city=rng.choice(CITIES[:4]), title=f"新职位{rng.randint(1, 30)}", company=f"新公司{rng.randint(1, 30)}"
+            )))
+    assert "成都" not in distinct_sketches.values("city")
+    assert_counts_match_table()
+    assert not distinct_sketches._dirty
@@ -0,0 +1,170 @@
+"""
+筛选位图索引：压缩位图与 Python 集合对比，覆盖数组块与位集块之间的转换；
+随机新增、修改、删除职位后，多条件筛选和分面统计与逐条比较的结果对比
+"""
+import random
+from collections import Counter
+import numpy as np
+import pytest
+from core.job_filter_index import (
+    ARRAY_CONTAINER_MAX, FILTER_DIMENSIONS, SALARY_DIMENSION, Bitmap, JobFilterIndex, _dimension_value, _is_bitset
+)
+
+CITIES = ["北京", "上海", "深圳", "杭州", None]
+CATEGORIES = ["技术开发", "产品", "运营"]
+EXPERIENCES = ["1-3年", "3-5年", "经验不限"]
+EDUCATIONS = ["本科", "硕士", None]
+
+
+def random_ids(rng: random.Random, count: int, containers: int = 3) -> set:
+    """分布在若干个高16位块中的随机职位ID"""
+    return {(rng.randrange(containers) << 16) | rng.randrange(65536) for _ in range(count)}
+
+
+def assert_bitmap(bitmap: Bitmap, expected: set) -> None:
+    assert bitmap.to_array().tolist() == sorted(expected)
+    assert len(bitmap) == len(expected)
+    assert bool(bitmap) == bool(expected)
+    for container in bitmap._containers.values():
+        # 块的存储方式与元素数一致，空块不保留
+        cardinality = len(np.unpackbits(container).nonzero()[0]) if _is_bitset(container) else len(container)
+        assert cardinality > 0
+        assert _is_bitset(container) == (cardinality > ARRAY_CONTAINER_MAX)
+
+
+def test_add_and_discard_convert_between_array_and_bitset():
+    rng = random.Random(1)
+    bitmap = Bitmap()
+    expected = set()
+    values = rng.sample(range(65536), ARRAY_CONTAINER_MAX + 500)
+    for value in values:
+        bitmap.add(value)
+        expected.add(value)
+    assert _is_bitset(bitmap._containers[0])
+    assert_bitmap(bitmap, expected)
+
+    # 重复添加不改变结果
+    bitmap.add(values[0])
+    assert_bitmap(bitmap, expected)
+
+    for value in values[:600]:
+        bitmap.discard(value)
+        expected.discard(value)
+    assert not _is_bitset(bitmap._containers[0])
+    assert_bitmap(bitmap, expected)
+
+    for value in values[600:]:
+        bitmap.discard(value)
+    bitmap.discard(values[0])
+    assert not bitmap
+    assert bitmap._containers == {}
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_random_updates_and_set_operations_match_python_sets(seed):
+    rng = random.Random(seed)
+    sizes = [rng.choice([10, 3000, 4096, 4097, 9000]) for _ in range(2)]
+    left_ids, right_ids = random_ids(rng, sizes[0], 2), random_ids(rng, sizes[1], 2)
+    left, right = Bitmap.from_ids(left_ids), Bitmap.from_ids(sorted(right_ids))
+    assert_bitmap(left, left_ids)
+    assert_bitmap(right, right_ids)
+
+    for _ in range(3000):
+        job_id = (rng.randrange(2) << 16) | rng.randrange(65536)
+        if rng.random() < 0.5:
+            left.add(job_id)
+            left_ids.add(job_id)
+        else:
+            left.discard(job_id)
+            left_ids.discard(job_id)
+    assert_bitmap(left, left_ids)
+
+    assert_bitmap(left & right, left_ids & right_ids)
+    assert_bitmap(right & left, left_ids & right_ids)
+    assert_bitmap(left | right, left_ids | right_ids)
+    assert_bitmap(right | left, left_ids | right_ids)
+    for job_id in rng.sample(sorted(left_ids | right_ids), 200) + list(random_ids(rng, 200)):
+        assert (job_id in left) == (job_id in left_ids)
+    # 集合运算不修改参与运算的位图
+    assert_bitmap(left, left_ids)
+    assert_bitmap(right, right_ids)
+
+
+def random_job(rng: random.Random, job_id: int) -> dict:
+    salary_min = rng.choice([0, 3000, 8000, 12000, 18000, 25000, 40000])
+    return {
+        "id": job_id,
+        "city": rng.choice(CITIES),
+        "category": rng.choice(CATEGORIES),
+        "experience_required": rng.choice(EXPERIENCES),
+        "education_required": rng.choice(EDUCATIONS),
+        "salary_min": salary_min,
+        "salary_max": salary_min + rng.choice([0, 5000, 10000]),
+    }
+
+
+def random_conditions(rng: random.Random, index: JobFilterIndex) -> dict:
+    conditions = {}
+    for dimension in rng.sample(list(FILTER_DIMENSIONS), rng.randint(0, 3)):
+        choices = index.values(dimension) + ["不存在"]
+        conditions[dimension] = rng.sample(choices, rng.randint(1, min(2, len(choices))))
+    return conditions
+
+
+def brute_select(records: dict, conditions: dict) -> list:
+    return sorted(
+        job_id for job_id, record in records.items()
+        if all(_dimension_value(record, dimension) in values for dimension, values in conditions.items())
+    )
+
+
+def brute_facets(records: dict, matched: list, dimension: str) -> dict:
+    counts = Counter(_dimension_value(records[job_id], dimension) for job_id in matched)
+    counts.pop(None, None)
+    return dict(counts)
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_select_and_facets_match_brute_force_after_random_changes(seed):
+    rng = random.Random(seed)
+    index = JobFilterIndex()
+    records = {}
+    next_id = 1
+    for _ in range(10):
+        added = [random_job(rng, next_id + offset) for offset in range(rng.randint(20, 200))]
+        # 职位ID跨越多个高16位块
+        next_id += len(added) + rng.choice([0, 0, 70000])
+        index.add(added)
+        records.update((record["id"], record) for record in added)
+        for job_id in rng.sample(sorted(records), min(len(records), rng.randint(0, 40))):
+            updated = random_job(rng, job_id)
+            index.remove([records[job_id]])
+            index.add([updated])
+            records[job_id] = updated
+        removed = [records.pop(job_id) for job_id in rng.sample(sorted(records), min(len(records), rng.randint(0, 40)))]
+        index.remove(removed)
+
+        for dimension in index.dimensions:
+            # 没有职位的取值不保留空位图
+            assert set(index.values(dimension)) == {_dimension_value(record, dimension) for record in records.values()}
+
+        for _ in range(20):
+            conditions = random_conditions(rng, index)
+            selected = index.select(conditions)
+            expected = brute_select(records, conditions)
+            if not conditions:
+                assert selected is None
+                matched = None
+            else:
+                assert selected.to_array().tolist() == expected
+                matched = selected
+            for dimension in index.dimensions:
+                facets = index.facet_counts(dimension, matched)
+                counts = brute_facets(records, expected, dimension)
+                if dimension == SALARY_DIMENSION:
+                    assert {item["value"]: item["count"] for item in facets if item["count"]} == counts
+                else:
+                    assert facets == [
+                        {"value": value, "count": count}
+                        for value, count in sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+                    ]
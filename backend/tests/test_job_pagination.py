@@ -0,0 +1,196 @@
+"""
+游标分页：在含重复值和 NULL 排序键的随机职位上，逐页向后、向前翻页的结果与按定义排序的完整列表对比，
+数据库分页（keyset_page）与内存分页（keyset_page_in_memory）结果一致；
+在匹配职位子集内分页（按ID二分查找、按其他字段分批查询后合并）与在内存中对子集分页结果一致
+"""
+import random
+from datetime import datetime, timedelta
+import pytest
+from database.database import SessionLocal, engine
+from models import Job
+from core import job_service
+from core.job_pagination import (
+    RELEVANCE, Cursor, decode_cursor, keyset_page, keyset_page_in_ids, keyset_page_in_memory, parse_sort
+)
+
+SORTS = ["id", "-id", "salary_max", "-salary_max", "created_at", "-created_at"]
+
+
+@pytest.fixture(scope="module")
+def db():
+    Job.__table__.create(bind=engine, checkfirst=True)
+    rng = random.Random(7)
+    start = datetime(2024, 1, 1, 9, 30)
+    session = SessionLocal()
+    session.add_all([
+        Job(
+            title=f"职位{index}",
+            salary_max=rng.choice([None, 10000, 15000, 20000, 20000, 30000]),
+            created_at=rng.choice([start, start + timedelta(days=1), start + timedelta(hours=5, seconds=7)]),
+        )
+        for index in range(97)
+    ])
+    session.flush()
+    # 插入时显式的 None 会被列默认值替换，创建时间为空的职位改为插入后再置空
+    session.query(Job).filter(Job.id % 6 == 0).update({Job.created_at: None}, synchronize_session=False)
+    session.commit()
+    try:
+        yield session
+    finally:
+        session.close()
+        Job.__table__.drop(bind=engine)
+
+
+def expected_order(rows: dict, sort: str) -> list:
+    """按 (排序键, 职位ID) 排序，NULL 视为最小值"""
+    _, descending = parse_sort(sort)
+    key = lambda job_id: (rows[job_id] is not None, rows[job_id] or 0, job_id)
+    return sorted(rows, key=key, reverse=descending)
+
+
+def sort_keys(db, sort: str) -> dict:
+    field, _ = parse_sort(sort)
+    return {job.id: getattr(job, field) for job in db.query(Job).all()}
+
+
+def walk_forward(fetch, sort: str, limit: int) -> list:
+    pages, cursor = [], None
+    while True:
+        ids, next_cursor, prev_cursor = fetch(cursor)
+        assert (prev_cursor is None) == (cursor is None)
+        pages.append(ids)
+        if next_cursor is None:
+            return pages
+        assert len(ids) == limit
+        cursor = decode_cursor(next_cursor, sort)
+
+
+def last_page(fetch, sort: str) -> tuple:
+    """向后翻到最后一页，返回 (最后一页的职位ID, 上一页游标)"""
+    cursor = None
+    while True:
+        ids, next_cursor, prev_cursor = fetch(cursor)
+        if next_cursor is None:
+            return ids, prev_cursor
+        cursor = decode_cursor(next_cursor, sort)
+
+
+def walk_backward(fetch, sort: str, last_prev: str) -> list:
+    pages, token = [], last_prev
+    while token is not None:
+        ids, next_cursor, token = fetch(decode_cursor(token, sort))
+        assert next_cursor is not None
+        pages.insert(0, ids)
+    return pages
+
+
+def database_fetch(db, sort: str, limit: int):
+    def fetch(cursor):
+        jobs, next_cursor, prev_cursor = keyset_page(db.query(Job), sort, cursor, limit)
+        return [job.id for job in jobs], next_cursor, prev_cursor
+    return fetch
+
+
+def memory_fetch(keys: dict, sort: str, limit: int):
+    def fetch(cursor):
+        return keyset_page_in_memory(keys, sort, cursor, limit)
+    return fetch
+
+
+@pytest.mark.parametrize("sort", SORTS)
+@pytest.mark.parametrize("limit", [1, 7, 20, 200])
+def test_database_pages_follow_sort_order_with_nulls(db, sort, limit):
+    keys = sort_keys(db, sort)
+    if parse_sort(sort)[0] != "id":
+        assert None in keys.values()
+    expected = expected_order(keys, sort)
+    pages = walk_forward(database_fetch(db, sort, limit), sort, limit)
+    assert [job_id for page in pages for job_id in page] == expected
+    assert pages == walk_forward(memory_fetch(keys, sort, limit), sort, limit)
+
+
+@pytest.mark.parametrize("sort", SORTS)
+@pytest.mark.parametrize("limit", [3, 10])
+def test_backward_cursors_return_preceding_rows(db, sort, limit):
+    keys = sort_keys(db, sort)
+    expected = expected_order(keys, sort)
+    for fetch in (database_fetch(db, sort, limit), memory_fetch(keys, sort, limit)):
+        # 从最后一页的上一页游标一路向前翻到第一页
+        ids, prev_cursor = last_page(fetch, sort)
+        backward = walk_backward(fetch, sort, prev_cursor)
+        assert [job_id for page in backward for job_id in page] + ids == expected
+        assert all(len(page) == limit for page in backward[1:])
+
+        # 向前翻页得到的页再向后翻，回到原来的位置
+        if backward:
+            middle = backward[len(backward) // 2]
+            position = expected.index(middle[-1]) + 1
+            following, _, _ = fetch(Cursor(sort, keys[middle[-1]], middle[-1], False))
+            assert following == expected[position:position + limit]
+
+
+@pytest.mark.parametrize("sort", SORTS)
+@pytest.mark.parametrize("limit", [1, 6, 200])
+def test_matched_subset_pages_without_loading_all_sort_keys(db, sort, limit, monkeypatch):
+    # 每批只有少量职位，覆盖多批结果的合并
+    monkeypatch.setattr(job_service, "SEARCH_VERIFY_BATCH", 9)
+    keys = sort_keys(db, sort)
+    matched_ids = sorted(random.Random(limit).sample(sorted(keys), 61))
+    subset = {job_id: keys[job_id] for job_id in matched_ids}
+    expected = expected_order(subset, sort)
+
+    def matched_fetch(cursor):
+        return job_service._matched_page(db, matched_ids, sort, cursor, limit)
+
+    pages = walk_forward(matched_fetch, sort, limit)
+    assert [job_id for page in pages for job_id in page] == expected
+    assert pages == walk_forward(memory_fetch(subset, sort, limit), sort, limit)
+    ids, prev_cursor = last_page(matched_fetch, sort)
+    backward = walk_backward(matched_fetch, sort, prev_cursor)
+    assert [job_id for page in backward for job_id in page] + ids == expected
+
+
+@pytest.mark.parametrize("sort", ["id", "-id"])
+def test_id_pages_bisect_sorted_ids(sort):
+    job_ids = sorted(random.Random(2).sample(range(1, 500), 80))
+    keys = {job_id: job_id for job_id in job_ids}
+    for limit in (1, 7, 100):
+        fetch = lambda cursor: keyset_page_in_ids(job_ids, sort, cursor, limit)
+        pages = walk_forward(fetch, sort, limit)
+        assert pages == walk_forward(memory_fetch(keys, sort, limit), sort, limit)
+        ids, prev_cursor = last_page(fetch, sort)
+        backward = walk_backward(fetch, sort, prev_cursor)
+        assert [job_id for page in backward for job_id in page] + ids == expected_order(keys, sort)
+        # 游标指向的职位已不在列表中时从其位置继续
+        following, _, _ = fetch(Cursor(sort, 250, 250, False))
+        assert following == [job_id for job_id in expected_order(keys, sort) if (job_id > 250) == (sort == "id")][:limit]
+    assert keyset_page_in_ids([], sort, None, 5) == ([], None, None)
+
+
+def test_relevance_pages_in_memory():
+    rng = random.Random(3)
+    scores = {job_id: rng.choice([0.5, 1.25, 2.0, 3.75]) for job_id in range(1, 60)}
+    expected = sorted(scores, key=lambda job_id: (-scores[job_id], job_id))
+    fetch = memory_fetch(scores, RELEVANCE, 8)
+    pages = walk_forward(fetch, RELEVANCE, 8)
+    assert [job_id for page in pages for job_id in page] == expected
+    ids, prev_cursor = last_page(fetch, RELEVANCE)
+    backward = walk_backward(fetch, RELEVANCE, prev_cursor)
+    assert [job_id for page in backward for job_id in page] + ids == expected
+
+
+def test_cursor_round_trip_and_validation():
+    key = datetime(2024, 3, 1, 12, 0, 5)
+    token = Cursor("-created_at", key, 42, True).encode()
+    cursor = decode_cursor(token, "-created_at")
+    assert (cursor.sort, cursor.key, cursor.job_id, cursor.backward) == ("-created_at", key, 42, True)
+    assert decode_cursor(Cursor("salary_max", None, 5, False).encode(), "salary_max").key is None
+
+    with pytest.raises(ValueError):
+        decode_cursor(token, "created_at")
+    with pytest.raises(ValueError):
+        decode_cursor(token, "-salary_max")
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor", "id")
+    with pytest.raises(ValueError):
+        decode_cursor(Cursor("id", 1, 1, False).encode()[:-3], "id")
@@ -0,0 +1,228 @@
+"""
+职位查询结果缓存：失效版本号防止写入过期结果；随机变更后按匹配条件精确失效，
+保留下来的条目与逐条比较的结果一致；职位列表和搜索接口的缓存结果与清空缓存后直接查询数据库的结果一致
+"""
+import asyncio
+import random
+import pytest
+from database.database import SessionLocal, engine
+from models import Base, Job
+from core import job_service
+from core.job_events import JobChangeEvent, publish_job_change, replay_job_events
+from core.job_query_cache import JobQueryCache, corpus_changed, job_query_cache
+from schemas.job import JobCreate, JobUpdate
+
+CITIES = ["北京", "上海", "深圳", "杭州"]
+CATEGORIES = ["技术开发", "数据智能", "产品"]
+EXPERIENCES = ["1-3年", "3-5年", "经验不限"]
+EDUCATIONS = ["本科", "硕士"]
+TITLES = ["Python 数据工程师", "前端开发", "数据分析师", "产品经理", "Java 后端"]
+
+
+def random_record(rng: random.Random, job_id: int) -> dict:
+    salary_min = rng.randint(3, 40) * 1000
+    return {
+        "id": job_id,
+        "title": rng.choice(TITLES),
+        "company": f"公司{rng.randint(1, 5)}",
+        "city": rng.choice(CITIES),
+        "salary_min": salary_min,
+        "salary_max": salary_min + rng.randint(0, 20) * 1000,
+        "experience_required": rng.choice(EXPERIENCES),
+        "education_required": rng.choice(EDUCATIONS),
+        "description": rng.choice(["负责数据平台开发", "负责用户增长", ""]),
+        "requirements": rng.choice(["熟悉MySQL", "熟悉Python", ""]),
+        "category": rng.choice(CATEGORIES),
+        "tags": rng.sample(["Python", "Java", "Vue", "MySQL"], 2),
+        "created_at": None,
+    }
+
+
+def random_filters(rng: random.Random) -> tuple:
+    return (
+        rng.choice([None, "Python", "数据"]),
+        rng.choice([None] + CITIES),
+        rng.choice([None, 10000, 25000]),
+        rng.choice([None, 20000]),
+        rng.choice([None] + EXPERIENCES),
+        None,
+        rng.choice([None] + CATEGORIES),
+    )
+
+
+def test_set_is_skipped_when_version_changed_during_query():
+    cache = JobQueryCache()
+    record = {"id": 1, "city": "北京"}
+    version = cache.version
+    cache.invalidate([record])
+    cache.set("key", version, [1], lambda job: True)
+    cache.set_rows({1: "row"}, version)
+    assert cache.get("key") == (False, None)
+    assert cache.get_rows([1]) == {}
+
+    version = cache.version
+    cache.set("key", version, [1], lambda job: True)
+    cache.set_rows({1: "row"}, version)
+    assert cache.get("key") == (True, [1])
+    assert cache.get_rows([1]) == {1: "row"}
+
+    cache.clear()
+    cache.set("key", version, [1], lambda job: True)
+    assert cache.get("key") == (False, None)
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_invalidation_drops_exactly_the_entries_matching_changed_jobs(seed):
+    rng = random.Random(seed)
+    cache = JobQueryCache(max_entries=1000, bulk_limit=1000)
+    records = {job_id: random_record(rng, job_id) for job_id in range(1, 120)}
+    next_id = len(records) + 1
+    filters = {random_filters(rng) for _ in range(80)}
+    predicates = {key: job_service._list_predicate(*key) for key in filters}
+
+    def matching(key):
+        return sorted(job_id for job_id, record in records.items() if predicates[key](record))
+
+    for _ in range(15):
+        for key in filters:
+            if not cache.get(key)[0]:
+                cache.set(key, cache.version, matching(key), predicates[key])
+
+        before = {job_id: dict(record) for job_id, record in records.items()}
+        changed_ids = rng.sample(sorted(records), rng.randint(1, 4))
+        for job_id in changed_ids:
+            if rng.random() < 0.3:
+                del records[job_id]
+            else:
+                records[job_id] = random_record(rng, job_id)
+        if rng.random() < 0.5:
+            records[next_id] = random_record(rng, next_id)
+            changed_ids.append(next_id)
+            next_id += 1
+        removed = [before[job_id] for job_id in changed_ids if job_id in before]
+        added = [records[job_id] for job_id in changed_ids if job_id in records]
+        cache.invalidate(removed + added)
+
+        for key in filters:
+            hit, value = cache.get(key)
+            affected = any(predicates[key](record) for record in removed + added)
+            # 受影响的条目全部丢弃，其余条目保留且仍与当前数据一致
+            assert hit != affected
+            if hit:
+                assert value == matching(key)
+
+
+def test_scored_entries_follow_corpus_statistics():
+    cache = JobQueryCache()
+    never = lambda record: False
+    cache.set("list", cache.version, [1], never)
+    cache.set("search", cache.version, [1], never, scored=True)
+    cache.invalidate([{"id": 5}], corpus_changed=False)
+    assert cache.get("search")[0] and cache.get("list")[0]
+    cache.invalidate([{"id": 5}], corpus_changed=True)
+    assert not cache.get("search")[0]
+    assert cache.get("list")[0]
+
+
+def test_corpus_changed_detects_indexed_field_changes_only():
+    rng = random.Random(9)
+    record = random_record(rng, 1)
+    moved = dict(record, city="成都", salary_max=record["salary_max"] + 1000)
+    retitled = dict(record, title=record["title"] + "（急招）")
+    retagged = dict(record, tags=record["tags"] + ["Go"])
+    assert not corpus_changed(JobChangeEvent(added=[moved], removed=[record]))
+    assert corpus_changed(JobChangeEvent(added=[retitled], removed=[record]))
+    assert corpus_changed(JobChangeEvent(added=[retagged], removed=[record]))
+    assert corpus_changed(JobChangeEvent(added=[random_record(rng, 2)]))
+    assert corpus_changed(JobChangeEvent(removed=[record]))
+
+
+def test_bulk_changes_ttl_and_capacity():
+    cache = JobQueryCache(max_entries=3, max_rows=2, bulk_limit=2)
+    never = lambda record: False
+    for key in "abc":
+        cache.set(key, cache.version, key, never)
+    cache.get("a")
+    cache.set("d", cache.version, "d", never)
+    # 最久未使用的 b 被淘汰
+    assert [key for key in "abcd" if cache.get(key)[0]] == ["a", "c", "d"]
+    cache.invalidate([{"id": job_id} for job_id in range(3)])
+    assert cache.stats()["entries"] == 0
+
+    cache.set_rows({1: "x", 2: "y", 3: "z"}, cache.version)
+    assert cache.get_rows([1, 2, 3]) == {2: "y", 3: "z"}
+
+    expired = JobQueryCache(ttl_seconds=0)
+    expired.set("a", expired.version, "a", never)
+    assert expired.get("a") == (False, None)
+
+
+@pytest.fixture
+def seeded_jobs():
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(5)
+    db = SessionLocal()
+    try:
+        for job_id in range(1, 121):
+            record = random_record(rng, job_id)
+            del record["id"], record["created_at"]
+            db.add(Job(**record))
+        db.commit()
+    finally:
+        db.close()
+    replay_job_events()
+    job_query_cache.clear()
+    try:
+        yield rng
+    finally:
+        # 让各内存索引回到空表状态
+        publish_job_change(reset=True)
+        Base.metadata.drop_all(bind=engine)
+
+
+def test_cached_pages_match_database_after_random_writes(seeded_jobs):
+    rng = seeded_jobs
+    queries = []
+    for _ in range(30):
+        keyword, city, salary_min, salary_max, experience, _, category = random_filters(rng)
+        queries.append(("jobs", dict(
+            skip=rng.choice([0, 5]), limit=5, keyword=keyword, city=city, salary_min=salary_min,
+            salary_max=salary_max, experience=experience, category=category,
+            facets=rng.choice([(), ("city", "salary")])
+        )))
+        queries.append(("search", dict(
+            q=rng.choice(["Python", "数据", "开发"]), city=city, salary_max=rng.choice([None, 30000]),
+            skip=0, limit=5, facets=rng.choice([(), ("category",)])
+        )))
+
+    def run(kind, arguments):
+        result = asyncio.run(job_service.get_jobs(**arguments) if kind == "jobs" else job_service.search_jobs(**arguments))
+        return result.model_dump() if hasattr(result, "model_dump") else [item.model_dump() for item in result]
+
+    def assert_cache_matches_database():
+        cached = [run(kind, arguments) for kind, arguments in queries]
+        job_query_cache.clear()
+        fresh = [run(kind, arguments) for kind, arguments in queries]
+        for query, cached_result, fresh_result in zip(queries, cached, fresh):
+            assert cached_result == fresh_result, query
+
+    for kind, arguments in queries:
+        run(kind, arguments)
+    assert_cache_matches_database()
+    for _ in range(4):
+        db = SessionLocal()
+        try:
+            ids = [job_id for (job_id,) in db.query(Job.id)]
+        finally:
+            db.close()
+        for job_id in rng.sample(ids, 5):
+            asyncio.run(job_service.update_job(job_id, JobUpdate(
+                city=rng.choice(CITIES), salary_max=rng.randint(10, 50) * 1000, title=rng.choice(TITLES)
+            )))
+        for job_id in rng.sample(ids, 2):
+            asyncio.run(job_service.delete_job(job_id))
+        record = random_record(rng, 0)
+        del record["id"], record["created_at"]
+        asyncio.run(job_service.create_job(JobCreate(**record)))
+        assert job_query_cache.stats()["entries"] > 0
+        assert_cache_matches_database()
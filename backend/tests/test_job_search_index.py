@@ -0,0 +1,277 @@
+"""
+职位全文倒排索引：在随机的新增、修改、删除之后与逐条子串匹配、按定义直接计算的 BM25F 得分、
+以及从头重建的索引对比
+"""
+import math
+import random
+from collections import Counter
+import pytest
+from core.job_search_index import (
+    BM25_B, BM25_K1, FIELD_WEIGHTS, JobSearchIndex, field_text, query_terms, tokenize
+)
+
+CJK_CHARS = "数据分析开发工程师产品运营算法"
+LATIN_WORDS = ["python", "mysql", "sql", "c++", "c#", "java", "javascript", "go", "react", "Docker", "SQLServer"]
+SEPARATORS = [" ", "", "，", "/", "、"]
+
+
+def random_text(rng: random.Random, pieces: int) -> str:
+    parts = []
+    for _ in range(pieces):
+        if rng.random() < 0.5:
+            parts.append("".join(rng.choice(CJK_CHARS) for _ in range(rng.randint(1, 4))))
+        else:
+            parts.append(rng.choice(LATIN_WORDS))
+        parts.append(rng.choice(SEPARATORS))
+    return "".join(parts)
+
+
+def random_job(rng: random.Random, job_id: int) -> dict:
+    return {
+        "id": job_id,
+        "title": random_text(rng, 2),
+        "company": random_text(rng, 1),
+        "tags": rng.sample(LATIN_WORDS, rng.randint(0, 3)),
+        "description": random_text(rng, 6) if rng.random() < 0.9 else None,
+        "requirements": random_text(rng, 4),
+    }
+
+
+def substring_matches(records: dict, keyword: str) -> set:
+    keyword = keyword.lower()
+    return {
+        job_id for job_id, record in records.items()
+        if any(keyword in (field_text(record, field) or "").lower() for field in JobSearchIndex().fields)
+    }
+
+
+def random_queries(rng: random.Random, records: dict, count: int) -> list:
+    queries = []
+    texts = [field_text(record, field) for record in records.values() for field in ("title", "description", "requirements")]
+    texts = [text for text in texts if text]
+    for _ in range(count):
+        choice = rng.random()
+        if choice < 0.5 and texts:
+            text = rng.choice(texts)
+            start = rng.randrange(len(text))
+            queries.append(text[start:start + rng.randint(1, 6)])
+        elif choice < 0.7:
+            word = rng.choice(LATIN_WORDS)
+            start = rng.randrange(len(word))
+            queries.append(word[start:start + rng.randint(1, len(word))].upper())
+        elif choice < 0.85:
+            queries.append("".join(rng.choice(CJK_CHARS) for _ in range(rng.randint(1, 3))))
+        else:
+            queries.append(f"{rng.choice(LATIN_WORDS)} {rng.choice(CJK_CHARS)}{rng.choice(CJK_CHARS)}")
+    return queries
+
+
+def assert_same_index(index: JobSearchIndex, records: dict) -> None:
+    expected = JobSearchIndex()
+    expected.add(records.values())
+    assert index.document_count == expected.document_count == len(records)
+    assert index.total_lengths == expected.total_lengths
+    assert index.lengths == expected.lengths
+    assert index._latin_grams == expected._latin_grams
+    for field in index.fields:
+        assert index.postings[field].keys() == expected.postings[field].keys()
+        for token, posting in index.postings[field].items():
+            assert list(posting.ids) == sorted(set(posting.ids))
+            assert list(posting.ids) == list(expected.postings[field][token].ids)
+            assert list(posting.frequencies) == list(expected.postings[field][token].frequencies)
+
+
+def reference_scores(records: dict, text: str, ids: set) -> dict:
+    """按 BM25F 的定义逐个职位计算得分：英文词匹配所有包含它的英文词，中文词精确匹配"""
+    terms, _ = query_terms(text)
+    tokens = {
+        job_id: {field: Counter(tokenize(field_text(record, field))) for field in FIELD_WEIGHTS}
+        for job_id, record in records.items()
+    }
+    averages = {
+        field: sum(sum(counts[field].values()) for counts in tokens.values()) / len(records) or 1.0
+        for field in FIELD_WEIGHTS
+    }
+    scores = dict.fromkeys(ids, 0.0)
+    for term, latin in terms:
+        def frequency(counts: Counter) -> int:
+            if not latin:
+                return counts.get(term, 0)
+            return sum(count for word, count in counts.items() if word[0] < "㐀" and term in word)
+
+        weighted = {}
+        for job_id, fields in tokens.items():
+            value = sum(
+                weight * frequency(fields[field])
+                / (1 - BM25_B + BM25_B * sum(fields[field].values()) / averages[field])
+                for field, weight in FIELD_WEIGHTS.items()
+            )
+            if value:
+                weighted[job_id] = value
+        idf = math.log(1 + (len(records) - len(weighted) + 0.5) / (len(weighted) + 0.5))
+        for job_id in ids & weighted.keys():
+            scores[job_id] += idf * weighted[job_id] / (BM25_K1 + weighted[job_id])
+    return scores
+
+
+def test_tokenize_splits_cjk_into_unigrams_and_bigrams():
+    assert tokenize("数据分析 C++/MySQL") == ["数", "据", "分", "析", "数据", "据分", "分析", "c++", "mysql"]
+    assert tokenize("C#、Go") == ["c#", "go"]
+    assert tokenize(None) == []
+    assert tokenize("，/ ") == []
+
+
+def test_query_terms_marks_exact_queries():
+    assert query_terms("SQL") == ([("sql", True)], True)
+    assert query_terms("数据") == ([("数据", False)], True)
+    assert query_terms("数") == ([("数", False)], True)
+    assert query_terms("数据分析") == ([("数据", False), ("据分", False), ("分析", False)], False)
+    assert query_terms("python 数据")[1] is False
+    # 带空格的关键词按原文匹配，不能只看索引词
+    assert query_terms(" sql")[1] is False
+    assert query_terms("++") == ([], False)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_candidates_match_substring_search_after_random_changes(seed):
+    rng = random.Random(seed)
+    index = JobSearchIndex()
+    records = {}
+    next_id = 1
+    for _ in range(8):
+        # 新增
+        added = [random_job(rng, next_id + offset) for offset in range(rng.randint(5, 40))]
+        next_id += len(added)
+        index.add(added)
+        records.update((record["id"], record) for record in added)
+        # 修改：先按旧值移除，再加入新值
+        for job_id in rng.sample(sorted(records), min(len(records), rng.randint(0, 10))):
+            updated = random_job(rng, job_id)
+            index.remove([records[job_id]])
+            index.add([updated])
+            records[job_id] = updated
+        # 删除
+        removed = [records.pop(job_id) for job_id in rng.sample(sorted(records), min(len(records), rng.randint(0, 10)))]
+        index.remove(removed)
+
+        assert_same_index(index, records)
+        for query in random_queries(rng, records, 40):
+            expected = substring_matches(records, query)
+            result = index.candidates(query)
+            if result is None:
+                assert not query_terms(query)[0]
+                continue
+            ids, exact = result
+            assert ids == sorted(ids)
+            assert expected <= set(ids), query
+            if exact:
+                assert set(ids) == expected, query
+
+
+def test_remove_all_records_leaves_empty_index():
+    rng = random.Random(42)
+    index = JobSearchIndex()
+    records = [random_job(rng, job_id) for job_id in range(1, 50)]
+    index.add(records)
+    index.remove(reversed(records))
+    assert index.document_count == 0
+    assert all(not postings for postings in index.postings.values())
+    assert all(not grams for grams in index._latin_grams.values())
+    assert all(total == 0 for total in index.total_lengths.values())
+
+
+def test_latin_expansion_matches_vocabulary_scan():
+    rng = random.Random(8)
+    index = JobSearchIndex()
+    records = {job_id: random_job(rng, job_id) for job_id in range(1, 80)}
+    index.add(records.values())
+    for field in index.fields:
+        vocabulary = [token for token in index.postings[field] if token[0] < "㐀"]
+        terms = {word[start:end] for word in vocabulary for start in range(len(word)) for end in range(start + 1, len(word) + 1)}
+        for term in sorted(terms) + ["sqlx", "pythonjava", "z"]:
+            assert index._latin_words(field, term) == sorted(word for word in vocabulary if term in word), term
+
+    # 扩展结果被缓存，英文词表变化后失效
+    assert index._latin_words("title", "sql") is index._latin_words("title", "sql")
+    index.add([{"id": 500, "title": "postgresql", "company": None, "tags": [], "description": None, "requirements": None}])
+    assert "postgresql" in index._latin_words("title", "sql")
+    assert "postgresql" in index._latin_words("title", "gresq")
+    index.remove([{"id": 500, "title": "postgresql", "company": None, "tags": [], "description": None, "requirements": None}])
+    assert "postgresql" not in index._latin_words("title", "sql")
+
+
+def test_candidates_restricted_to_fields():
+    index = JobSearchIndex()
+    index.add([
+        {"id": 1, "title": "Python开发", "company": "甲", "tags": [], "description": None, "requirements": None},
+        {"id": 2, "title": "产品经理", "company": "乙", "tags": ["python"], "description": None, "requirements": None},
+    ])
+    assert index.candidates("python") == ([1, 2], True)
+    assert index.candidates("python", fields=["title"]) == ([1], True)
+    assert index.candidates("开发", fields=["tags"]) == ([], True)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_bm25_scores_match_definition_after_random_changes(seed):
+    rng = random.Random(100 + seed)
+    index = JobSearchIndex()
+    records = {}
+    next_id = 1
+    for _ in range(5):
+        added = [random_job(rng, next_id + offset) for offset in range(rng.randint(10, 30))]
+        next_id += len(added)
+        index.add(added)
+        records.update((record["id"], record) for record in added)
+        for job_id in rng.sample(sorted(records), min(len(records), rng.randint(0, 8))):
+            updated = random_job(rng, job_id)
+            index.remove([records[job_id]])
+            index.add([updated])
+            records[job_id] = updated
+        removed = [records.pop(job_id) for job_id in rng.sample(sorted(records), min(len(records), rng.randint(0, 8)))]
+        index.remove(removed)
+
+        for query in random_queries(rng, records, 15):
+            if not query_terms(query)[0]:
+                continue
+            ids = set(index.candidates(query)[0])
+            expected = reference_scores(records, query, ids)
+            assert index.scores(query, ids) == pytest.approx(expected), query
+
+            ranked = sorted(expected.items(), key=lambda item: (-item[1], item[0]))[:5]
+            top = index.top(query, ids, 5)
+            assert [score for _, score in top] == pytest.approx([round(score, 4) for _, score in ranked], abs=1e-4)
+            assert [job_id for job_id, _ in top] == [job_id for job_id, _ in ranked]
+
+
+def test_bm25_scores_for_few_ids_bisect_into_long_postings():
+    rng = random.Random(21)
+    index = JobSearchIndex()
+    records = {job_id: random_job(rng, job_id) for job_id in range(1, 300)}
+    index.add(records.values())
+    for query in ["python", "sql", "数据", "java 开发", "c++"]:
+        matched = index.candidates(query)[0]
+        for size in (1, 3):
+            ids = set(rng.sample(matched, size)) | {10000}
+            assert index.scores(query, ids) == pytest.approx(reference_scores(records, query, ids)), query
+
+    # 文档频率在职位变更前缓存，变更后重新计算
+    frequency = index.document_frequency("python", True)
+    assert frequency == len(substring_matches(records, "python"))
+    assert index._document_frequencies[("python", True)] == frequency
+    removed = [records.pop(job_id) for job_id in index.candidates("python")[0][:5]]
+    index.remove(removed)
+    assert index.document_frequency("python", True) == frequency - 5
+
+
+def test_bm25_prefers_title_matches_and_rarer_terms():
+    index = JobSearchIndex()
+    base = {"company": "甲", "tags": [], "description": None, "requirements": None}
+    index.add([
+        {"id": 1, "title": "Python工程师", **base, "description": "负责运营"},
+        {"id": 2, "title": "运营专员", **base, "description": "会Python优先"},
+        {"id": 3, "title": "运营经理", **base},
+    ])
+    scores = index.scores("python", {1, 2})
+    assert scores[1] > scores[2] > 0
+    # 出现在更少职位中的词 idf 更高
+    assert index.scores("python", {2})[2] > index.scores("运营", {2})[2]
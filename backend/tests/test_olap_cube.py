@@ -0,0 +1,90 @@
+"""
+职位多维立方体：取值增多使各轴多次扩容、随机增删职位后，任意筛选与分组的汇总与逐条统计的结果一致
+"""
+import itertools
+import random
+import pytest
+from core.olap_cube import CUBE_DIMENSIONS, JobCube
+
+VALUES = {
+    "city": [f"城市{index}" for index in range(70)] + [None],
+    "category": [f"类别{index}" for index in range(9)],
+    "experience": ["1-3年", "3-5年", "经验不限", None],
+    "education": ["本科", "硕士", "大专"],
+}
+
+
+def random_record(rng: random.Random, job_id: int) -> dict:
+    salary_min = rng.randint(3, 60) * 1000
+    record = {"id": job_id, "salary_min": salary_min, "salary_max": salary_min + rng.randint(0, 30) * 1000}
+    for dimension, field in CUBE_DIMENSIONS.items():
+        record[field] = rng.choice(VALUES[dimension])
+    return record
+
+
+def brute_force(jobs: list, filters: dict, group_by: list) -> tuple:
+    groups = {}
+    for job in jobs:
+        if all(job[CUBE_DIMENSIONS[dimension]] in allowed for dimension, allowed in filters.items()):
+            key = tuple(job[CUBE_DIMENSIONS[dimension]] for dimension in group_by)
+            entry = groups.setdefault(key, [0, 0])
+            entry[0] += 1
+            entry[1] += (job["salary_min"] + job["salary_max"]) // 2
+    count = sum(entry[0] for entry in groups.values())
+    salary_sum = sum(entry[1] for entry in groups.values())
+    cells = {key: (entry[0], entry[1] // entry[0]) for key, entry in groups.items()} if group_by else {}
+    return {"count": count, "avg_salary": salary_sum // count if count else 0}, cells
+
+
+def assert_query_matches(cube: JobCube, jobs: list, filters: dict, group_by: list) -> None:
+    result = cube.query(filters, group_by)
+    total, cells = brute_force(jobs, filters, group_by)
+    assert result["total"] == total
+    assert {
+        tuple(cell[dimension] for dimension in group_by): (cell["count"], cell["avg_salary"])
+        for cell in result["cells"]
+    } == cells
+    counts = [cell["count"] for cell in result["cells"]]
+    assert counts == sorted(counts, reverse=True)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_queries_match_brute_force_after_growth_and_removals(seed):
+    rng = random.Random(seed)
+    cube = JobCube()
+    jobs = {}
+    next_id = 1
+    for _ in range(8):
+        added = [random_record(rng, job_id) for job_id in range(next_id, next_id + 150)]
+        next_id += len(added)
+        cube.apply(added, 1)
+        jobs.update((job["id"], job) for job in added)
+        removed = [jobs.pop(job_id) for job_id in rng.sample(sorted(jobs), 40)]
+        cube.apply(removed, -1)
+
+    # 城市轴从容量1开始翻倍扩容到至少71
+    assert cube.counts.shape[0] >= len(cube.values["city"]) > 64
+    dimensions = list(CUBE_DIMENSIONS)
+    remaining = list(jobs.values())
+    for size in range(len(dimensions) + 1):
+        for group_by in itertools.permutations(dimensions, size):
+            filters = {}
+            for dimension in rng.sample(dimensions, rng.randint(0, 2)):
+                filters[dimension] = rng.sample(VALUES[dimension], rng.randint(1, 3)) + ["不存在的取值"]
+            assert_query_matches(cube, remaining, filters, list(group_by))
+
+
+def test_removed_groups_disappear_and_clear_resets():
+    cube = JobCube()
+    rng = random.Random(5)
+    jobs = [random_record(rng, job_id) for job_id in range(1, 30)]
+    cube.apply(jobs, 1)
+    cube.apply(jobs, -1)
+    result = cube.query({}, ["city", "category"])
+    assert result["cells"] == []
+    assert result["total"] == {"count": 0, "avg_salary": 0}
+
+    cube.apply(jobs[:3], 1)
+    cube.clear()
+    assert cube.counts.shape == (1,) * len(CUBE_DIMENSIONS)
+    assert cube.query({"city": ["城市1"]}, ["city"])["total"]["count"] == 0
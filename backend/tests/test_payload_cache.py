@@ -0,0 +1,71 @@
+"""
+图表响应缓存：If-None-Match 与ETag一致时返回304；职位变化后ETag改变、旧ETag得到完整响应；
+数据未变化的快照刷新不改变ETag；缓存的响应体与直接序列化的结果一致
+"""
+import asyncio
+import pytest
+from core import analytics_snapshot, job_service
+from core.payload_cache import etag_matches, serialize_payload
+from schemas.job import JobCreate
+from tests.test_dashboard_service import client  # noqa: F401  共用职位数据和测试客户端
+
+ENDPOINTS = ["salary", "city-salary-ranking", "real-time", "dashboard"]
+
+
+@pytest.mark.parametrize("header,expected", [
+    (None, False),
+    ("", False),
+    ('"abc"', True),
+    ('W/"abc"', True),
+    ('"x", W/"abc"', True),
+    ("*", True),
+    ('"abcd"', False),
+])
+def test_etag_matches(header, expected):
+    assert etag_matches(header, '"abc"') is expected
+
+
+def test_same_content_same_etag():
+    first = serialize_payload({"城市": [1, 2], "total": 3})
+    assert first.etag == serialize_payload({"城市": [1, 2], "total": 3}).etag
+    assert first.etag != serialize_payload({"城市": [1, 2], "total": 4}).etag
+    assert first.body.decode("utf-8") == '{"城市":[1,2],"total":3}'
+
+
+@pytest.mark.parametrize("endpoint", ENDPOINTS)
+def test_not_modified_until_jobs_change(client, endpoint):
+    url = f"/api/v1/analysis/{endpoint}"
+    response = client.get(url)
+    etag = response.headers["etag"]
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "no-cache"
+    assert serialize_payload(response.json()).etag == etag
+
+    cached = client.get(url, headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["etag"] == etag
+
+    # 写入一个高薪职位使所有分析结果都发生变化
+    asyncio.run(job_service.create_job(JobCreate(
+        title="职位", company="公司", salary_min=900000, salary_max=900000, city="拉萨",
+        category="新类别", experience_required="10年以上", education_required="博士",
+        description="", requirements="", tags=["Rust"]
+    )))
+
+    changed = client.get(url, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert client.get(url, headers={"If-None-Match": changed.headers["etag"]}).status_code == 304
+
+
+def test_unchanged_snapshot_keeps_etag(client):
+    url = "/api/v1/analysis/city"
+    asyncio.run(analytics_snapshot.refresh_snapshot())
+    first = client.get(url)
+    assert first.headers["x-snapshot-generation"] == "1"
+
+    asyncio.run(analytics_snapshot.refresh_snapshot())
+    second = client.get(url, headers={"If-None-Match": first.headers["etag"]})
+    assert second.status_code == 304
+    assert second.headers["x-snapshot-generation"] == "2"
@@ -0,0 +1,172 @@
+"""
+职位聚合表：随机新增、修改、删除职位后，列式计算、SQL 聚合和聚合表三种引擎的分析结果一致，
+verify_rollups 不报告问题；被删除的分组最值在写入事务内重算，读取聚合表不修改数据
+"""
+import asyncio
+import json
+import random
+import pytest
+from database.database import SessionLocal, engine
+from models import Base, Job, JobRollup
+from core import job_service
+from core.aggregation_engine import load_job_columns
+from core.analysis_service import (
+    compute_salary_analysis, compute_city_analysis, compute_experience_analysis, compute_industry_analysis
+)
+from core.sql_aggregation import (
+    sql_salary_analysis, sql_city_analysis, sql_experience_analysis, sql_industry_analysis
+)
+from core.rollup_service import (
+    rollup_salary_analysis, rollup_city_analysis, rollup_experience_analysis, rollup_industry_analysis,
+    sync_rollups, verify_rollups
+)
+from core.job_events import publish_job_change
+from schemas.job import JobCreate, JobUpdate
+
+CITIES = ["北京", "上海", "深圳", "杭州", "成都"]
+CATEGORIES = ["技术开发", "数据智能", "产品", "运营"]
+EXPERIENCES = ["1-3年", "3-5年", "5-10年", "经验不限"]
+TAGS = ["Python", "Java", "Vue", "MySQL", "Docker", "Go"]
+
+ENGINES = {
+    "salary": (compute_salary_analysis, sql_salary_analysis, rollup_salary_analysis),
+    "city": (compute_city_analysis, sql_city_analysis, rollup_city_analysis),
+    "experience": (compute_experience_analysis, sql_experience_analysis, rollup_experience_analysis),
+    "industry": (compute_industry_analysis, sql_industry_analysis, rollup_industry_analysis),
+}
+
+
+def random_job(rng: random.Random) -> dict:
+    salary_min = rng.randint(30, 400) * 100
+    return {
+        "title": f"工程师{rng.randint(1, 50)}",
+        "company": f"公司{rng.randint(1, 20)}",
+        "city": rng.choice(CITIES),
+        "salary_min": salary_min,
+        "salary_max": salary_min + rng.randint(0, 200) * 100,
+        "experience_required": rng.choice(EXPERIENCES),
+        "education_required": "本科",
+        "description": "",
+        "requirements": "",
+        "category": rng.choice(CATEGORIES),
+        "tags": rng.sample(TAGS, rng.randint(0, 3)),
+    }
+
+
+@pytest.fixture
+def seeded_jobs():
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(3)
+    db = SessionLocal()
+    try:
+        for index in range(150):
+            record = random_job(rng)
+            # 一部分职位缺少城市、类别或经验，三种引擎都以 None 作为分组
+            if index % 10 == 0:
+                record[rng.choice(["city", "category", "experience_required"])] = None
+            db.add(Job(**dict(record, tags=json.dumps(record["tags"], ensure_ascii=False))))
+        db.commit()
+    finally:
+        db.close()
+    # 聚合表为空，与职位表不一致时从职位表重建
+    sync_rollups()
+    try:
+        yield rng
+    finally:
+        publish_job_change(reset=True)
+        Base.metadata.drop_all(bind=engine)
+
+
+def complete_jobs(db):
+    """字段完整、可以通过接口修改和返回的职位"""
+    return db.query(Job.id).filter(
+        Job.city.isnot(None), Job.category.isnot(None), Job.experience_required.isnot(None)
+    )
+
+
+def job_ids() -> list:
+    db = SessionLocal()
+    try:
+        return [job_id for (job_id,) in complete_jobs(db)]
+    finally:
+        db.close()
+
+
+def assert_engines_agree() -> None:
+    db = SessionLocal()
+    try:
+        columns = load_job_columns(db)
+        for name, (columnar, sql, rollup) in ENGINES.items():
+            expected = columnar(columns)
+            assert sql(db) == expected, name
+            assert rollup(db) == expected, name
+        assert verify_rollups(db) == []
+        assert db.query(JobRollup).filter(JobRollup.first_job_id.is_(None)).count() == 0
+    finally:
+        db.close()
+
+
+def test_engines_agree_after_random_writes(seeded_jobs):
+    rng = seeded_jobs
+    assert_engines_agree()
+    for _ in range(6):
+        ids = job_ids()
+        for _ in range(4):
+            asyncio.run(job_service.create_job(JobCreate(**random_job(rng))))
+        for job_id in rng.sample(ids, 6):
+            changes = {key: value for key, value in random_job(rng).items() if rng.random() < 0.5}
+            asyncio.run(job_service.update_job(job_id, JobUpdate(**changes)))
+        # 优先删除各分组的最值职位，覆盖最值重算
+        db = SessionLocal()
+        try:
+            extremes = [
+                job_id for (job_id,) in
+                complete_jobs(db).order_by(Job.salary_max.desc()).limit(2).all()
+                + complete_jobs(db).order_by(Job.salary_min).limit(2).all()
+                + complete_jobs(db).order_by(Job.id).limit(1).all()
+            ]
+        finally:
+            db.close()
+        for job_id in set(extremes) | set(rng.sample(ids, 3)):
+            asyncio.run(job_service.delete_job(job_id))
+        assert_engines_agree()
+
+
+def test_reading_rollups_does_not_write(seeded_jobs):
+    db = SessionLocal()
+    try:
+        # 包括缺少城市的职位所在的分组
+        cities = db.query(JobRollup).filter(JobRollup.dimension == "city").count()
+        assert cities == len(CITIES) + 1
+        db.query(JobRollup).filter(JobRollup.dimension == "city").update(
+            {JobRollup.salary_min: None, JobRollup.salary_max: None, JobRollup.first_job_id: None},
+            synchronize_session=False
+        )
+        db.commit()
+    finally:
+        db.close()
+
+    db = SessionLocal()
+    try:
+        rollup_city_analysis(db)
+        rollup_salary_analysis(db)
+        assert not db.new and not db.dirty and not db.deleted
+        db.rollback()
+    finally:
+        db.close()
+
+    db = SessionLocal()
+    try:
+        # 读取没有重算过期的最值；verify_rollups 如实报告
+        assert db.query(JobRollup).filter(JobRollup.first_job_id.is_(None)).count() == cities
+        assert len(verify_rollups(db)) == cities
+    finally:
+        db.close()
+
+    # 启动同步时重算并提交
+    sync_rollups()
+    db = SessionLocal()
+    try:
+        assert verify_rollups(db) == []
+    finally:
+        db.close()
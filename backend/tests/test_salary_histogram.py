@@ -0,0 +1,91 @@
+"""
+薪资直方图：任意边界、等宽划分下按中位值计数和按范围交集计数都与逐条判断一致；
+不筛选时使用薪资区间索引的结果与按城市/类别筛选后查询职位表的结果一致；非法参数返回400
+"""
+import asyncio
+import random
+import numpy as np
+import pytest
+from core.aggregation_engine import SALARY_BUCKET_EDGES, equal_width_edges
+from core.analysis_service import compute_salary_histogram, get_salary_histogram
+from database.database import SessionLocal
+from models import Job
+from tests.test_dashboard_service import client  # noqa: F401  共用职位数据和测试客户端
+
+
+def random_salaries(rng: random.Random, count: int) -> tuple:
+    salary_min = np.array([rng.randint(0, 60) * 500 for _ in range(count)], dtype=np.int64)
+    salary_max = salary_min + np.array([rng.randint(0, 40) * 500 for _ in range(count)], dtype=np.int64)
+    return salary_min, salary_max
+
+
+def brute_force(salary_min, salary_max, edges: list, mode: str) -> list:
+    bounds = [-np.inf] + edges + [np.inf]
+    counts = []
+    for low, high in zip(bounds, bounds[1:]):
+        if mode == "overlap":
+            counts.append(sum(1 for lo, hi in zip(salary_min, salary_max) if lo < high and hi >= low))
+        else:
+            counts.append(sum(1 for lo, hi in zip(salary_min, salary_max) if low <= (lo + hi) // 2 < high))
+    return counts
+
+
+@pytest.mark.parametrize("seed", range(6))
+@pytest.mark.parametrize("mode", ["midpoint", "overlap"])
+def test_counts_match_brute_force(seed, mode):
+    rng = random.Random(seed)
+    salary_min, salary_max = random_salaries(rng, rng.choice([0, 1, 300]))
+    # 边界可能与薪资值重合，也可能落在所有薪资之外
+    edges = sorted(rng.sample(range(-1000, 60000, 500), rng.randint(1, 12)))
+    result = compute_salary_histogram(salary_min, salary_max, edges, mode=mode)
+    assert result["edges"] == edges
+    assert [item["count"] for item in result["histogram"]] == brute_force(salary_min, salary_max, edges, mode)
+    assert result["histogram"][0]["min"] is None and result["histogram"][-1]["max"] is None
+    if mode == "midpoint":
+        assert sum(item["count"] for item in result["histogram"]) == len(salary_min)
+
+
+def test_equal_width_bins_and_defaults():
+    salary_min, salary_max = random_salaries(random.Random(1), 500)
+    mids = np.sort((salary_min + salary_max) // 2)
+    result = compute_salary_histogram(salary_min, salary_max, bins=7)
+    edges = equal_width_edges(mids, 7)
+    assert result["edges"] == edges and len(edges) == 6
+    assert [item["count"] for item in result["histogram"]] == brute_force(salary_min, salary_max, edges, "midpoint")
+
+    assert compute_salary_histogram(salary_min, salary_max)["edges"] == list(SALARY_BUCKET_EDGES)
+    single = compute_salary_histogram(salary_min, salary_max, bins=1)
+    assert single["histogram"] == [{"label": "全部", "min": None, "max": None, "count": 500}]
+
+
+def test_index_and_filtered_queries_match_database(client):
+    db = SessionLocal()
+    try:
+        rows = db.query(Job.salary_min, Job.salary_max, Job.city).all()
+    finally:
+        db.close()
+    edges = (5000, 12000, 20000)
+    for mode in ["midpoint", "overlap"]:
+        salary_min = np.array([row[0] for row in rows], dtype=np.int64)
+        salary_max = np.array([row[1] for row in rows], dtype=np.int64)
+        expected = compute_salary_histogram(salary_min, salary_max, edges, mode=mode)
+        result = asyncio.run(get_salary_histogram(edges=edges, mode=mode))
+        assert result["histogram"] == expected["histogram"]
+
+        city = rows[0][2]
+        selected = [row for row in rows if row[2] == city]
+        result = asyncio.run(get_salary_histogram(edges=edges, cities=(city,), mode=mode))
+        assert result["filters"] == {"city": [city], "category": []}
+        assert [item["count"] for item in result["histogram"]] == brute_force(
+            [row[0] for row in selected], [row[1] for row in selected], list(edges), mode
+        )
+
+
+@pytest.mark.parametrize("params", [
+    {"edges": "5000,5000"},
+    {"edges": "8000,5000"},
+    {"edges": "a,b"},
+    {"edges": "5000", "bins": 3},
+])
+def test_invalid_parameters(client, params):
+    assert client.get("/api/v1/analysis/salary-histogram", params=params).status_code == 400
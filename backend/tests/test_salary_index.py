@@ -0,0 +1,136 @@
+"""
+薪资区间索引：随机新增、修改、删除职位后，区间查询与逐条比较的结果对比，
+待合并集合未合并（查询时单独判断）和合并进排序数组两种状态下结果一致，合并结果与重新排序一致
+"""
+import random
+import numpy as np
+import pytest
+from core import salary_index as salary_index_module
+from core.salary_index import SalaryIntervalIndex
+
+SALARY_STEPS = [0, 3000, 5000, 8000, 10000, 12000, 15000, 20000, 25000, 30000, 50000]
+
+
+def random_job(rng: random.Random, job_id: int) -> dict:
+    low = rng.choice(SALARY_STEPS)
+    return {"id": job_id, "salary_min": low, "salary_max": low + rng.choice([0, 2000, 5000, 10000])}
+
+
+def brute_select(salaries: dict, min_low=None, min_high=None, max_low=None, max_high=None) -> list:
+    def inside(value, low, high):
+        return (low is None or value >= low) and (high is None or value <= high)
+    return sorted(
+        job_id for job_id, (low, high) in salaries.items()
+        if inside(low, min_low, min_high) and inside(high, max_low, max_high)
+    )
+
+
+def random_bound(rng: random.Random):
+    return None if rng.random() < 0.3 else rng.choice(SALARY_STEPS) + rng.choice([-1, 0, 1, 2500])
+
+
+def assert_matches(index: SalaryIntervalIndex, salaries: dict, rng: random.Random) -> None:
+    for _ in range(30):
+        bounds = [random_bound(rng) for _ in range(4)]
+        result = index.select(*bounds)
+        assert result.tolist() == brute_select(salaries, *bounds), bounds
+        low, high = random_bound(rng), random_bound(rng)
+        assert index.overlapping(low, high).tolist() == brute_select(salaries, min_high=high, max_low=low)
+        assert index.within(low, high).tolist() == brute_select(salaries, min_low=low, max_high=high)
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_select_matches_brute_force_with_pending_and_merged_arrays(seed, monkeypatch):
+    monkeypatch.setattr(salary_index_module, "MERGE_MIN_PENDING", 16)
+    rng = random.Random(seed)
+    index = SalaryIntervalIndex()
+    salaries = {}
+    next_id = 1
+    pending_states = set()
+    for _ in range(25):
+        operation = rng.random()
+        batch = rng.randint(1, 30)
+        if operation < 0.45 or not salaries:
+            added = [random_job(rng, next_id + offset) for offset in range(batch)]
+            next_id += batch
+            index.add(added)
+            salaries.update((record["id"], (record["salary_min"], record["salary_max"])) for record in added)
+        elif operation < 0.75:
+            # 修改：先移除旧值，再加入新值
+            for job_id in rng.sample(sorted(salaries), min(batch, len(salaries))):
+                old = {"id": job_id, "salary_min": salaries[job_id][0], "salary_max": salaries[job_id][1]}
+                new = random_job(rng, job_id)
+                index.remove([old])
+                index.add([new])
+                salaries[job_id] = (new["salary_min"], new["salary_max"])
+        else:
+            removed = rng.sample(sorted(salaries), min(batch, len(salaries)))
+            index.remove([{"id": job_id, "salary_min": 0, "salary_max": 0} for job_id in removed])
+            for job_id in removed:
+                del salaries[job_id]
+
+        assert len(index) == len(salaries)
+        assert_matches(index, salaries, rng)
+        pending_states.add(bool(index._pending))
+
+        # 合并后的排序数组与重新排序的结果一致
+        rebuilt = SalaryIntervalIndex()
+        rebuilt.add({"id": job_id, "salary_min": low, "salary_max": high} for job_id, (low, high) in salaries.items())
+        rebuilt._build()
+        bounds = [random_bound(rng) for _ in range(4)]
+        assert index.select(*bounds).tolist() == rebuilt.select(*bounds).tolist()
+        if not index._pending:
+            for name in ("_min", "_max"):
+                merged = sorted(zip(*(getattr(index, name + suffix).tolist() for suffix in ("_sorted", "_ids", "_other"))))
+                expected = sorted(zip(*(getattr(rebuilt, name + suffix).tolist() for suffix in ("_sorted", "_ids", "_other"))))
+                assert merged == expected
+                assert np.all(np.diff(getattr(index, name + "_sorted")) >= 0)
+            assert index._mid_sorted.tolist() == rebuilt._mid_sorted.tolist()
+
+    # 两种状态都被覆盖到
+    assert pending_states == {True, False}
+
+
+def test_sorted_bounds_merge_and_highest_paid_reads_pending_changes(monkeypatch):
+    rng = random.Random(11)
+    index = SalaryIntervalIndex()
+    # 初始的全量合并之后不再重新排序
+    index.add(random_job(rng, job_id) for job_id in range(2000, 2100))
+    index.sorted_bounds()
+    monkeypatch.setattr(index, "_build", lambda: pytest.fail("不应重新排序"))
+    index.remove(random_job(rng, job_id) for job_id in range(2000, 2100))
+    records = [random_job(rng, job_id) for job_id in range(1, 200)]
+    index.add(records)
+    index.remove(records[:50])
+    live = records[50:]
+    assert index._pending
+
+    salary_min, salary_max, salary_mid = index.sorted_bounds()
+    assert not index._pending
+    assert salary_min.tolist() == sorted(record["salary_min"] for record in live)
+    assert salary_max.tolist() == sorted(record["salary_max"] for record in live)
+    assert salary_mid.tolist() == sorted((record["salary_min"] + record["salary_max"]) // 2 for record in live)
+
+    # 待合并的新增、修改、删除直接参与 highest_paid，不触发合并
+    salaries = {record["id"]: record["salary_max"] for record in live}
+    index.add([{"id": 1000, "salary_min": 90000, "salary_max": 120000}])
+    salaries[1000] = 120000
+    top_id = max(salaries, key=lambda job_id: (salaries[job_id], job_id))
+    index.remove([{"id": top_id, "salary_min": 0, "salary_max": 0}])
+    del salaries[top_id]
+    lowered = live[-1]["id"]
+    index.remove([live[-1]])
+    index.add([dict(live[-1], salary_max=0)])
+    salaries[lowered] = 0
+    for limit in (1, 10, 500):
+        top = index.highest_paid(limit)
+        assert index._pending
+        assert len(set(top)) == len(top) == min(limit, len(salaries))
+        assert [salaries[job_id] for job_id in top] == sorted(salaries.values(), reverse=True)[:limit]
+
+
+def test_empty_index():
+    index = SalaryIntervalIndex()
+    assert index.select().tolist() == []
+    assert index.highest_paid(5) == []
+    assert all(isinstance(array, np.ndarray) and not len(array) for array in index.sorted_bounds())
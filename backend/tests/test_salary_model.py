@@ -0,0 +1,104 @@
+"""
+技能薪资溢价模型：共轭梯度求得的系数与稠密正规方程直接求解的结果一致，噪声很小时能还原真实溢价；
+系数保存后读取的模型给出相同的预测；经验年限映射到模型中的经验取值
+"""
+import json
+import math
+import random
+import numpy as np
+import pytest
+from database.database import SessionLocal, engine
+from models import Base
+from core.salary_model import (
+    MIN_SKILL_SUPPORT, experience_level_for_years, fit_salary_model, load_salary_model, save_salary_model
+)
+
+SKILL_EFFECTS = {"Python": 0.15, "Go": 0.25, "Java": 0.05, "Excel": -0.1, "Rust": 0.3}
+CITY_EFFECTS = {"北京": 0.2, "上海": 0.15, "成都": -0.1, "西安": -0.2}
+EXPERIENCE_EFFECTS = {"经验不限": -0.3, "1-3年": 0.0, "3-5年": 0.25, "5-10年": 0.5}
+
+
+def training_rows(rng: random.Random, count: int, noise: float) -> list:
+    rows = []
+    for _ in range(count):
+        skills = rng.sample(list(SKILL_EFFECTS), rng.randint(0, 3))
+        city = rng.choice(list(CITY_EFFECTS))
+        experience = rng.choice(list(EXPERIENCE_EFFECTS))
+        log_salary = math.log(15000) + sum(SKILL_EFFECTS[skill] for skill in skills) \
+            + CITY_EFFECTS[city] + EXPERIENCE_EFFECTS[experience] + rng.gauss(0, noise)
+        salary = int(math.exp(log_salary))
+        rows.append((city, experience, json.dumps(skills), salary, salary))
+    return rows
+
+
+def direct_solution(rows: list, model, alpha: float) -> dict:
+    """用稠密矩阵直接求解中心化的岭回归正规方程"""
+    features = list(model.coefficients)
+    X = np.array([
+        [1.0 if (kind == "skill" and value in json.loads(tags)) or (kind == "city" and value == city)
+         or (kind == "experience" and value == experience) else 0.0 for kind, value in features]
+        for city, experience, tags, _, _ in rows
+    ])
+    y = np.log([(salary_min + salary_max) / 2 for _, _, _, salary_min, salary_max in rows])
+    centered = X - X.mean(axis=0)
+    beta = np.linalg.solve(centered.T @ centered + alpha * np.eye(len(features)), centered.T @ (y - y.mean()))
+    return {"beta": dict(zip(features, beta)), "intercept": y.mean() - X.mean(axis=0) @ beta}
+
+
+@pytest.mark.parametrize("alpha", [0.1, 1.0, 50.0])
+def test_conjugate_gradient_matches_direct_solve(alpha):
+    rows = training_rows(random.Random(1), 800, noise=0.2)
+    model = fit_salary_model(rows, alpha=alpha)
+    expected = direct_solution(rows, model, alpha)
+    assert model.sample_size == len(rows)
+    assert model.intercept == pytest.approx(expected["intercept"], abs=1e-4)
+    for feature, (coefficient, _) in model.coefficients.items():
+        assert coefficient == pytest.approx(expected["beta"][feature], abs=1e-4), feature
+
+
+def test_recovers_true_premiums_without_noise():
+    rows = training_rows(random.Random(2), 2000, noise=0.001)
+    model = fit_salary_model(rows, alpha=0.01)
+    assert model.r_squared > 0.999
+    for skill, effect in SKILL_EFFECTS.items():
+        assert model.premiums[skill]["premium"] == pytest.approx(math.expm1(effect), abs=0.01)
+    assert [item["skill"] for item in model.ranking] == sorted(SKILL_EFFECTS, key=lambda skill: -SKILL_EFFECTS[skill])
+    # 城市与经验的系数只能确定到相差一个常数，比较两两差值
+    assert model.coefficient("city", "北京") - model.coefficient("city", "西安") == pytest.approx(0.4, abs=0.01)
+    predicted = model.predict(["Go", "Python"], "上海", "3-5年")
+    expected = 15000 * math.exp(0.25 + 0.15 + 0.15 + 0.25)
+    assert predicted == pytest.approx(expected, rel=0.01)
+
+
+def test_rare_skills_and_rows_without_salary_are_excluded():
+    rows = training_rows(random.Random(3), 200, noise=0.1)
+    rows += [("北京", "1-3年", json.dumps(["冷门技能"]), 20000, 20000)] * (MIN_SKILL_SUPPORT - 1)
+    rows += [("北京", "1-3年", json.dumps(["Python"]), None, None), ("北京", "1-3年", "[]", 0, 0)]
+    model = fit_salary_model(rows)
+    assert ("skill", "冷门技能") not in model.coefficients
+    assert model.sample_size == 200 + MIN_SKILL_SUPPORT - 1
+    assert fit_salary_model([("北京", "1-3年", "[]", None, 0)]) is None
+
+
+def test_saved_model_predicts_the_same():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        model = fit_salary_model(training_rows(random.Random(4), 300, noise=0.1))
+        save_salary_model(db, model)
+        loaded = load_salary_model(db)
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+    assert loaded.sample_size == model.sample_size
+    assert loaded.premiums == model.premiums
+    assert loaded.predict(["Rust"], "成都", "5-10年") == pytest.approx(model.predict(["Rust"], "成都", "5-10年"))
+
+
+def test_experience_level_for_years():
+    levels = ["经验不限", "1-3年", "3-5年", "5-10年", "10年以上"]
+    assert experience_level_for_years(0, levels) == "经验不限"
+    assert experience_level_for_years(3, levels) == "3-5年"
+    assert experience_level_for_years(12, levels) == "10年以上"
+    assert experience_level_for_years(12, levels[:4]) == "经验不限"
+    assert experience_level_for_years(2, ["3-5年"]) is None
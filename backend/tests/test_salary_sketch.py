@@ -0,0 +1,104 @@
+"""
+薪资分位数草图：分位数与排序后精确值的相对误差不超过 (GAMMA-1)/(GAMMA+1)；
+批量构建、逐个加入、分片合并的结果一致，移除是加入的逆操作；按维度的草图随职位变更事件更新
+"""
+import random
+import numpy as np
+import pytest
+from core.job_events import publish_job_change
+from core.salary_sketch import (
+    GAMMA, MIN_SALARY, MAX_SALARY, DEFAULT_QUANTILES, SalarySketch, get_salary_percentiles
+)
+
+RELATIVE_ERROR = (GAMMA - 1) / (GAMMA + 1)
+
+
+def exact_quantile(values: list, q: float) -> int:
+    """与草图相同的秩定义：排序后第 floor(q * (n-1)) 个值"""
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+
+def assert_within_error(estimate: int, exact: int) -> None:
+    exact = min(max(exact, MIN_SALARY), MAX_SALARY)
+    # 代表值取整最多再引入0.5的绝对误差
+    assert abs(estimate - exact) <= exact * RELATIVE_ERROR + 0.5
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_quantiles_within_relative_error(seed):
+    rng = random.Random(seed)
+    salaries = [int(rng.lognormvariate(9.8, 0.6)) for _ in range(rng.choice([1, 10, 5000]))]
+    sketch = SalarySketch.from_salaries(np.array(salaries))
+    assert sketch.count == len(salaries)
+    for q in [0, 0.01, *DEFAULT_QUANTILES.values(), 0.99, 1]:
+        assert_within_error(sketch.quantile(q), exact_quantile(salaries, q))
+
+
+def test_out_of_range_salaries_are_clamped():
+    sketch = SalarySketch.from_salaries(np.array([0, 10, 5 * MAX_SALARY]))
+    assert_within_error(sketch.quantile(0), MIN_SALARY)
+    assert_within_error(sketch.quantile(1), MAX_SALARY)
+    assert SalarySketch().quantile(0.5) is None
+
+
+def test_batch_incremental_and_merged_sketches_agree():
+    rng = random.Random(7)
+    salaries = [rng.randint(0, 120) * 500 for _ in range(2000)]
+    batch = SalarySketch.from_salaries(np.array(salaries))
+
+    incremental = SalarySketch()
+    for salary in salaries:
+        incremental.add(salary)
+    assert np.array_equal(batch.counts, incremental.counts)
+
+    shards = [SalarySketch.from_salaries(np.array(salaries[start:start + 300])) for start in range(0, 2000, 300)]
+    merged = SalarySketch()
+    for shard in shards:
+        merged.merge(shard)
+    assert np.array_equal(batch.counts, merged.counts)
+
+    for salary in salaries[1000:]:
+        incremental.remove(salary)
+    assert np.array_equal(incremental.counts, SalarySketch.from_salaries(np.array(salaries[:1000])).counts)
+
+
+def record(job_id: int, city: str, salary_min: int, salary_max: int) -> dict:
+    return {"id": job_id, "city": city, "category": "技术开发", "experience_required": "经验不限",
+            "salary_min": salary_min, "salary_max": salary_max}
+
+
+def test_registry_follows_job_changes():
+    rng = random.Random(11)
+    jobs = {
+        job_id: record(job_id, rng.choice(["北京", "上海"]), salary, salary + rng.randint(0, 20) * 1000)
+        for job_id, salary in ((job_id, rng.randint(3, 40) * 1000) for job_id in range(1, 401))
+    }
+    publish_job_change(added=list(jobs.values()), reset=True)
+    try:
+        # 修改一部分职位的城市和薪资，删除一部分职位
+        for job_id in rng.sample(sorted(jobs), 60):
+            updated = record(job_id, "深圳", jobs[job_id]["salary_min"] * 2, jobs[job_id]["salary_max"] * 2)
+            publish_job_change(added=[updated], removed=[jobs[job_id]])
+            jobs[job_id] = updated
+        for job_id in rng.sample(sorted(jobs), 40):
+            publish_job_change(removed=[jobs.pop(job_id)])
+
+        result = get_salary_percentiles("city")
+        mids = {}
+        for job in jobs.values():
+            mids.setdefault(job["city"], []).append((job["salary_min"] + job["salary_max"]) // 2)
+        assert set(result["percentiles"]) == set(mids)
+        assert result["overall"]["count"] == len(jobs)
+        for city, values in mids.items():
+            summary = result["percentiles"][city]
+            assert summary["count"] == len(values)
+            for name, q in DEFAULT_QUANTILES.items():
+                assert_within_error(summary[name], exact_quantile(values, q))
+
+        # 某城市的职位全部删除后不再出现
+        for job_id in [job_id for job_id, job in jobs.items() if job["city"] == "深圳"]:
+            publish_job_change(removed=[jobs.pop(job_id)])
+        assert "深圳" not in get_salary_percentiles("city")["percentiles"]
+    finally:
+        publish_job_change(reset=True)
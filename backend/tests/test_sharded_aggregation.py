@@ -0,0 +1,96 @@
+"""
+分片并行聚合：ID区间不重叠地覆盖全部职位；在进程池中按分片累加再合并的实时分析结果，
+与单进程逐行累加、以及聚合表计算的结果一致（包括分组的顺序）
+"""
+import asyncio
+import random
+import pytest
+from database.database import SessionLocal, engine
+from models import Base, Job
+from core import sharded_aggregation
+from core.sharded_aggregation import id_ranges, map_id_ranges, shutdown_executor
+from core.real_time_analysis import (
+    REAL_TIME_COLUMNS, accumulate_real_time, aggregate_id_range, finalize_real_time, merge_real_time
+)
+from core.rollup_service import rollup_real_time_analysis, sync_rollups
+from core.job_events import publish_job_change, replay_job_events
+from tests.test_aggregation_engine import random_rows
+
+
+@pytest.fixture
+def sparse_jobs():
+    """ID不连续（有大段空洞）的随机职位"""
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(6)
+    rows = random_rows(rng, 900)
+    job_ids = sorted(rng.sample(range(1, 40000), len(rows)))
+    db = SessionLocal()
+    try:
+        for job_id, (_, salary_min, salary_max, city, category, experience, education) in zip(job_ids, rows):
+            db.add(Job(
+                id=job_id, title="职位", company="公司", salary_min=salary_min or 0, salary_max=salary_max or 0,
+                city=city, category=category, experience_required=experience, education_required=education,
+                tags="[]"
+            ))
+        db.commit()
+    finally:
+        db.close()
+    replay_job_events()
+    try:
+        yield job_ids
+    finally:
+        shutdown_executor()
+        publish_job_change(reset=True)
+        Base.metadata.drop_all(bind=engine)
+
+
+@pytest.mark.parametrize("shards", [1, 3, 16, 1000])
+def test_id_ranges_cover_all_jobs_without_overlap(sparse_jobs, monkeypatch, shards):
+    monkeypatch.setattr(sharded_aggregation, "MIN_SHARD_SPAN", 100)
+    db = SessionLocal()
+    try:
+        ranges = id_ranges(db, shards)
+    finally:
+        db.close()
+    assert 1 <= len(ranges) <= shards
+    assert ranges[0][0] == sparse_jobs[0] and ranges[-1][1] == sparse_jobs[-1] + 1
+    assert all(end == start for (_, end), (start, _) in zip(ranges, ranges[1:]))
+    assert all(end - start >= 100 for start, end in ranges[:-1])
+    covered = sum(sum(start <= job_id < end for job_id in sparse_jobs) for start, end in ranges)
+    assert covered == len(sparse_jobs)
+
+
+def test_empty_table_has_no_ranges():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        assert id_ranges(db, 8) == []
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+def test_sharded_result_matches_single_process_and_rollups(sparse_jobs, monkeypatch):
+    monkeypatch.setattr(sharded_aggregation, "ANALYSIS_WORKERS", 3)
+    monkeypatch.setattr(sharded_aggregation, "MIN_SHARD_SPAN", 500)
+    db = SessionLocal()
+    try:
+        single = accumulate_real_time(db.query(*REAL_TIME_COLUMNS).order_by(Job.id))
+        partials = asyncio.run(map_id_ranges(aggregate_id_range, db))
+        assert len(partials) == 3 * sharded_aggregation.SHARDS_PER_WORKER
+        merged = merge_real_time(partials)
+        assert merged == single
+        # 合并保持分组首次出现的顺序
+        assert list(merged["city_salaries"]) == list(single["city_salaries"])
+        assert list(merged["experience_counts"]) == list(single["experience_counts"])
+        expected = finalize_real_time(single)
+        assert finalize_real_time(merged) == expected
+    finally:
+        db.close()
+
+    sync_rollups()
+    db = SessionLocal()
+    try:
+        assert rollup_real_time_analysis(db) == expected
+    finally:
+        db.close()
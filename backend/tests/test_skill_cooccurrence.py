@@ -0,0 +1,78 @@
+"""
+技能共现矩阵：随机增删改职位后，预先计算并按需更新的相关技能列表与从全部职位重新统计的结果一致
+"""
+import math
+import random
+from collections import Counter
+import pytest
+from core.skill_cooccurrence import SkillCooccurrence
+
+SKILLS = [f"技能{index}" for index in range(25)]
+
+
+def random_tags(rng: random.Random) -> list:
+    # 前几个技能更常见，重复的标签只计一次
+    return [rng.choice(SKILLS[:rng.randint(1, len(SKILLS))]) for _ in range(rng.randint(0, 5))]
+
+
+def brute_force(jobs: dict, skill: str, top_k: int, min_cooccurrence: int) -> list:
+    tag_sets = [set(tags) for tags in jobs.values()]
+    counts = Counter(tag for tags in tag_sets for tag in tags)
+    together = Counter(other for tags in tag_sets if skill in tags for other in tags if other != skill)
+    related = []
+    for other, count in together.items():
+        if count >= min_cooccurrence:
+            lift = len(tag_sets) * count / (counts[skill] * counts[other])
+            related.append({"skill": other, "count": count, "lift": lift, "pmi": math.log(lift),
+                            "confidence": count / counts[skill]})
+    related.sort(key=lambda item: (-round(item["lift"], 4), -item["count"], item["skill"]))
+    return related[:top_k]
+
+
+def assert_matches(matrix: SkillCooccurrence, jobs: dict) -> None:
+    for skill in SKILLS:
+        expected = brute_force(jobs, skill, matrix.top_k, matrix.min_cooccurrence)
+        related = matrix.related(skill)
+        assert [(item["skill"], item["count"]) for item in related] == \
+            [(item["skill"], item["count"]) for item in expected], skill
+        for item, reference in zip(related, expected):
+            assert item["lift"] == pytest.approx(reference["lift"], abs=1e-3)
+            assert item["pmi"] == pytest.approx(reference["pmi"], abs=1e-3)
+            assert item["confidence"] == round(reference["confidence"], 4)
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_related_skills_match_recount_after_random_changes(seed):
+    rng = random.Random(seed)
+    matrix = SkillCooccurrence(top_k=5)
+    jobs = {}
+    next_id = 1
+    for _ in range(10):
+        added = {job_id: random_tags(rng) for job_id in range(next_id, next_id + 40)}
+        next_id += len(added)
+        matrix.apply([{"id": job_id, "tags": tags} for job_id, tags in added.items()], 1)
+        jobs.update(added)
+        for job_id in rng.sample(sorted(jobs), 10):
+            updated = random_tags(rng)
+            matrix.apply([{"id": job_id, "tags": jobs[job_id]}], -1)
+            matrix.apply([{"id": job_id, "tags": updated}], 1)
+            jobs[job_id] = updated
+        for job_id in rng.sample(sorted(jobs), 15):
+            matrix.apply([{"id": job_id, "tags": jobs.pop(job_id)}], -1)
+        # 只查询部分技能，其余技能的预先计算结果会跨多轮变更保留
+        if rng.random() < 0.5:
+            assert_matches(matrix, jobs)
+    assert_matches(matrix, jobs)
+    assert matrix.total_jobs == len(jobs)
+
+
+def test_removed_skills_have_no_neighbours():
+    matrix = SkillCooccurrence(min_cooccurrence=1)
+    jobs = [{"id": 1, "tags": ["Python", "Go", "Python"]}, {"id": 2, "tags": ["Python", "Java"]}]
+    matrix.apply(jobs, 1)
+    assert [item["skill"] for item in matrix.related("Python")] == ["Go", "Java"]
+    assert matrix.related("Go")[0]["count"] == 1
+    matrix.apply(jobs[:1], -1)
+    assert matrix.related("Go") == []
+    assert [item["skill"] for item in matrix.related("Python")] == ["Java"]
+    assert "Go" not in matrix.skill_counts and "Go" not in matrix.pair_counts
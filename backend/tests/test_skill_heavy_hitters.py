@@ -0,0 +1,109 @@
+"""
+热门技能计数（Space-Saving）：记录的计数不小于真实计数、减去误差后不大于真实计数，高估不超过 总数 / 容量；
+真实计数超过 总数 / 容量 的技能一定被记录，标记为确定的技能一定属于真实的前 limit 名；
+计数器未满时计数精确，按维度的计数器随职位变更事件更新
+"""
+import random
+from collections import Counter
+import pytest
+from core.job_events import publish_job_change
+from core.skill_heavy_hitters import SpaceSaving, get_popular_skills, top_skill_counts
+
+
+def zipf_stream(rng: random.Random, length: int, vocabulary: int) -> list:
+    weights = [1 / rank for rank in range(1, vocabulary + 1)]
+    return rng.choices([f"技能{index}" for index in range(vocabulary)], weights=weights, k=length)
+
+
+def assert_bounds(counter: SpaceSaving, truth: Counter) -> None:
+    for item, (count, error, _) in counter.entries.items():
+        assert count >= truth[item], item
+        assert count - error <= truth[item], item
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_space_saving_guarantees(seed):
+    rng = random.Random(seed)
+    counter = SpaceSaving(capacity=30)
+    stream = zipf_stream(rng, 5000, 400)
+    for item in stream:
+        counter.add(item)
+    truth = Counter(stream)
+    assert counter.total == len(stream)
+    assert len(counter.entries) == 30
+    assert_bounds(counter, truth)
+    bound = len(stream) / counter.capacity
+    assert counter.max_error <= bound
+    for item, (count, _, _) in counter.entries.items():
+        assert count - truth[item] <= counter.max_error
+    for item, count in truth.items():
+        if count > bound:
+            assert item in counter.entries, item
+
+    for limit in [1, 5, 10]:
+        top = counter.top(limit)
+        counts = [item["count"] for item in top]
+        assert counts == sorted(counts, reverse=True)
+        kth_largest = sorted(truth.values(), reverse=True)[limit - 1]
+        for item in top:
+            if item["guaranteed"]:
+                assert truth[item["skill"]] >= kth_largest, item
+        # 头部技能远比其他技能常见，应当被确定
+        assert top[0]["guaranteed"]
+
+
+def test_bounds_hold_after_removals():
+    rng = random.Random(5)
+    counter = SpaceSaving(capacity=25)
+    stream = zipf_stream(rng, 4000, 200)
+    for item in stream:
+        counter.add(item)
+    truth = Counter(stream)
+    for item in rng.sample(stream, 400):
+        counter.remove(item)
+        truth[item] -= 1
+    assert counter.total == sum(truth.values())
+    assert_bounds(counter, truth)
+
+
+def test_exact_until_capacity_is_reached():
+    counter = SpaceSaving(capacity=10)
+    stream = ["Python"] * 5 + ["Go"] * 3 + ["Java"] * 3 + ["Vue"]
+    for item in stream:
+        counter.add(item)
+    counter.remove("Go")
+    assert counter.max_error == 0
+    assert counter.top(3) == [
+        {"skill": "Python", "count": 5, "error": 0, "guaranteed": True},
+        {"skill": "Java", "count": 3, "error": 0, "guaranteed": True},
+        {"skill": "Go", "count": 2, "error": 0, "guaranteed": True},
+    ]
+    counter.remove("Vue")
+    assert "Vue" not in counter.entries
+
+
+def test_dimension_counters_follow_job_changes():
+    rng = random.Random(6)
+    jobs = {
+        job_id: {"id": job_id, "city": rng.choice(["北京", "上海"]), "category": "技术开发",
+                 "tags": rng.sample(["Python", "Java", "Go", "Vue", "MySQL"], rng.randint(0, 3))}
+        for job_id in range(1, 301)
+    }
+    publish_job_change(added=list(jobs.values()), reset=True)
+    try:
+        for job_id in rng.sample(sorted(jobs), 50):
+            updated = dict(jobs[job_id], city="深圳", tags=["Rust"])
+            publish_job_change(added=[updated], removed=[jobs[job_id]])
+            jobs[job_id] = updated
+        for job_id in rng.sample(sorted(jobs), 30):
+            publish_job_change(removed=[jobs.pop(job_id)])
+
+        for city in ["北京", "上海", "深圳"]:
+            truth = Counter(tag for job in jobs.values() if job["city"] == city for tag in job["tags"])
+            result = get_popular_skills(10, "city", city)
+            assert result["total_tags"] == sum(truth.values())
+            assert {item["skill"]: item["count"] for item in result["skills"]} == dict(truth)
+        truth = Counter(tag for job in jobs.values() for tag in job["tags"])
+        assert top_skill_counts(3) == truth.most_common(3)
+    finally:
+        publish_job_change(reset=True)
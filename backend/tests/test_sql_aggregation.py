@@ -0,0 +1,68 @@
+"""
+SQL聚合路径：同一批职位（含空字段、并列的分组）上，GROUP BY 查询的结果及其键的顺序与列式计算一致；
+upsert 在唯一键冲突时改为更新
+"""
+import random
+import pytest
+from database.database import SessionLocal, engine
+from models import Base, Job, JobRollup
+from core.aggregation_engine import load_job_columns
+from core.analysis_service import (
+    compute_salary_analysis, compute_city_analysis, compute_experience_analysis, compute_industry_analysis
+)
+from core.sql_aggregation import (
+    sql_salary_analysis, sql_city_analysis, sql_experience_analysis, sql_industry_analysis, upsert
+)
+from tests.test_aggregation_engine import ordered, random_rows
+
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+def insert_rows(db, rows: list) -> None:
+    db.add_all([
+        Job(
+            id=job_id, title="职位", salary_min=salary_min, salary_max=salary_max, city=city,
+            category=category, experience_required=experience, education_required=education
+        )
+        for job_id, salary_min, salary_max, city, category, experience, education in rows
+    ])
+    db.commit()
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_sql_results_match_columnar(db, seed):
+    rng = random.Random(seed)
+    insert_rows(db, random_rows(rng, rng.choice([1, 50, 600])))
+    columns = load_job_columns(db)
+    assert ordered(sql_salary_analysis(db)) == ordered(compute_salary_analysis(columns))
+    assert ordered(sql_city_analysis(db)) == ordered(compute_city_analysis(columns))
+    assert ordered(sql_experience_analysis(db)) == ordered(compute_experience_analysis(columns))
+    assert ordered(sql_industry_analysis(db)) == ordered(compute_industry_analysis(columns))
+
+
+def test_empty_table(db):
+    columns = load_job_columns(db)
+    assert sql_salary_analysis(db) == compute_salary_analysis(columns)
+    assert sql_city_analysis(db) == compute_city_analysis(columns)
+    assert sql_experience_analysis(db) == compute_experience_analysis(columns)
+    assert sql_industry_analysis(db) == compute_industry_analysis(columns)
+
+
+def test_upsert_inserts_then_updates(db):
+    values = {"dimension": "city", "value": "北京", "job_count": 1, "salary_sum": 100,
+              "salary_min": 100, "salary_max": 100, "first_job_id": 5}
+    updates = {"job_count": JobRollup.job_count + 1, "salary_sum": JobRollup.salary_sum + 100}
+    upsert(db, JobRollup, values, updates)
+    upsert(db, JobRollup, values, updates)
+    db.commit()
+    row = db.query(JobRollup).one()
+    assert (row.job_count, row.salary_sum, row.first_job_id) == (2, 200, 5)
@@ -0,0 +1,115 @@
+"""
+技能趋势：当前窗口与上一窗口包含相同数量的时间桶，窗口内的职位数、增长率和平均薪资与按发布日期逐条统计的结果一致；
+没有创建时间的职位不计入任何窗口，聚合表与职位表保持一致
+"""
+import json
+import random
+from datetime import date, datetime, timedelta
+import pytest
+from database.database import SessionLocal, engine
+from models import Base, Job
+from core.job_events import publish_job_change
+from core import rollup_service
+from core.rollup_service import sync_rollups, verify_rollups
+from core.trend_service import bucket_end, bucket_start, compute_skill_trends
+
+TAGS = ["Python", "Java", "Go", "Vue"]
+CATEGORIES = ["技术开发", "产品"]
+
+
+@pytest.fixture
+def dated_jobs():
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(4)
+    today = datetime.combine(date.today(), datetime.min.time())
+    db = SessionLocal()
+    try:
+        for _ in range(400):
+            salary_min = rng.randint(5, 40) * 1000
+            db.add(Job(
+                title="工程师", company="公司", city="北京",
+                salary_min=salary_min, salary_max=salary_min + rng.randint(0, 10) * 1000,
+                experience_required="经验不限", education_required="本科", description="", requirements="",
+                category=rng.choice(CATEGORIES), tags=json.dumps(rng.sample(TAGS, rng.randint(0, 2))),
+                # 包含未来一周内的职位，它们不属于任何窗口
+                created_at=today - timedelta(days=rng.randint(-7, 150), hours=rng.randint(0, 23)),
+            ))
+        db.flush()
+        db.query(Job).filter(Job.id % 10 == 0).update({Job.created_at: None}, synchronize_session=False)
+        db.commit()
+        jobs = [
+            {"created_at": job.created_at, "category": job.category, "tags": json.loads(job.tags),
+             "salary_mid": (job.salary_min + job.salary_max) // 2}
+            for job in db.query(Job).all()
+        ]
+    finally:
+        db.close()
+    sync_rollups()
+    try:
+        yield jobs
+    finally:
+        publish_job_change(reset=True)
+        Base.metadata.drop_all(bind=engine)
+
+
+def window_counts(jobs: list, start: date, end: date) -> tuple:
+    """窗口 [start, end) 内 (职位数, 技能 -> [职位数, 薪资和])"""
+    inside = [job for job in jobs if job["created_at"] is not None and start <= job["created_at"].date() < end]
+    skills = {}
+    for job in inside:
+        for tag in job["tags"]:
+            entry = skills.setdefault(tag, [0, 0])
+            entry[0] += 1
+            entry[1] += job["salary_mid"]
+    return len(inside), skills
+
+
+def compute_skill_trends_session(window_days: int, period: str) -> dict:
+    db = SessionLocal()
+    try:
+        return compute_skill_trends(db, window_days, period, limit=len(TAGS))
+    finally:
+        db.close()
+
+
+@pytest.mark.parametrize("period,window_days", [("day", 30), ("day", 7), ("week", 30), ("week", 60)])
+def test_windows_have_equal_length_and_match_postings(dated_jobs, period, window_days):
+    result = compute_skill_trends_session(window_days, period)
+    current_start = date.fromisoformat(result["current_window_start"])
+    previous_start = date.fromisoformat(result["previous_window_start"])
+    current_end = bucket_end(date.today(), period)
+    assert current_start == bucket_start(current_start, period)
+    assert current_end - current_start == current_start - previous_start
+    assert (current_end - current_start).days >= window_days
+
+    total, current = window_counts(dated_jobs, current_start, current_end)
+    _, previous = window_counts(dated_jobs, previous_start, current_start)
+    assert result["total_postings"] == total
+    top = {item["skill"]: item for item in result["top_skills"]}
+    assert set(top) == set(current)
+    for skill, (count, salary_sum) in current.items():
+        previous_count = previous.get(skill, [0])[0]
+        assert top[skill]["count"] == count
+        assert top[skill]["avg_salary"] == salary_sum // count
+        expected_growth = round((count - previous_count) / previous_count * 100, 1) if previous_count else 100.0
+        assert top[skill]["growth"] == expected_growth
+
+
+def test_jobs_without_created_at_are_skipped_and_rollups_stay_in_sync(dated_jobs, monkeypatch):
+    db = SessionLocal()
+    try:
+        assert verify_rollups(db) == []
+    finally:
+        db.close()
+    undated = sum(job["created_at"] is None for job in dated_jobs)
+    assert undated
+    total, _ = window_counts(dated_jobs, date.min, date.max)
+    assert total == len(dated_jobs) - undated
+    # 趋势聚合表的职位数少于职位总数，但启动同步时不会因此重建
+    monkeypatch.setattr(rollup_service, "rebuild_rollups", lambda db: pytest.fail("不应重建聚合表"))
+    sync_rollups()
+    db = SessionLocal()
+    try:
+        assert verify_rollups(db) == []
+    finally:
+        db.close()
@@ -1,4 +1,5 @@
 import re
+import json
 from typing import List, Dict, Any
 
 def clean_salary_text(salary_str: str) -> tuple:
@@ -207,4 +208,41 @@ def parse_job_data_from_raw(raw_data: Dict[str, Any]) -> Dict[str, Any]:
         'requirements': requirements,
         'category': raw_data.get('category', raw_data.get('job_category', raw_data.get('position_category', '技术'))),
         'tags': unique_tags
-    }
\ No newline at end of file
+    }
+
+def parse_job_tags(tags: Any) -> List[str]:
+    """
+    解析职位的技能标签
+    tags 可能是列表，也可能是（经过一次或多次编码的）JSON字符串
+    """
+    while isinstance(tags, str):
+        try:
+            tags = json.loads(tags)
+        except (ValueError, TypeError):
+            return []
+    
+    if not isinstance(tags, list):
+        return []
+    return [tag for tag in tags if isinstance(tag, str)]
+
+def job_record(job: Any) -> Dict[str, Any]:
+    """
+    把职位ORM对象转换为与数据库会话无关的普通字典
+    供聚合表、内存索引等结构在会话关闭后继续使用
+    """
+    return {
+        'id': job.id,
+        'title': job.title,
+        'company': job.company,
+        'city': job.city,
+        'salary_min': job.salary_min or 0,
+        'salary_max': job.salary_max or 0,
+        'experience_required': job.experience_required,
+        'education_required': job.education_required,
+        'description': job.description,
+        'requirements': job.requirements,
+        'category': job.category,
+        'tags': parse_job_tags(job.tags),
+        # 刚插入的职位在刷新前没有加载数据库默认的创建时间，此时不触发额外查询
+        'created_at': job.__dict__.get('created_at')
+    }
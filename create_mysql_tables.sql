@@ -24,9 +24,49 @@ CREATE TABLE jobs (
     INDEX idx_company (company),
     INDEX idx_city (city),
     INDEX idx_category (category),
-    INDEX idx_created_at (created_at)
+    INDEX idx_created_at (created_at),
+    INDEX ix_jobs_salary_max_id (salary_max, id),
+    INDEX ix_jobs_created_at_id (created_at, id)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='职位信息表';
 
+-- 创建职位聚合表（随职位写入增量维护，可用 python -m core.rollup_service rebuild 重建）
+CREATE TABLE job_rollups (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    dimension VARCHAR(20) NOT NULL COMMENT '维度(total/city/category/experience/salary_bucket/skill)',
+    value VARCHAR(255) NOT NULL DEFAULT '' COMMENT '维度取值',
+    job_count INT NOT NULL DEFAULT 0 COMMENT '职位数',
+    salary_sum BIGINT NOT NULL DEFAULT 0 COMMENT '薪资中位值之和',
+    salary_min INT COMMENT '最低薪资',
+    salary_max INT COMMENT '最高薪资',
+    first_job_id INT COMMENT '分组内最小职位ID',
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '更新时间',
+    UNIQUE KEY uq_job_rollup_dimension_value (dimension, value)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='职位聚合表';
+
+-- 创建技能趋势聚合表
+CREATE TABLE skill_trend_rollups (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    period VARCHAR(10) NOT NULL COMMENT '时间粒度(day/week)',
+    bucket_start DATE NOT NULL COMMENT '时间桶起始日(当天或当周周一)',
+    dimension VARCHAR(20) NOT NULL COMMENT '维度(total/skill/category)',
+    value VARCHAR(255) NOT NULL DEFAULT '' COMMENT '维度取值',
+    posting_count INT NOT NULL DEFAULT 0 COMMENT '职位数',
+    salary_sum BIGINT NOT NULL DEFAULT 0 COMMENT '薪资中位值之和',
+    UNIQUE KEY uq_skill_trend_bucket (period, bucket_start, dimension, value),
+    INDEX idx_bucket_start (bucket_start)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='技能趋势聚合表';
+
+-- 创建技能薪资溢价模型系数表
+CREATE TABLE salary_model_coefficients (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    feature_type VARCHAR(20) NOT NULL COMMENT '特征类型(intercept/skill/city/experience)',
+    feature_value VARCHAR(255) NOT NULL DEFAULT '' COMMENT '特征取值',
+    coefficient DOUBLE NOT NULL COMMENT '对数薪资上的系数',
+    support INT NOT NULL DEFAULT 0 COMMENT '含该特征的职位数(截距行为样本数)',
+    fitted_at DATETIME NOT NULL COMMENT '拟合时间',
+    UNIQUE KEY uq_salary_model_feature (feature_type, feature_value)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='技能薪资溢价模型系数表';
+
 -- 创建用户表
 CREATE TABLE users (
     id INT AUTO_INCREMENT PRIMARY KEY,